@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Element extraction: python-pptx shape/run walk vs the XML extractor.
+
+Both produce element_info records for every text shape and table cell; the
+records are compared so the speedup is only reported for identical output.
+
+Usage: python -m benchmarks.bench_extract [slides] [shapes_per_slide] [runs_per_paragraph] [table_rows]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from pptx import Presentation
+
+from benchmarks.synthetic_deck import make_deck
+from pptx_extract import element_record, extract_elements
+
+
+REPEAT = 3
+
+
+def python_pptx_runs(text_frame):
+    runs = []
+    for paragraph in text_frame.paragraphs:
+        for run in paragraph.runs:
+            if "©" in run.text:
+                break
+            size = run.font.size.pt if run.font.size else None
+            runs.append((run.font.name, size, run.font.italic, run.text))
+    return runs
+
+
+def python_pptx_elements(path):
+    """The python-pptx walk over shapes and table cells, as pptx_compliance used to do it"""
+    prs = Presentation(path)
+    records = []
+    for slide_idx, slide in enumerate(prs.slides, 1):
+        for shape_idx, shape in enumerate(slide.shapes, 1):
+            element_id = str(shape_idx)
+            if shape.has_text_frame:
+                record = element_record(slide_idx, element_id, shape.text, python_pptx_runs(shape.text_frame))
+                records.append((slide_idx, element_id, record))
+            elif shape.has_table:
+                for row_idx, row in enumerate(shape.table.rows, 1):
+                    for col_idx, cell in enumerate(row.cells, 1):
+                        if cell.is_spanned or not cell.text:
+                            continue
+                        cell_id = f"{element_id}.r{row_idx}c{col_idx}"
+                        record = element_record(slide_idx, cell_id, cell.text, python_pptx_runs(cell.text_frame))
+                        records.append((slide_idx, cell_id, record))
+    return records
+
+
+def best_time(func, path):
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = func(path)
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    args = [int(a) for a in sys.argv[1:]]
+    slides = args[0] if len(args) > 0 else 200
+    shapes = args[1] if len(args) > 1 else 8
+    runs = args[2] if len(args) > 2 else 3
+    table_rows = args[3] if len(args) > 3 else 0
+    with tempfile.TemporaryDirectory() as tmp:
+        path = make_deck(os.path.join(tmp, "deck.pptx"), slides, shapes, runs_per_paragraph=runs,
+                         table_rows=table_rows)
+        print(f"Deck: {slides} slides x {shapes} shapes x {runs} runs, {table_rows}x6 table per slide")
+        print("extractor\tseconds\trecords")
+        pptx_time, expected = best_time(python_pptx_elements, path)
+        print(f"python-pptx\t{pptx_time:.3f}\t{len(expected)}")
+        xml_time, records = best_time(lambda p: list(extract_elements(p)), path)
+        print(f"xml\t{xml_time:.3f}\t{len(records)}")
+        resolved_time, _ = best_time(lambda p: list(extract_elements(p, resolve_styles=True)), path)
+        print(f"xml+styles\t{resolved_time:.3f}\t{len(records)}")
+        if records != expected:
+            print("Records differ!")
+            sys.exit(1)
+        print(f"Speedup: {pptx_time / xml_time:.1f}x (identical records)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Hybrid icon search latency: lexical IconSearcher score plus a name
+embedding matrix product, on a synthetic library.
+
+The sentence model is replaced by a deterministic 384-d token hashing
+encoder, so the numbers cover everything but encoding the query (a few
+milliseconds for all-MiniLM-L6-v2 on CPU).
+
+Usage: python -m benchmarks.bench_icon_hybrid [icons]
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+import zlib
+
+import numpy as np
+
+# Importing bench_icon_search puts demo/ on sys.path.
+from benchmarks.bench_icon_search import QUERIES, VARIANTS, make_library
+from icon_embeddings import HybridIconSearch, build_icon_embeddings
+from icon_search import IconSearcher
+
+
+DIM = 384
+SLIDE_TEXTS = [
+    "Protect customer data with end-to-end encryption and access control",
+    "Our roadmap for cloud growth in 2025",
+    "Blockchain ledger for supply chain transparency",
+    "Machine learning improves forecast accuracy",
+]
+
+
+class HashingEncoder:
+    """Stand-in for SentenceTransformer.encode: sum of fixed random vectors per token"""
+
+    def __init__(self, dim=DIM):
+        self.dim = dim
+        self._tokens = {}
+
+    def _token(self, token):
+        vector = self._tokens.get(token)
+        if vector is None:
+            rng = np.random.default_rng(zlib.crc32(token.encode()))
+            vector = self._tokens[token] = rng.standard_normal(self.dim).astype(np.float32)
+        return vector
+
+    def encode(self, texts, batch_size=None):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in text.lower().split():
+                vectors[row] += self._token(token)
+        return vectors
+
+
+def main():
+    icons = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    encoder = HashingEncoder()
+    with tempfile.TemporaryDirectory() as tmp:
+        library = make_library(os.path.join(tmp, "icons"), icons * len(VARIANTS))
+        searcher = IconSearcher(library)
+        start = time.perf_counter()
+        embeddings = build_icon_embeddings(searcher.catalog, encoder, os.path.join(tmp, "icons.npz"))
+        print(f"{len(embeddings)} icons: embeddings built in {time.perf_counter() - start:.2f}s "
+              f"({embeddings.encoded} distinct names)")
+        start = time.perf_counter()
+        embeddings = build_icon_embeddings(searcher.catalog, encoder, os.path.join(tmp, "icons.npz"))
+        print(f"reload (nothing to encode): {time.perf_counter() - start:.2f}s")
+        start = time.perf_counter()
+        hybrid = HybridIconSearch(searcher, embeddings, encoder)
+        print(f"lexical index: {time.perf_counter() - start:.2f}s")
+
+        queries = QUERIES + SLIDE_TEXTS
+        vectors = encoder.encode(queries)
+        times = []
+        for query, vector in zip(queries, vectors):
+            start = time.perf_counter()
+            hybrid.search_vector(query, vector)
+            times.append(time.perf_counter() - start)
+        print(f"hybrid search (query encoded): median {statistics.median(times) * 1000:.1f} ms, "
+              f"max {max(times) * 1000:.1f} ms over {len(queries)} queries")
+
+
+if __name__ == "__main__":
+    main()
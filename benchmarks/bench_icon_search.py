@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Icon search: indexed IconSearcher.search vs scoring every icon (search_linear).
+
+Builds a synthetic library of empty ID_name_color.ext files with names made
+from the demo library and guideline vocabulary, checks that both searches
+return the same ranking for every query (including typos and short terms)
+and reports catalog load/update time and per-query latency.
+
+Usage: python -m benchmarks.bench_icon_search [icons] [linear_icons]
+"""
+
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "demo"))
+from icon_catalog import parse_icon_filename  # noqa: E402
+from icon_search import IconSearcher  # noqa: E402
+
+
+DEMO_LIBRARY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            "demo", "ImageLibrary_60_20250609_1733")
+ADDED_ICONS = 30
+VARIANTS = [("blue", "png"), ("blue", "svg"), ("white", "png")]
+QUERIES = ["security", "cloud", "data", "netwrk", "securty", "customer value", "growth", "roadmap",
+           "passwrod", "usr", "dta", "ai", "x", "privacy policy", "verification", "phishing-email", "xyz"]
+
+
+def vocabulary():
+    words = set()
+    for filename in os.listdir(DEMO_LIBRARY):
+        words.update(w for w in re.split(r"[-_.]", filename.lower()) if w.isalpha() and len(w) > 2)
+    with open("mydoc_chunks.json") as f:
+        for chunk in json.load(f):
+            words.update(re.findall(r"[a-z]{3,12}", chunk.lower()))
+    words -= {"blue", "white", "png", "svg"}
+    return sorted(words)
+
+
+def make_library(path, count, seed=0):
+    rng = random.Random(seed)
+    words = vocabulary()
+    os.makedirs(path, exist_ok=True)
+    for n in range(count):
+        icon_id = 100000 + n // len(VARIANTS)
+        if n % len(VARIANTS) == 0:
+            name = "-".join(rng.sample(words, rng.randint(1, 3)))
+        color, extension = VARIANTS[n % len(VARIANTS)]
+        open(os.path.join(path, f"{icon_id}_{name}_{color}.{extension}"), "w").close()
+    return path
+
+
+def typo_queries(words, count, seed=1):
+    rng = random.Random(seed)
+    queries = []
+    for word in rng.sample(words, count):
+        i = rng.randrange(len(word))
+        kind = rng.randrange(3)
+        if kind == 0:
+            queries.append(word[:i] + word[i + 1:])
+        elif kind == 1 and i < len(word) - 1:
+            queries.append(word[:i] + word[i + 1] + word[i] + word[i + 2:])
+        else:
+            queries.append(word[:i] + rng.choice("aeiou") + word[i + 1:])
+    return queries
+
+
+def parse_listing(path):
+    """What every CLI start did before the catalog: list the library and parse each file name"""
+    return sum(parse_icon_filename(f) is not None for f in os.listdir(path))
+
+
+def timed(func, queries):
+    times, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(func(query))
+        times.append(time.perf_counter() - start)
+    return times, results
+
+
+def ranking(results):
+    return [(round(score, 12), icon["filename"]) for score, icon in results]
+
+
+def main():
+    args = [int(a) for a in sys.argv[1:]]
+    icons = args[0] if len(args) > 0 else 100000
+    linear_icons = args[1] if len(args) > 1 else 10000
+    queries = QUERIES + typo_queries(vocabulary(), 40)
+    with tempfile.TemporaryDirectory() as tmp:
+        # Rankings are compared on a smaller library; scoring every icon at 100k takes seconds per query.
+        small = IconSearcher(make_library(os.path.join(tmp, "small"), linear_icons))
+        _, indexed = timed(small.search, queries)
+        linear_times, linear = timed(small.search_linear, queries)
+        mismatches = [q for q, a, b in zip(queries, indexed, linear) if ranking(a) != ranking(b)]
+        print(f"{linear_icons} icons: {len(queries) - len(mismatches)}/{len(queries)} queries ranked identically"
+              f" (linear median {statistics.median(linear_times) * 1000:.0f} ms)")
+        if mismatches:
+            print("Rankings differ for:", ", ".join(mismatches))
+
+        library = make_library(os.path.join(tmp, "large"), icons)
+        start = time.perf_counter()
+        scan = parse_listing(library)
+        print(f"{icons} icons: listdir + parse {time.perf_counter() - start:.2f}s ({scan} files)")
+        for label in ("catalog build", "catalog load"):
+            start = time.perf_counter()
+            searcher = IconSearcher(library)
+            print(f"{label}: {time.perf_counter() - start:.2f}s")
+        for n in range(ADDED_ICONS):
+            open(os.path.join(library, f"{900000 + n}_added-icon_blue.png"), "w").close()
+        start = time.perf_counter()
+        searcher = IconSearcher(library)
+        print(f"catalog update (+{ADDED_ICONS} files): {time.perf_counter() - start:.2f}s")
+        start = time.perf_counter()
+        searcher._build_index()
+        print(f"icon records + search index: {time.perf_counter() - start:.2f}s, {len(searcher.keyword_icons)} distinct keywords")
+        times, _ = timed(searcher.search, queries)
+        print(f"indexed search: median {statistics.median(times) * 1000:.1f} ms, "
+              f"max {max(times) * 1000:.1f} ms over {len(queries)} queries")
+        linear_times, _ = timed(searcher.search_linear, QUERIES[:3])
+        print(f"linear search: median {statistics.median(linear_times) * 1000:.0f} ms over 3 queries")
+        if mismatches:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
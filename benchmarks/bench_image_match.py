@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Picture check latency: a deck of library icons, recoloured icons and
+noise images matched against the memory-mapped icon feature index.
+
+The index is built in a temporary directory, so the first line is the
+cold build; later checks only decode the deck's images.
+
+Usage: python -m benchmarks.bench_image_match [pictures] [library_path]
+"""
+
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+from pptx import Presentation
+from pptx.util import Inches
+
+from image_match import build_feature_index, check_pictures, load_feature_index
+
+
+DEFAULT_LIBRARY = os.path.join("demo", "ImageLibrary_60_20250609_1733")
+PICTURES_PER_SLIDE = 8
+
+
+def make_deck(library_path, pictures):
+    """Deck bytes with library icons as-is, recoloured red, and random noise, in turn"""
+    icons = sorted(f for f in os.listdir(library_path) if f.endswith(".png"))
+    rng = np.random.default_rng(0)
+    prs = Presentation()
+    for n in range(pictures):
+        if n % PICTURES_PER_SLIDE == 0:
+            slide = prs.slides.add_slide(prs.slide_layouts[6])
+        image = Image.open(os.path.join(library_path, icons[n * 7 % len(icons)])).convert("RGBA")
+        if n % 3 == 1:
+            pixels = np.asarray(image).copy()
+            pixels[..., :3] = (200, 30, 30)
+            image = Image.fromarray(pixels)
+        elif n % 3 == 2:
+            image = Image.fromarray((rng.random((64, 64, 3)) * 255).astype(np.uint8))
+        data = io.BytesIO()
+        image.save(data, "PNG")
+        data.seek(0)
+        slide.shapes.add_picture(data, Inches(1 + n % PICTURES_PER_SLIDE), Inches(1), Inches(1), Inches(1))
+    output = io.BytesIO()
+    prs.save(output)
+    output.seek(0)
+    return output
+
+
+def main():
+    pictures = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    library_path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_LIBRARY
+    with tempfile.TemporaryDirectory() as tmp:
+        library = shutil.copytree(library_path, os.path.join(tmp, "icons"))
+        start = time.perf_counter()
+        computed = build_feature_index(library)
+        print(f"feature index: {computed} icons in {time.perf_counter() - start:.2f}s")
+        start = time.perf_counter()
+        index = load_feature_index(library)
+        print(f"load (memory-mapped): {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        prs = Presentation(make_deck(library, pictures))
+        start = time.perf_counter()
+        findings, stats = check_pictures(prs, index)
+        print(f"{stats['pictures']} pictures ({stats['images']} distinct) checked in "
+              f"{time.perf_counter() - start:.2f}s: {stats['official']} official, "
+              f"{stats['wrong_color']} wrong colour, {stats['unknown']} unknown")
+
+
+if __name__ == "__main__":
+    main()
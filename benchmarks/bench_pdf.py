@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+PDF compliance check throughput on a synthetic document with the offline
+fake model: wall time, time to first result and peak memory for a few
+document lengths, so memory can be seen to stay flat as pages grow.
+
+Usage: python -m benchmarks.bench_pdf [pages ...] [--workers N] [--latency S]
+"""
+
+import argparse
+import os
+import resource
+import tempfile
+import time
+
+import pymupdf
+
+from fake_model import FakeGeminiModel
+from pdf_compliance import DEFAULT_WORKERS, pdf_compliance_check
+
+
+def make_pdf(path, pages):
+    """Pages with a title, body text, small italic print and a footer, some repeated across pages"""
+    doc = pymupdf.open()
+    for n in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Quarterly results for region {n % 7}", fontname="helv", fontsize=24)
+        page.insert_text((72, 140), "Revenue grew in every market this quarter.", fontname="helv", fontsize=12)
+        page.insert_text((72, 200), "Small print that is too small", fontname="tiit", fontsize=8,
+                         color=(0.8, 0.1, 0.1))
+        page.insert_text((72, 260), f"Customer story number {n}", fontname="cour", fontsize=14)
+        page.insert_text((72, 780), "© SAP SE or an SAP affiliate company. All rights reserved.",
+                         fontname="helv", fontsize=8)
+    doc.save(path)
+    doc.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("pages", type=int, nargs="*", default=[50, 500])
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            path = os.path.join(tmp, f"{pages}.pdf")
+            make_pdf(path, pages)
+            start = time.perf_counter()
+            issues, output, stats = pdf_compliance_check(
+                path, FakeGeminiModel(latency=args.latency), "", workers=args.workers,
+                verdict_cache_path=os.path.join(tmp, f"{pages}.sqlite3")
+            )
+            wall = time.perf_counter() - start
+            peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+            stages = ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in stats["stage_seconds"].items())
+            print(f"{pages} pages: {wall:.2f}s ({pages / wall:.0f} pages/s), first result "
+                  f"{stats['time_to_first_result']:.2f}s, {len(issues)} issues, peak RSS {peak_mb:.0f} MB")
+            print(f"  {stages}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Measure script start-up and rerun cost of loading the guideline assets,
+per rerun (the old module-level code) versus the shared resource layer.
+
+Usage: python -m benchmarks.bench_resources [reruns] [--with-model]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from docx import Document
+
+import resources
+
+
+BRAND_GUIDELINES_PATH = "Project Brandy - Brand Guidelines for PPTs.docx"
+
+
+def synthetic_guidelines(path):
+    # The real guidelines document is not checked in; build one of similar size.
+    with open("mydoc_chunks.json") as f:
+        chunks = json.load(f)
+    doc = Document()
+    for _ in range(20):
+        for chunk in chunks:
+            words = chunk.split()
+            for i in range(0, len(words), 40):
+                doc.add_paragraph(" ".join(words[i:i + 40]))
+    doc.save(path)
+    return path
+
+
+def rerun_old(guidelines_path, with_model):
+    doc = Document(guidelines_path)
+    "\n".join(para.text for para in doc.paragraphs)
+    np.load("mydoc_embeddings.npz")['embeddings']
+    with open("mydoc_chunks.json") as f:
+        json.load(f)
+    links = pd.read_csv("links.csv")
+    if with_model:
+        # Every new session loaded its own model and re-encoded the links.
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(resources.SENTENCE_MODEL_NAME)
+        model.encode(links['Name'].tolist())
+
+
+def rerun_shared(guidelines_path, with_model):
+    resources.get_guidelines_text(guidelines_path)
+    resources.get_embeddings_and_chunks("mydoc")
+    resources.get_links("links.csv")
+    if with_model:
+        model = resources.get_sentence_model()
+        resources.get_link_embeddings("links.csv", model)
+
+
+def measure(label, rerun, guidelines_path, reruns, with_model):
+    start = time.perf_counter()
+    rerun(guidelines_path, with_model)
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(reruns):
+        rerun(guidelines_path, with_model)
+    average = (time.perf_counter() - start) / reruns
+    print(f"{label}\t{first * 1000:.1f}\t{average * 1000:.2f}")
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    reruns = int(args[0]) if args else 20
+    with_model = "--with-model" in sys.argv
+    with tempfile.TemporaryDirectory() as tmp:
+        guidelines_path = BRAND_GUIDELINES_PATH
+        if not os.path.exists(guidelines_path):
+            guidelines_path = synthetic_guidelines(os.path.join(tmp, "guidelines.docx"))
+        print("loader\tstartup_ms\trerun_ms")
+        measure("per_rerun", rerun_old, guidelines_path, reruns, with_model)
+        measure("shared", rerun_shared, guidelines_path, reruns, with_model)
+
+
+if __name__ == "__main__":
+    main()
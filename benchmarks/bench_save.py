@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Compare the old save -> reload -> save output path with the single-pass writer.
+
+Each variant runs in its own process so peak RSS is measured independently.
+
+Usage: python -m benchmarks.bench_save [slides] [image_kb]
+"""
+
+import io
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from pptx import Presentation
+
+from benchmarks.synthetic_deck import make_deck
+from pptx_writer import save_presentation
+
+
+def annotate(prs):
+    # A small change to every slide, like the compliance notes.
+    for slide_idx, slide in enumerate(prs.slides, 1):
+        slide.notes_slide.notes_text_frame.text = f"Slide {slide_idx}: All elements compliant."
+
+
+def run_variant(variant, path):
+    start = time.perf_counter()
+    with open(path, "rb") as f:
+        source = io.BytesIO(f.read())
+    prs = Presentation(source)
+    annotate(prs)
+
+    if variant == "roundtrip":
+        temp_file = io.BytesIO()
+        prs.save(temp_file)
+        temp_file.seek(0)
+        prs = Presentation(temp_file)
+        output = io.BytesIO()
+        prs.save(output)
+    else:
+        output = io.BytesIO()
+        save_presentation(prs, output, source=source)
+
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in kilobytes on Linux.
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{variant}\t{elapsed:.2f}\t{peak_mb:.0f}\t{len(output.getvalue()) / 1e6:.1f}")
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == "--variant":
+        run_variant(sys.argv[2], sys.argv[3])
+        return
+
+    slides = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    image_kb = int(sys.argv[2]) if len(sys.argv) > 2 else 1200
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "large.pptx")
+        make_deck(path, slides=slides, image_kb=image_kb)
+        print(f"Deck: {slides} slides, {os.path.getsize(path) / 1e6:.1f} MB")
+        print("variant\twall_s\tpeak_rss_mb\toutput_mb")
+        for variant in ("roundtrip", "single_pass"):
+            subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_save", "--variant", variant, path],
+                check=True
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Recall and latency of the vector index backends on synthetic clustered embeddings.
+
+Usage: python -m benchmarks.bench_vector_index [sizes...]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from vector_index import ExactIndex, IVFIndex, normalize
+
+
+DIM = 384
+QUERIES = 200
+TOP_K = 10
+
+
+def clustered_embeddings(n, rng, clusters=200):
+    # Real chunk embeddings are clustered by topic, not uniform on the sphere.
+    centers = normalize(rng.standard_normal((clusters, DIM)))
+    labels = rng.integers(0, clusters, n)
+    return normalize(centers[labels] + 0.6 * rng.standard_normal((n, DIM)) / np.sqrt(DIM))
+
+
+def time_queries(search, queries):
+    start = time.perf_counter()
+    results = [search(q) for q in queries]
+    return results, (time.perf_counter() - start) / len(queries) * 1000
+
+
+def recall(results, truth):
+    hits = sum(len(set(r[0]) & set(t[0])) for r, t in zip(results, truth))
+    return hits / (len(truth) * TOP_K)
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [1000, 10000, 100000]
+    rng = np.random.default_rng(0)
+    print("n\tbackend\tbuild_s\tquery_ms\trecall@10")
+    for n in sizes:
+        embeddings = clustered_embeddings(n, rng)
+        queries = clustered_embeddings(QUERIES, rng)
+
+        def full_sort(q):
+            scores = embeddings @ q
+            order = scores.argsort()[::-1][:TOP_K]
+            return order, scores[order]
+
+        truth, ms = time_queries(full_sort, queries)
+        print(f"{n}\targsort\t0.00\t{ms:.3f}\t1.000")
+
+        backends = [
+            ("exact_f32", lambda: ExactIndex(embeddings)),
+            ("exact_f16", lambda: ExactIndex(embeddings, dtype=np.float16)),
+            ("ivf_probe4", lambda: IVFIndex(embeddings, n_probe=4)),
+            ("ivf_probe16", lambda: IVFIndex(embeddings, n_probe=16)),
+        ]
+        for name, build in backends:
+            start = time.perf_counter()
+            index = build()
+            build_s = time.perf_counter() - start
+            results, ms = time_queries(lambda q: index.search(q, TOP_K), queries)
+            print(f"{n}\t{name}\t{build_s:.2f}\t{ms:.3f}\t{recall(results, truth):.3f}")
+
+
+if __name__ == "__main__":
+    main()
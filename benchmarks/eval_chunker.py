@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Compare the fixed 500-word chunker with the structure-aware chunker.
+
+For each question the top 3 chunks are retrieved. It is a hit when they
+contain the sentence that answers it. Prompt tokens are the tokens of
+those 3 chunks. Without a guidelines .docx, a structured one is built
+from mydoc_chunks.json.
+
+Usage: python -m benchmarks.eval_chunker [guidelines.docx] [--hashing]
+
+--hashing swaps the sentence-transformer for a hashed bag-of-words
+embedding so the evaluation runs without downloading a model.
+"""
+
+import json
+import os
+import re
+import sys
+import tempfile
+import zlib
+
+import numpy as np
+from docx import Document
+
+import embed_docx
+from vector_index import ExactIndex
+
+
+TOP_K = 3
+
+# Section heading -> (question, sentence that answers it)
+QUESTIONS = {
+    "Background and Font Color for Text": (
+        "What should I keep in mind when picking text and background colors?",
+        "Always consider the color contrast between the background and text."),
+    "Emphasis": (
+        "Can I use italics to highlight words?",
+        "For highlighting, use bold or underlined – not italics."),
+    "Fonts": (
+        "Which font should presentations use?",
+        "SAP’s preferred font is 72 Brand."),
+    "Core 72 Brand Weight Range": (
+        "Which 72 Brand weight is meant for headlines?",
+        "72 Brand Medium - for larger text like headlines and subheads."),
+    "Style": (
+        "Should text be centered or left aligned?",
+        "Whenever possible, use left-aligned text."),
+    "Color Contrast": (
+        "What contrast ratio does small text need?",
+        "Smaller text below 24pt should have at least a 4.5:1 contrast ratio."),
+    "Hyperlinks": (
+        "How should I word hyperlinks?",
+        "use meaningful text for hyperlinks"),
+    "Anvils": (
+        "What can the anvil graphic be used for?",
+        "It can be used layered into photographs"),
+    "Boldface": (
+        "Can I make a whole paragraph bold?",
+        "Do not use boldface for entire sentences or paragraph"),
+}
+
+
+def structured_guidelines(path):
+    # Rebuild headings from the flat chunk text: each heading is followed by its section body.
+    with open("mydoc_chunks.json") as f:
+        text = " ".join(json.load(f))
+    pattern = "|".join(re.escape(h) for h in QUESTIONS)
+    doc = Document()
+    doc.add_heading("Brand Guidelines for PPTs", 0)
+    parts = re.split(f"({pattern})", text)
+    doc.add_paragraph(parts[0].strip())
+    for heading, body in zip(parts[1::2], parts[2::2]):
+        doc.add_heading(heading, 1)
+        for sentence in re.split(r"(?<=[.!?]) ", body.strip()):
+            doc.add_paragraph(sentence)
+    doc.save(path)
+    return path
+
+
+def hashing_embed(texts, dim=4096):
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for token in re.findall(r"\w+", text.lower()):
+            vectors[row, zlib.crc32(token.encode()) % dim] += 1.0
+    return vectors
+
+
+def normalize_space(text):
+    return " ".join(text.split())
+
+
+def evaluate(name, chunks, embed):
+    index = ExactIndex(embed(chunks))
+    hits = 0
+    prompt_tokens = 0
+    for question, answer in QUESTIONS.values():
+        indices, _ = index.search(embed([question])[0], top_k=TOP_K)
+        retrieved = [chunks[i] for i in indices]
+        hits += any(normalize_space(answer) in normalize_space(chunk) for chunk in retrieved)
+        prompt_tokens += sum(embed_docx.count_tokens(chunk) for chunk in retrieved)
+    print(f"{name}\t{len(chunks)}\t{hits / len(QUESTIONS):.2f}\t{prompt_tokens / len(QUESTIONS):.0f}")
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if "--hashing" in sys.argv:
+        embed = hashing_embed
+    else:
+        import resources
+        model = resources.get_sentence_model()
+        embed = model.encode
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args[0] if args else structured_guidelines(os.path.join(tmp, "guidelines.docx"))
+        print("chunker\tchunks\thit_rate\tavg_prompt_tokens")
+        evaluate("fixed_500_words", embed_docx.chunk_text(embed_docx.extract_docx_text(path)), embed)
+        evaluate("structured", [r["text"] for r in embed_docx.load_docx_chunks(path)], embed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite for the compliance pipeline, chat retrieval and icon search.
+
+Every scenario runs against synthetic inputs and the deterministic fake
+model, so results only move when the code does. Each scenario is timed
+--repeat times (median reported), then run once more under tracemalloc for
+peak Python memory. Results are written as JSON so two commits can be
+compared with --compare.
+
+Usage: python -m benchmarks.run_suite [--slides N] [--shapes N] [--runs N] [--image-kb N]
+                                      [--latency S] [--icons N] [--repeat N]
+                                      [--output results.json] [--compare baseline.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from pptx import Presentation
+
+from benchmarks.eval_chunker import hashing_embed
+from benchmarks.synthetic_deck import WORDS, make_deck
+from fake_model import FakeGeminiModel
+from pptx_compliance import pptx_compliance_check_with_rules
+from vector_index import ExactIndex
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "demo"))
+from icon_search import IconSearcher  # noqa: E402
+
+
+CHAT_QUESTIONS = [
+    "Which font should presentations use?",
+    "Can I use italics to highlight words?",
+    "What contrast ratio does small text need?",
+    "Should text be centered or left aligned?",
+    "How should I word hyperlinks?",
+]
+ICON_QUERIES = ["security", "cloud", "data", "netwrk", "customer value", "growth", "roadmap", "xyz"]
+COLORS = ["blue", "white"]
+# Slides edited in the revised deck for compliance_revision.
+REVISED_SLIDES = 3
+
+
+def check_deck(config, path, cache_path, manifest_path=None):
+    model = FakeGeminiModel(latency=config["latency"])
+    start = time.perf_counter()
+    issues, _, stats = pptx_compliance_check_with_rules(
+        path, "", True, "Internal",
+        gemini_model=model, guidelines_text=config["guidelines_text"],
+        verdict_cache_path=cache_path, manifest_path=manifest_path
+    )
+    wall = time.perf_counter() - start
+    return wall, model.calls, dict(stats["stage_seconds"], issues=len(issues),
+                                   carried_forward=stats["carried_forward"])
+
+
+def remove(*paths):
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def bench_compliance(config, tmp, warm=False):
+    """Full deck check; warm runs keep the verdict cache from the previous run"""
+    cache_path = os.path.join(tmp, "verdicts.sqlite3")
+    if not warm:
+        remove(cache_path)
+    return check_deck(config, config["deck_path"], cache_path)
+
+
+def bench_revision(config, tmp):
+    """Re-check of a revision with REVISED_SLIDES changed after checking the original (untimed).
+
+    The revision gets an empty verdict cache, so only the run manifest saves work.
+    """
+    manifest_path = os.path.join(tmp, "manifest.sqlite3")
+    original_cache, revision_cache = os.path.join(tmp, "original.sqlite3"), os.path.join(tmp, "revision.sqlite3")
+    remove(manifest_path, original_cache, revision_cache)
+    check_deck(config, config["deck_path"], original_cache, manifest_path)
+    return check_deck(config, config["revision_path"], revision_cache, manifest_path)
+
+
+def bench_chat(config, tmp):
+    """Embed each question, search the chunk index and ask the model, like the chat box"""
+    model = FakeGeminiModel(latency=config["latency"])
+    chunks = config["chunks"]
+    stages = {"embed": 0.0, "search": 0.0, "generate": 0.0}
+    start = time.perf_counter()
+    index = ExactIndex(hashing_embed(chunks))
+    stages["index"] = time.perf_counter() - start
+    for question in CHAT_QUESTIONS:
+        mark = time.perf_counter()
+        query = hashing_embed([question])[0]
+        stages["embed"] += time.perf_counter() - mark
+        mark = time.perf_counter()
+        indices, _ = index.search(query, top_k=3)
+        context = "\n\n".join(chunks[i] for i in indices)
+        stages["search"] += time.perf_counter() - mark
+        mark = time.perf_counter()
+        model.generate_content(f"Answer the question based on the following context:\n\n{context}\n\nQuestion: {question}")
+        stages["generate"] += time.perf_counter() - mark
+    return time.perf_counter() - start, model.calls, stages
+
+
+def bench_icons(config, tmp):
+    start = time.perf_counter()
+    searcher = IconSearcher(config["icon_dir"])
+    stages = {"load": time.perf_counter() - start}
+    mark = time.perf_counter()
+    searcher._build_index()
+    stages["index"] = time.perf_counter() - mark
+    mark = time.perf_counter()
+    for query in ICON_QUERIES:
+        searcher.search(query)
+    stages["search"] = time.perf_counter() - mark
+    return time.perf_counter() - start, 0, stages
+
+
+SCENARIOS = {
+    "compliance_cold": bench_compliance,
+    "compliance_warm": lambda config, tmp: bench_compliance(config, tmp, warm=True),
+    "compliance_revision": bench_revision,
+    "chat_retrieval": bench_chat,
+    "icon_search": bench_icons,
+}
+
+
+def make_revision(path, revision_path, slides=REVISED_SLIDES):
+    """Copy of a deck with the first text of `slides` evenly spread slides reworded"""
+    prs = Presentation(path)
+    step = max(1, len(prs.slides) // slides)
+    for slide in list(prs.slides)[step // 2::step][:slides]:
+        slide.shapes[0].text_frame.paragraphs[0].runs[0].text = "Revised wording for this slide"
+    prs.save(revision_path)
+    return revision_path
+
+
+def make_icon_library(path, count):
+    os.makedirs(path, exist_ok=True)
+    for n in range(count):
+        # IconSearcher only reads file names: ID_name_color.ext
+        name = "-".join([WORDS[n % len(WORDS)], WORDS[(n // len(WORDS)) % len(WORDS)], str(n)])
+        open(os.path.join(path, f"{100000 + n}_{name}_{COLORS[n % 2]}.png"), "w").close()
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_scenario(name, func, config, tmp, repeat):
+    walls, calls, stage_runs = [], 0, []
+    for _ in range(repeat):
+        wall, calls, stages = func(config, tmp)
+        walls.append(wall)
+        stage_runs.append(stages)
+    tracemalloc.start()
+    func(config, tmp)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "wall_seconds": statistics.median(walls),
+        "model_calls": calls,
+        "peak_python_mb": round(peak / 1e6, 2),
+        "stages": {k: statistics.median(run[k] for run in stage_runs) for k in stage_runs[0]},
+    }
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nvs {baseline_path} ({baseline.get('commit')})")
+    print("scenario\twall_ratio\tcalls_delta\tpeak_mb_ratio")
+    for name, result in results["results"].items():
+        old = baseline["results"].get(name)
+        if not old:
+            continue
+        wall_ratio = result["wall_seconds"] / old["wall_seconds"] if old["wall_seconds"] else float("nan")
+        peak_ratio = result["peak_python_mb"] / old["peak_python_mb"] if old["peak_python_mb"] else float("nan")
+        print(f"{name}\t{wall_ratio:.2f}x\t{result['model_calls'] - old['model_calls']:+d}\t{peak_ratio:.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite")
+    parser.add_argument("--slides", type=int, default=40)
+    parser.add_argument("--shapes", type=int, default=8, help="text shapes per slide")
+    parser.add_argument("--runs", type=int, default=3, help="runs per paragraph")
+    parser.add_argument("--image-kb", type=int, default=0, help="embedded image per slide")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake model latency in seconds")
+    parser.add_argument("--icons", type=int, default=2000, help="synthetic icon library size")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--compare", help="baseline results JSON to compare against")
+    args = parser.parse_args()
+
+    with open("mydoc_chunks.json") as f:
+        chunks = json.load(f)
+    with tempfile.TemporaryDirectory() as tmp:
+        config = {
+            "deck_path": make_deck(os.path.join(tmp, "deck.pptx"), args.slides, args.shapes,
+                                   args.image_kb, runs_per_paragraph=args.runs),
+            "guidelines_text": "\n".join(chunks),
+            "revision_path": os.path.join(tmp, "revision.pptx"),
+            "chunks": chunks,
+            "icon_dir": os.path.join(tmp, "icons"),
+            "latency": args.latency,
+        }
+        make_revision(config["deck_path"], config["revision_path"])
+        make_icon_library(config["icon_dir"], args.icons)
+        # Keep the suite's model-call metrics out of the app's metrics file.
+        os.environ.setdefault("BRANDY_METRICS_PATH", os.path.join(tmp, "metrics.jsonl"))
+
+        results = {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+            "results": {},
+        }
+        print("scenario\twall_s\tmodel_calls\tpeak_py_mb\tstages")
+        for name in args.scenarios.split(","):
+            result = run_scenario(name, SCENARIOS[name], config, tmp, args.repeat)
+            results["results"][name] = result
+            stages = " ".join(f"{k}={v:.3f}" for k, v in result["stages"].items()
+                              if k not in ("issues", "carried_forward"))
+            print(f"{name}\t{result['wall_seconds']:.3f}\t{result['model_calls']}\t"
+                  f"{result['peak_python_mb']:.1f}\t{stages}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=1)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
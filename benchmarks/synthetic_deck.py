@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Synthetic deck generator for benchmarks.
+
+Usage: python -m benchmarks.synthetic_deck <output.pptx> [slides] [shapes_per_slide] [image_kb] [runs_per_paragraph] [table_rows]
+"""
+
+import io
+import os
+import random
+import sys
+
+from PIL import Image
+from pptx import Presentation
+from pptx.util import Inches, Pt
+
+
+FONTS = ["72 Brand", "Arial", "Trebuchet MS", "Comic Sans MS", "Times New Roman"]
+WORDS = (
+    "brand strategy customer value cloud platform data security growth "
+    "innovation partner network roadmap quarter revenue experience"
+).split()
+
+
+def noise_png(size_kb, seed):
+    """Random RGB noise so the PNG is about size_kb and barely compressible"""
+    side = max(8, int((size_kb * 1024 / 3) ** 0.5))
+    rng = random.Random(seed)
+    image = Image.frombytes("RGB", (side, side), rng.randbytes(side * side * 3))
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG", compress_level=1)
+    buffer.seek(0)
+    return buffer
+
+
+def make_deck(path, slides=60, shapes_per_slide=8, image_kb=0, seed=0, runs_per_paragraph=1,
+              table_rows=0, table_cols=6):
+    rng = random.Random(seed)
+    prs = Presentation()
+    layout = prs.slide_layouts[6]
+    for slide_idx in range(slides):
+        slide = prs.slides.add_slide(layout)
+        for shape_idx in range(shapes_per_slide):
+            top = Inches(0.3 + 0.8 * (shape_idx % 8))
+            textbox = slide.shapes.add_textbox(Inches(0.5), top, Inches(6), Inches(0.6))
+            paragraph = textbox.text_frame.paragraphs[0]
+            for run_idx in range(runs_per_paragraph):
+                run = paragraph.add_run()
+                words = rng.sample(WORDS, rng.randint(2, 8))
+                text = " ".join(words)
+                run.text = text.capitalize() if run_idx == 0 else " " + text
+                run.font.name = rng.choice(FONTS)
+                run.font.size = Pt(rng.choice([8, 10, 11, 14, 18, 24]))
+        if table_rows:
+            table = slide.shapes.add_table(table_rows, table_cols, Inches(0.5), Inches(1),
+                                           Inches(9), Inches(0.3 * table_rows)).table
+            for cell in table.iter_cells():
+                run = cell.text_frame.paragraphs[0].add_run()
+                run.text = " ".join(rng.sample(WORDS, rng.randint(1, 3))).capitalize()
+                run.font.size = Pt(rng.choice([8, 10, 12]))
+        if image_kb:
+            slide.shapes.add_picture(noise_png(image_kb, seed * 100003 + slide_idx), Inches(7), Inches(1), Inches(2.5))
+    prs.save(path)
+    return path
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python -m benchmarks.synthetic_deck <output.pptx> [slides] [shapes_per_slide] [image_kb] [runs_per_paragraph] [table_rows]")
+        sys.exit(1)
+    args = [int(a) for a in sys.argv[2:]]
+    table_rows = args.pop(4) if len(args) > 4 else 0
+    runs = args.pop(3) if len(args) > 3 else 1
+    path = make_deck(sys.argv[1], *args, runs_per_paragraph=runs, table_rows=table_rows)
+    print(f"Wrote {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
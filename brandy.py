@@ -1,17 +1,12 @@
 import streamlit as st
-from pptx import Presentation
-from pptx.util import Pt, Inches
-from pptx.dml.color import RGBColor
-from docx import Document
-import io
 import os
-import google.generativeai as genai
-from sentence_transformers import SentenceTransformer
-import numpy as np
-import json
-import re
-import pandas as pd
-from sklearn.metrics.pairwise import cosine_similarity
+from guideline_retrieval import GuidelineRetriever
+from pptx_compliance import ICON_LIBRARY_PATH, iter_compliance_check
+from pdf_compliance import iter_pdf_compliance_check
+import time
+import metrics
+import resources
+import service_client
 
 st.set_page_config(page_title="Brandy", layout="wide", initial_sidebar_state="expanded")
 
@@ -23,10 +18,16 @@ with col2:
         st.session_state.chat_history = []
         st.rerun()
 
-FOOTER_FONT = "72 Brand"
-FOOTER_SIZE = 8
+GUIDELINE_TOP_K = 3
+GUIDELINE_TOKEN_BUDGET = 800
 
 BRAND_GUIDELINES_PATH = "Project Brandy - Brand Guidelines for PPTs.docx"
+ICON_SUGGESTIONS = 4
+# Chat suggestions need a closer match than an explicit icon search.
+CHAT_ICON_MIN_SCORE = 0.45
+
+# When set, checks run in brandy_service.py and this app only submits and watches them.
+SERVICE_URL = os.environ.get("BRANDY_SERVICE_URL")
 
 if "chat_history" not in st.session_state:
     st.session_state.chat_history = []
@@ -38,44 +39,49 @@ if "chunk_embeddings" not in st.session_state:
     st.session_state.chunk_embeddings = None
 if "pptx_issues" not in st.session_state:
     st.session_state.pptx_issues = None
+if "pptx_violations" not in st.session_state:
+    st.session_state.pptx_violations = None
+if "pptx_stats" not in st.session_state:
+    st.session_state.pptx_stats = None
 if "pptx_modified" not in st.session_state:
     st.session_state.pptx_modified = None
+if "pdf_violations" not in st.session_state:
+    st.session_state.pdf_violations = None
+if "pdf_modified" not in st.session_state:
+    st.session_state.pdf_modified = None
 if "sentence_model" not in st.session_state:
     st.session_state.sentence_model = None
 if "gemini_model" not in st.session_state:
     st.session_state.gemini_model = None
 if "links_df" not in st.session_state:
     st.session_state.links_df = None
-if "links_embeddings" not in st.session_state:
-    st.session_state.links_embeddings = None
+if "links_index" not in st.session_state:
+    st.session_state.links_index = None
+if "chunk_index" not in st.session_state:
+    st.session_state.chunk_index = None
+if "icon_search" not in st.session_state:
+    st.session_state.icon_search = None
 
 gemini_api_key = ""
 
-def load_embeddings_and_chunks(prefix):
-    data = np.load(f"{prefix}_embeddings.npz")
-    with open(f"{prefix}_chunks.json") as f:
-        chunks = json.load(f)
-    return data['embeddings'], chunks
-
 def find_relevant_links(answer_text, top_k=3):
     if (st.session_state.links_df is None or 
-        st.session_state.links_embeddings is None or 
+        st.session_state.links_index is None or 
         st.session_state.sentence_model is None):
         return []
     
-    answer_embedding = st.session_state.sentence_model.encode([answer_text])
-    
-    similarities = cosine_similarity(answer_embedding, st.session_state.links_embeddings)[0]
+    with metrics.tagged(source="links"):
+        answer_embedding = st.session_state.sentence_model.encode([answer_text])[0]
     
-    top_indices = similarities.argsort()[-top_k:][::-1]
+    top_indices, similarities = st.session_state.links_index.search(answer_embedding, top_k=top_k)
     
     relevant_links = []
-    for idx in top_indices:
-        if similarities[idx] > 0.3: 
+    for idx, similarity in zip(top_indices, similarities):
+        if similarity > 0.3: 
             relevant_links.append({
                 'name': st.session_state.links_df.iloc[idx]['Name'],
                 'link': st.session_state.links_df.iloc[idx]['Link'],
-                'similarity': similarities[idx]
+                'similarity': similarity
             })
     
     return relevant_links
@@ -110,31 +116,66 @@ def display_relevant_links(links):
                 </a>
             """, unsafe_allow_html=True)
 
+def find_relevant_icons(text, max_icons=ICON_SUGGESTIONS, min_score=None):
+    if st.session_state.icon_search is None or not text.strip():
+        return []
+    
+    with metrics.tagged(source="icons"):
+        if min_score is None:
+            results = st.session_state.icon_search.search(text, max_icons=max_icons)
+        else:
+            results = st.session_state.icon_search.search(text, max_icons=max_icons, min_score=min_score)
+    
+    # One entry per icon, shown with its blue PNG when there is one.
+    icons = {}
+    for score, icon in results:
+        preference = (icon['extension'] != 'png', icon['color'] != 'blue')
+        best = icons.get(icon['id'])
+        if best is None or preference < best['preference']:
+            icons[icon['id']] = {
+                'name': icon['name'].replace('-', ' ').replace('_', ' ').title(),
+                'path': icon['path'],
+                'filename': icon['filename'],
+                'score': score,
+                'preference': preference
+            }
+    return sorted(icons.values(), key=lambda i: -i['score'])
+
+def display_relevant_icons(icons):
+    if not icons:
+        return
+    
+    cols = st.columns(min(len(icons), ICON_SUGGESTIONS))
+    for i, icon in enumerate(icons):
+        with cols[i % len(cols)]:
+            if icon['path'].endswith('.png'):
+                st.image(icon['path'], width=48)
+            st.caption(f"{icon['name']}  \n`{icon['filename']}`")
+
 if os.path.exists(BRAND_GUIDELINES_PATH):
     try:
-        doc = Document(BRAND_GUIDELINES_PATH)
-        full_text = []
-        for para in doc.paragraphs:
-            full_text.append(para.text)
-        st.session_state.docx_text = "\n".join(full_text)
+        # Assets are loaded once per process and shared by every session.
+        st.session_state.docx_text = resources.get_guidelines_text(BRAND_GUIDELINES_PATH)
         
         prefix = "mydoc"
-        embeddings, chunks = load_embeddings_and_chunks(prefix)
+        embeddings, chunks = resources.get_embeddings_and_chunks(prefix)
         st.session_state.chunk_embeddings = embeddings
         st.session_state.doc_chunks = chunks
+        st.session_state.chunk_index = resources.get_chunk_index(prefix)
         
         if st.session_state.sentence_model is None:
             with st.spinner("Loading..."):
-                st.session_state.sentence_model = SentenceTransformer('all-MiniLM-L6-v2')
+                st.session_state.sentence_model = resources.get_sentence_model()
         
         if st.session_state.gemini_model is None:
-            genai.configure(api_key=gemini_api_key)
-            st.session_state.gemini_model = genai.GenerativeModel('gemini-1.5-flash-002')
+            st.session_state.gemini_model = resources.get_gemini_model(gemini_api_key)
+        
+        if os.path.exists("links.csv"):
+            st.session_state.links_df = resources.get_links("links.csv")
+            st.session_state.links_index = resources.get_link_index("links.csv", st.session_state.sentence_model)
         
-        if st.session_state.links_df is None and os.path.exists("links.csv"):
-            st.session_state.links_df = pd.read_csv("links.csv")
-            link_names = st.session_state.links_df['Name'].tolist()
-            st.session_state.links_embeddings = st.session_state.sentence_model.encode(link_names)
+        if os.path.isdir(ICON_LIBRARY_PATH):
+            st.session_state.icon_search = resources.get_icon_search(ICON_LIBRARY_PATH, st.session_state.sentence_model)
             
     except Exception as e:
         st.sidebar.error(f"Error loading brand guidelines or embeddings: {str(e)}")
@@ -144,226 +185,146 @@ else:
 st.sidebar.header("Upload Files")
 uploaded_file = st.sidebar.file_uploader("Upload file for compliance check", type=["pptx", "docx", "pdf"])
 
+def show_check_events(events, unit="slide", state_key="pptx_violations"):
+    """Render slide (or page) events as they arrive; returns the event that ended the stream"""
+    start = time.perf_counter()
+    st.subheader("Compliance check")
+    # Clicking any widget ends this script run; the abandoned check generator
+    # then drops its model calls that have not started yet.
+    st.button("⏹️ Stop check", help="Stop here and keep the results so far")
+    progress_bar = st.progress(0.0, text="Checking compliance...")
+    slides_metric, issues_metric, first_metric = st.columns(3)
+    slides_metric = slides_metric.empty()
+    issues_metric = issues_metric.empty()
+    first_metric = first_metric.empty()
+    table = st.empty()
+    violations = []
+    # Kept in session state while streaming so a stopped check still shows what it found.
+    st.session_state[state_key] = violations
+    first_result = None
+    for event in events:
+        if event["type"] != unit:
+            progress_bar.empty()
+            return event
+        if first_result is None:
+            first_result = time.perf_counter() - start
+            first_metric.metric("Time to first result", f"{first_result:.1f}s")
+        violations.extend(event["issues"])
+        done, total = event[f"{unit}s_done"], event[f"{unit}s_total"]
+        progress_bar.progress(done / total, text=f"Checked {done} of {total} {unit}s")
+        slides_metric.metric(f"{unit.capitalize()}s checked", f"{done}/{total}")
+        issues_metric.metric("Issues found", len(violations))
+        if violations:
+            table.dataframe(violations, use_container_width=True, hide_index=True)
+    progress_bar.empty()
+    return None
+
+def service_events(job_id):
+    for event, data in service_client.iter_events(SERVICE_URL, job_id):
+        if event == "slide":
+            yield data
+        elif event in ("done", "failed"):
+            yield dict(data, type=event)
+
+def run_service_check(job_id):
+    """Follow a service job to the end; returns (issues, pptx bytes, stats)"""
+    final = show_check_events(service_events(job_id))
+    if final is None or final["type"] == "failed":
+        raise RuntimeError(final["error"] if final else "event stream ended early")
+    job = service_client.get_job(SERVICE_URL, job_id)
+    return job["issues"], service_client.get_result(SERVICE_URL, job_id), job["stats"]
+
 def handle_pdf_compliance(file):
-    st.sidebar.info("PDF compliance check coming soon!")
-    return None, None
+    if st.sidebar.button("Run Compliance Check"):
+        st.session_state.pdf_modified = None
+        retriever = None
+        if (st.session_state.doc_chunks and
+            st.session_state.chunk_embeddings is not None and
+            st.session_state.sentence_model is not None):
+            retriever = GuidelineRetriever(
+                st.session_state.sentence_model,
+                st.session_state.doc_chunks,
+                st.session_state.chunk_embeddings,
+                top_k=GUIDELINE_TOP_K,
+                token_budget=GUIDELINE_TOKEN_BUDGET
+            )
+        result = show_check_events(iter_pdf_compliance_check(
+            file,
+            gemini_model=st.session_state.gemini_model,
+            guidelines_text=st.session_state.docx_text,
+            retriever=retriever
+        ), unit="page", state_key="pdf_violations")
+        if result is not None:
+            st.session_state.pdf_modified = result["output"]
+            check_stats = result["stats"]
+            st.sidebar.success("Compliance check complete! Download the annotated PDF below.")
+            st.sidebar.caption(
+                f"{check_stats['pages']} pages, {check_stats['elements']} text blocks. "
+                f"Verdicts: {check_stats['rule_verdicts']} from rules, "
+                f"{check_stats['model_checks']} from the model. "
+                f"Verdict cache: {check_stats['cache_hits']} hits, {check_stats['cache_misses']} misses."
+            )
+    elif st.session_state.pdf_violations:
+        st.subheader("Compliance check")
+        st.dataframe(st.session_state.pdf_violations, use_container_width=True, hide_index=True)
+
+    if st.session_state.pdf_modified:
+        st.sidebar.download_button(
+            label="Download Annotated PDF",
+            data=st.session_state.pdf_modified,
+            file_name="pdf_compliance_checked.pdf",
+            mime="application/pdf"
+        )
 
 def handle_docx_compliance(file):
     st.sidebar.info("DOCX compliance check coming soon!")
     return None, None
 
-def add_red_border(shape):
+def follow_service_job(job_id):
+    """Follow a service job and keep its result in session state, or forget the job if it failed"""
     try:
-        line = shape.line
-        line.color.rgb = RGBColor(255, 0, 0)
-        line.width = Pt(3)
-    except Exception:
-        pass
-
-def add_green_border(shape):
-    try:
-        line = shape.line
-        line.color.rgb = RGBColor(0, 255, 0) 
-        line.width = Pt(3)
-    except Exception:
-        pass
-
-def add_footer_to_slide(slide, text, font_color=None):
-    left = Inches(0.2) 
-    width = Inches(8)  
-    height = Inches(0.4)
-    slide_height = slide.part.slide_layout.slide_height if hasattr(slide.part.slide_layout, 'slide_height') else Inches(7.5)
-    top = Inches(7.0) 
-    textbox = slide.shapes.add_textbox(left, top, width, height)
-    text_frame = textbox.text_frame
-    p = text_frame.paragraphs[0]
-    run = p.add_run()
-    run.text = text
-    run.font.name = FOOTER_FONT
-    run.font.size = Pt(FOOTER_SIZE)
-    if font_color:
-        run.font.color.rgb = font_color
-
-def add_footer_with_hidden_copyright(slide, visible_text):
-    left = Inches(0.2) 
-    width = Inches(8)  
-    height = Inches(0.4)
-    top = Inches(7.0) 
-    textbox = slide.shapes.add_textbox(left, top, width, height)
-    text_frame = textbox.text_frame
-    p = text_frame.paragraphs[0]
-    
-    visible_run = p.add_run()
-    visible_run.text = visible_text
-    visible_run.font.name = FOOTER_FONT
-    visible_run.font.size = Pt(FOOTER_SIZE)
-    
-    hidden_run = p.add_run()
-    hidden_run.text = " ©"
-    hidden_run.font.name = FOOTER_FONT
-    hidden_run.font.size = Pt(FOOTER_SIZE)
-    hidden_run.font.color.rgb = RGBColor(255, 255, 255)
-
-def add_summary_slide(prs, issues):
-    title_slide_layout = prs.slide_layouts[0]
-    slide = prs.slides.add_slide(title_slide_layout)
-    slide.shapes.title.text = "PPTX Compliance Issues"
-    body = "\n".join(issues) if issues else "No issues found."
-    if len(slide.shapes) > 1:
-        slide.shapes[1].text = body
-    else:
-        left = Inches(1)
-        top = Inches(2)
-        width = Inches(8)
-        height = Inches(5)
-        textbox = slide.shapes.add_textbox(left, top, width, height)
-        textbox.text = body
-    xml_slides = prs.slides._sldIdLst
-    slides = list(xml_slides)
-    xml_slides.insert(0, slides[-1])
-    xml_slides.remove(slides[-1])
-
-def is_sentence_case(text):
-    if not text or not text.strip():
-        return False
-    stripped = text.lstrip()
-    match = re.search(r'[A-Za-z]', stripped)
-    if not match:
-        return False
-    first_alpha_idx = match.start()
-    if not stripped[first_alpha_idx].isupper():
-        return False
-    words = stripped.split()
-    if len(words) > 1:
-        for word in words[1:]:
-            if len(word) > 1 and word.isupper():
-                continue
-            if word and word[0].isupper():
-                return False
-    return True
-
-def check_element_compliance(element_info, gemini_model):
-    prompt = f"""
-    Given these brand guidelines for PowerPoint presentations:
-    {st.session_state.docx_text}
-    
-    Check if this element complies with the guidelines:
-    {element_info}
-    
-    Respond with either:
-    - "COMPLIANT" if the element follows all relevant guidelines
-    - "NON-COMPLIANT: [specific reason]" if it violates any guidelines
-    """
-    
-    response = gemini_model.generate_content(prompt)
-    answer = response.text.strip()
-    
-    is_compliant = answer.startswith("COMPLIANT")
-    return is_compliant, answer
+        issues, pptx_bytes, check_stats = run_service_check(job_id)
+        st.session_state.pptx_issues = issues
+        st.session_state.pptx_modified = pptx_bytes
+        st.session_state.pptx_stats = check_stats
+    except Exception as e:
+        st.sidebar.error(f"Compliance check failed: {str(e)}")
+        del st.query_params["job"]
 
-def pptx_compliance_check_with_rules(pptx_file, rules, add_copyright, copyright_type, implement_actions=False):
-    prs = Presentation(pptx_file)
-    issues = []
-    slide_comments = {}
-    
-    if add_copyright:
-        footer_text = "Internal Use Only." if copyright_type == "Internal" else "Public Use."
-        copyright_text = "© SAP SE or an SAP affiliate company. All rights reserved."
-        
-        total_slides = len(prs.slides)
-        for slide_idx, slide in enumerate(prs.slides):
-            if slide_idx == total_slides - 1:  
-                add_footer_to_slide(slide, copyright_text)
-            else: 
-                add_footer_with_hidden_copyright(slide, footer_text)
-    
-    for slide_idx, slide in enumerate(prs.slides, 1):
-        slide_issue_comments = []
-        for shape_idx, shape in enumerate(slide.shapes, 1):
-            if not shape.has_text_frame:
-                continue
-            
-            # Collect all element information
-            element_info = {
-                "slide_number": slide_idx,
-                "element_number": shape_idx,
-                "text": shape.text,
-                "text_case": {
-                    "is_uppercase": shape.text.isupper(),
-                    "is_lowercase": shape.text.islower(),
-                    "is_title_case": shape.text.istitle(),
-                    "is_sentence_case": is_sentence_case(shape.text)
-                },
-                "font_details": []
-            }
-            
-            for paragraph in shape.text_frame.paragraphs:
-                for run in paragraph.runs:
-                    if "©" in run.text:
-                        break
-                    
-                    current_size = None
-                    try:
-                        if run.font.size:
-                            current_size = run.font.size.pt
-                    except Exception:
-                        pass
-                    
-                    if implement_actions and "Internal Use Only." not in element_info["text"] and "Public Use." not in element_info["text"]:
-                        run.font.name = "72 Brand"
-                        
-                        if current_size is not None and current_size < 11:
-                            run.font.size = Pt(11)
-                            add_green_border(shape)
-                            slide_issue_comments.append(f"Element {shape_idx}: Font size increased to 11pt")
-                    
-                    font_info = {
-                        "font_name": run.font.name,
-                        "font_size": current_size,
-                        "text": run.text,
-                        "text_case": {
-                            "is_uppercase": run.text.isupper(),
-                            "is_lowercase": run.text.islower(),
-                            "is_title_case": run.text.istitle(),
-                            "is_sentence_case": is_sentence_case(run.text)
-                        }
-                    }
-                    element_info["font_details"].append(font_info)
-            
-            if("©" not in element_info["text"] and "Internal Use Only." not in element_info["text"] and "Public Use." not in element_info["text"]):
-                is_compliant, compliance_message = check_element_compliance(str(element_info), st.session_state.gemini_model)
-                
-                if not is_compliant:
-                    issues.append(f"Slide {slide_idx}, Element {shape_idx}: {compliance_message}")
-                    slide_issue_comments.append(f"Element {shape_idx}: {compliance_message}")
-                    add_red_border(shape)
-            else:
-                is_compliant = True
-                compliance_message = "Compliant"
-        
-        notes_slide = slide.notes_slide
-        notes_text_frame = notes_slide.notes_text_frame
-        if slide_issue_comments:
-            notes_text_frame.text = f"Slide {slide_idx} compliance issues:\n" + "\n".join(slide_issue_comments)
-        else:
-            notes_text_frame.text = f"Slide {slide_idx}: All elements compliant."
-    
-    add_summary_slide(prs, issues)
-    
-    temp_file = io.BytesIO()
-    prs.save(temp_file)
-    temp_file.seek(0)
-    
-    prs = Presentation(temp_file)
-    output = io.BytesIO()
-    prs.save(output)
-    output.seek(0)
-    
-    return issues, output
+def show_pptx_summary(check_stats):
+    st.sidebar.success("Compliance check complete! Download the modified PPTX below.")
+    st.sidebar.caption(
+        f"Verdicts: {check_stats['rule_verdicts']} from rules, "
+        f"{check_stats['model_checks']} from the model. "
+        f"Verdict cache: {check_stats['cache_hits']} hits, {check_stats['cache_misses']} misses. "
+        f"Prompt tokens: ~{check_stats['prompt_tokens_sent']} sent "
+        f"(~{check_stats['prompt_tokens_full']} with the full guidelines)"
+    )
+    match = check_stats.get("manifest_match")
+    if match:
+        st.sidebar.caption(
+            f"Revision of an earlier check ({match['similarity']:.0%} of slides shared): "
+            f"{match['slides_carried']} unchanged slides kept their verdicts "
+            f"({check_stats['carried_forward']} elements not re-checked)."
+        )
+    pictures = check_stats.get("pictures")
+    if pictures and pictures["pictures"]:
+        st.sidebar.caption(
+            f"Pictures: {pictures['pictures']} checked against the icon library, "
+            f"{pictures['official']} official icons, {pictures['wrong_color']} in the wrong colour, "
+            f"{pictures['unknown']} unknown icons."
+        )
+    usage = check_stats.get("model_usage")
+    if usage and usage["calls"]:
+        st.sidebar.caption(
+            f"Model: {usage['calls']} calls ({check_stats['retries']} retries, {usage['errors']} errors), "
+            f"{usage['total_seconds']:.1f}s total, p50 {usage['p50_seconds']:.2f}s, "
+            f"p95 {usage['p95_seconds']:.2f}s, ~${usage['estimated_cost_usd']:.4f}"
+        )
 
+run_clicked = False
+file_type = uploaded_file.name.split('.')[-1].lower() if uploaded_file else None
 if uploaded_file:
-    file_type = uploaded_file.name.split('.')[-1].lower()
-    
     if file_type == 'pptx':
         st.sidebar.subheader("PPTX Options")
         add_copyright = st.sidebar.checkbox("Add Copyright Footer", value=True)
@@ -380,29 +341,45 @@ if uploaded_file:
             help="Automatically fix font and size issues (SAP 72 Brand font and minimum 11pt size)"
         )
         
-        if st.sidebar.button("Run Compliance Check"):
-            with st.spinner("Checking PPTX compliance..."):
-                issues, pptx_bytes = pptx_compliance_check_with_rules(
-                    uploaded_file, 
-                    "",  
-                    add_copyright,
-                    copyright_type if add_copyright else None,
-                    implement_actions
-                )
-                st.session_state.pptx_issues = issues
-                st.session_state.pptx_modified = pptx_bytes
-            st.sidebar.success("Compliance check complete! Download the modified PPTX below.")
-            
-            if st.session_state.pptx_modified:
-                st.sidebar.download_button(
-                    label="Download Modified PPTX",
-                    data=st.session_state.pptx_modified,
-                    file_name="pptx_compliance_checked.pptx",
-                    mime="application/vnd.openxmlformats-officedocument.presentationml.presentation"
+        run_clicked = st.sidebar.button("Run Compliance Check")
+        if run_clicked:
+            st.session_state.pptx_modified = None
+            st.session_state.pptx_violations = None
+        if SERVICE_URL and run_clicked:
+            job = service_client.submit_job(
+                SERVICE_URL,
+                uploaded_file.getvalue(),
+                uploaded_file.name,
+                copyright_type if add_copyright else None,
+                implement_actions
+            )
+            st.query_params["job"] = job["id"]
+            follow_service_job(job["id"])
+        elif run_clicked:
+            retriever = None
+            if (st.session_state.doc_chunks and 
+                st.session_state.chunk_embeddings is not None and 
+                st.session_state.sentence_model is not None):
+                retriever = GuidelineRetriever(
+                    st.session_state.sentence_model,
+                    st.session_state.doc_chunks,
+                    st.session_state.chunk_embeddings,
+                    top_k=GUIDELINE_TOP_K,
+                    token_budget=GUIDELINE_TOKEN_BUDGET
                 )
-                # it doesn't look good
-                # if st.session_state.pptx_issues:
-                #     st.sidebar.info("\n".join(st.session_state.pptx_issues[:10]) + ("\n..." if len(st.session_state.pptx_issues) > 10 else ""))
+            result = show_check_events(iter_compliance_check(
+                uploaded_file, 
+                "",  
+                add_copyright,
+                copyright_type if add_copyright else None,
+                implement_actions,
+                gemini_model=st.session_state.gemini_model,
+                guidelines_text=st.session_state.docx_text,
+                retriever=retriever
+            ))
+            st.session_state.pptx_issues = result["issues"]
+            st.session_state.pptx_modified = result["output"]
+            st.session_state.pptx_stats = result["stats"]
     
     elif file_type == 'pdf':
         handle_pdf_compliance(uploaded_file)
@@ -410,37 +387,95 @@ if uploaded_file:
     elif file_type == 'docx':
         handle_docx_compliance(uploaded_file)
 
+# The job id lives in the URL, so a reopened tab picks the service job up
+# again, whether or not the deck is still uploaded.
+resume_job = (SERVICE_URL and not run_clicked and st.query_params.get("job")
+              and st.session_state.pptx_modified is None)
+if resume_job:
+    follow_service_job(st.query_params["job"])
+if file_type == 'pptx' or (file_type is None and st.query_params.get("job")):
+    if (run_clicked or resume_job) and st.session_state.pptx_modified:
+        show_pptx_summary(st.session_state.pptx_stats)
+    elif st.session_state.pptx_violations:
+        # Keep the last results on screen across reruns (e.g. after downloading).
+        st.subheader("Compliance check")
+        st.dataframe(st.session_state.pptx_violations, use_container_width=True, hide_index=True)
+
+    if st.session_state.pptx_modified:
+        st.sidebar.download_button(
+            label="Download Modified PPTX",
+            data=st.session_state.pptx_modified,
+            file_name="pptx_compliance_checked.pptx",
+            mime="application/vnd.openxmlformats-officedocument.presentationml.presentation"
+        )
+
+if st.session_state.icon_search is not None:
+    with st.sidebar.expander("Icon suggestions"):
+        slide_text = st.text_area("Slide text or topic", key="icon_query",
+                                  help="Suggests on-brand icons from the icon library")
+        if slide_text:
+            icons = find_relevant_icons(slide_text, max_icons=ICON_SUGGESTIONS * 2)
+            if icons:
+                display_relevant_icons(icons)
+            else:
+                st.caption("No matching icons in the library.")
+
+with st.sidebar.expander("Model usage (this server)"):
+    for label, kind in (("Model calls", "model_call"), ("Embedding calls", "embedding_call")):
+        usage = metrics.default_recorder().summary(kind)
+        if usage["calls"]:
+            st.caption(
+                f"{label}: {usage['calls']} ({usage['errors']} errors), {usage['total_seconds']:.1f}s total, "
+                f"p50 {usage['p50_seconds']:.2f}s, p95 {usage['p95_seconds']:.2f}s, "
+                f"~{usage['prompt_tokens']} prompt tokens"
+                + (f", ~${usage['estimated_cost_usd']:.4f}" if kind == "model_call" else "")
+            )
+        else:
+            st.caption(f"{label}: none yet")
+
 if user_input := st.chat_input("Ask a question about brand guidelines..."):
     st.session_state.chat_history.append({"role": "user", "content": user_input})
     
     if (st.session_state.doc_chunks and 
-        st.session_state.chunk_embeddings is not None and 
+        st.session_state.chunk_index is not None and 
         st.session_state.sentence_model is not None and
         st.session_state.gemini_model is not None):
         
         relevant_chunks = []
-        q_emb = st.session_state.sentence_model.encode([user_input])[0]
-        similarities = np.dot(st.session_state.chunk_embeddings, q_emb)
-        top_indices = similarities.argsort()[-3:][::-1]
+        with metrics.tagged(source="chat"):
+            q_emb = st.session_state.sentence_model.encode([user_input])[0]
+        top_indices, _ = st.session_state.chunk_index.search(q_emb, top_k=3)
         for i in top_indices:
             relevant_chunks.append(st.session_state.doc_chunks[i])
         
         context = "\n\n".join(relevant_chunks)
         prompt = f"Answer the question based on the following context from SAP brand guidelines:\n\n{context}\n\nQuestion: {user_input}"
-        response = st.session_state.gemini_model.generate_content(prompt)
+        with metrics.tagged(source="chat"):
+            response = st.session_state.gemini_model.generate_content(prompt)
         answer = response.text.strip()
         
-        st.session_state.chat_history.append({"role": "assistant", "content": answer})
+        # Links are looked up once here and kept with the message, so
+        # re-rendering the history never re-encodes old answers.
+        st.session_state.chat_history.append({
+            "role": "assistant",
+            "content": answer,
+            "links": find_relevant_links(answer),
+            "icons": find_relevant_icons(user_input, min_score=CHAT_ICON_MIN_SCORE)
+        })
         
     else:
         error_msg = "Please ensure brand guidelines and AI model are loaded to enable Q&A functionality."
-        st.session_state.chat_history.append({"role": "assistant", "content": error_msg})
+        st.session_state.chat_history.append({"role": "assistant", "content": error_msg, "links": []})
 
 for i, msg in enumerate(st.session_state.chat_history):
     with st.chat_message(msg["role"]):
         st.write(msg["content"])
         
         if msg["role"] == "assistant":
-            relevant_links = find_relevant_links(msg["content"])
-            if relevant_links:
-                display_relevant_links(relevant_links) 
\ No newline at end of file
+            if "links" not in msg:
+                msg["links"] = find_relevant_links(msg["content"])
+            if msg["links"]:
+                display_relevant_links(msg["links"]) 
+            if msg.get("icons"):
+                st.caption("Suggested icons:")
+                display_relevant_icons(msg["icons"])
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Headless batch compliance check for directories of decks.
+
+Walks the given files and directories for .pptx decks and .pdf exports,
+checks them in a process pool, writes annotated decks under the output directory and
+appends one JSON line per deck to the report as soon as it finishes.
+Re-running with the same report skips decks already checked (unless they
+or the guidelines, rules, model or options changed), so an interrupted run
+resumes where it stopped.
+
+Usage: python brandy_check.py <deck-or-dir> [...] [--output-dir DIR] [--workers N]
+                              [--report report.jsonl] [--csv report.csv]
+                              [--copyright none|internal|public] [--implement-actions]
+                              [--fake-model LATENCY]
+
+The Gemini API key is read from GEMINI_API_KEY unless --fake-model is given.
+"""
+
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from pptx_compliance import (ICON_LIBRARY_PATH, RUN_MANIFEST_PATH, VERDICT_CACHE_PATH,
+                             pptx_compliance_check_with_rules)
+from resources import GEMINI_MODEL_NAME
+from rule_engine import RULES
+from run_manifest import run_context
+
+
+DEFAULT_GUIDELINES_PATH = "Project Brandy - Brand Guidelines for PPTs.docx"
+DEFAULT_OUTPUT_DIR = "brandy_checked"
+OUTPUT_SUFFIX = "_checked"
+
+# Per-process state set up once by init_worker.
+_worker = {}
+
+
+def init_worker(config):
+    import resources
+    if config["fake_latency"] is not None:
+        from fake_model import FakeGeminiModel
+        model = FakeGeminiModel(latency=config["fake_latency"])
+    else:
+        model = resources.get_gemini_model(config["api_key"])
+    guidelines_text = ""
+    if os.path.exists(config["guidelines"]):
+        guidelines_text = resources.get_guidelines_text(config["guidelines"])
+    _worker.update(config=config, model=model, guidelines_text=guidelines_text)
+
+
+def deck_signature(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def config_fingerprint(config):
+    """Identifies what a deck's verdicts depend on besides the deck: guidelines, rules, model and options"""
+    guidelines = ""
+    if os.path.exists(config["guidelines"]):
+        with open(config["guidelines"], "rb") as f:
+            guidelines = hashlib.sha256(f.read()).hexdigest()
+    if config["fake_latency"] is not None:
+        from fake_model import FakeGeminiModel
+        model_name = FakeGeminiModel(latency=config["fake_latency"]).model_name
+    else:
+        model_name = GEMINI_MODEL_NAME
+    return run_context(guidelines, model_name, rules=RULES, copyright=config["copyright"],
+                       implement_actions=config["implement_actions"], icon_library=config["icon_library"])
+
+
+def check_deck(path, output_path):
+    config = _worker["config"]
+    start = time.perf_counter()
+    row = {"deck": path, "signature": deck_signature(path), "config": config["fingerprint"], "output": output_path}
+    try:
+        if path.lower().endswith(".pdf"):
+            from pdf_compliance import pdf_compliance_check
+            # PDFs are read page by page from the file. Decks are already spread
+            # over worker processes, so pages are not split further.
+            issues, output, stats = pdf_compliance_check(
+                path,
+                gemini_model=_worker["model"],
+                guidelines_text=_worker["guidelines_text"],
+                verdict_cache_path=config["cache_path"],
+                deck_name=path,
+                workers=1
+            )
+        else:
+            with open(path, "rb") as f:
+                source = io.BytesIO(f.read())
+            copyright_type = config["copyright"].capitalize() if config["copyright"] != "none" else None
+            issues, output, stats = pptx_compliance_check_with_rules(
+                source,
+                "",
+                copyright_type is not None,
+                copyright_type,
+                config["implement_actions"],
+                gemini_model=_worker["model"],
+                guidelines_text=_worker["guidelines_text"],
+                verdict_cache_path=config["cache_path"],
+                deck_name=path,
+                manifest_path=config["manifest_path"],
+                icon_library=config["icon_library"]
+            )
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        with open(output_path, "wb") as f:
+            f.write(output.getvalue())
+        stats.pop("verdict_sources", None)
+        row.update(status="ok", issue_count=len(issues), issues=issues, stats=stats)
+    except Exception as e:
+        row.update(status="error", error=f"{type(e).__name__}: {e}")
+    row["seconds"] = round(time.perf_counter() - start, 3)
+    return row
+
+
+def find_decks(inputs, output_dir):
+    """Yield (deck path, output path) for every deck under the inputs"""
+    output_dir = os.path.abspath(output_dir)
+    for item in inputs:
+        item = os.path.abspath(item)
+        if os.path.isfile(item):
+            candidates = [(item, os.path.basename(item))]
+        else:
+            candidates = []
+            for root, dirs, files in os.walk(item):
+                dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != output_dir)
+                for name in sorted(files):
+                    path = os.path.join(root, name)
+                    candidates.append((path, os.path.relpath(path, item)))
+        for path, relative in candidates:
+            name = os.path.basename(path)
+            if not name.lower().endswith((".pptx", ".pdf")) or name.startswith("~$"):
+                continue
+            stem, ext = os.path.splitext(relative)
+            yield path, os.path.join(output_dir, stem + OUTPUT_SUFFIX + ext)
+
+
+def load_report(report_path):
+    """Latest report row per deck"""
+    rows = {}
+    if os.path.exists(report_path):
+        with open(report_path) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash can leave a truncated last line.
+                    continue
+                rows[row["deck"]] = row
+    return rows
+
+
+def write_csv(csv_path, rows):
+    fields = ["deck", "status", "issue_count", "seconds", "output", "error"]
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        for row in rows.values():
+            writer.writerow(row)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch brand compliance check for PPTX and PDF decks")
+    parser.add_argument("inputs", nargs="+", help="decks or directories to walk")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--report", help="JSONL report (default <output-dir>/report.jsonl)")
+    parser.add_argument("--csv", help="also write a CSV summary here")
+    parser.add_argument("--copyright", choices=["none", "internal", "public"], default="none")
+    parser.add_argument("--implement-actions", action="store_true")
+    parser.add_argument("--guidelines", default=DEFAULT_GUIDELINES_PATH)
+    parser.add_argument("--cache", default=VERDICT_CACHE_PATH, help="verdict cache file")
+    parser.add_argument("--manifest", default=RUN_MANIFEST_PATH,
+                        help="run manifest used to re-check only changed slides of revised decks")
+    parser.add_argument("--icon-library", default=ICON_LIBRARY_PATH,
+                        help="icon library to match pictures against (skipped if missing)")
+    parser.add_argument("--fake-model", type=float, metavar="LATENCY",
+                        help="use the offline fake model with this latency in seconds")
+    args = parser.parse_args(argv)
+
+    api_key = os.environ.get("GEMINI_API_KEY", "")
+    if args.fake_model is None and not api_key:
+        parser.error("set GEMINI_API_KEY or pass --fake-model")
+
+    report_path = args.report or os.path.join(args.output_dir, "report.jsonl")
+    os.makedirs(os.path.dirname(report_path) or ".", exist_ok=True)
+    rows = load_report(report_path)
+
+    config = {
+        "fake_latency": args.fake_model,
+        "api_key": api_key,
+        "guidelines": args.guidelines,
+        "copyright": args.copyright,
+        "implement_actions": args.implement_actions,
+        "cache_path": args.cache,
+        "manifest_path": args.manifest,
+        "icon_library": args.icon_library,
+    }
+    config["fingerprint"] = config_fingerprint(config)
+
+    decks = []
+    skipped = 0
+    for path, output_path in find_decks(args.inputs, args.output_dir):
+        previous = rows.get(path)
+        if (previous and previous["status"] == "ok" and previous["signature"] == deck_signature(path)
+                and previous.get("config") == config["fingerprint"]):
+            skipped += 1
+            continue
+        decks.append((path, output_path))
+    print(f"{len(decks)} decks to check ({skipped} already in {report_path})")
+    start = time.perf_counter()
+    failed = 0
+    if decks:
+        with open(report_path, "a") as report, \
+                ProcessPoolExecutor(max_workers=max(1, args.workers), initializer=init_worker,
+                                    initargs=(config,)) as executor:
+            futures = [executor.submit(check_deck, path, output_path) for path, output_path in decks]
+            for done, future in enumerate(as_completed(futures), 1):
+                row = future.result()
+                report.write(json.dumps(row) + "\n")
+                report.flush()
+                rows[row["deck"]] = row
+                failed += row["status"] != "ok"
+                detail = f"{row['issue_count']} issues" if row["status"] == "ok" else row["error"]
+                print(f"[{done}/{len(decks)}] {row['deck']}: {detail} ({row['seconds']:.1f}s)")
+
+    elapsed = time.perf_counter() - start
+    if args.csv:
+        write_csv(args.csv, rows)
+    rate = len(decks) / elapsed * 60 if elapsed > 0 else 0.0
+    print(f"Checked {len(decks)} decks ({failed} failed) in {elapsed:.1f}s: {rate:.1f} decks/minute")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+Local compliance-check service.
+
+Decks are submitted over HTTP and put on a SQLite job queue. A bounded pool
+of worker threads runs the compliance pipeline on them. Jobs, progress
+events and result files survive a restart, and jobs that were running when
+the service stopped are queued again.
+
+  POST /jobs?filename=deck.pptx&copyright=Internal&implement_actions=1
+       body: the .pptx bytes                      -> 202 {"id": ..., "status": "queued"}
+  GET  /jobs/<id>                                 -> job status, issues and stats
+  GET  /jobs/<id>/events                          -> Server-Sent Events, one per slide
+  GET  /jobs/<id>/result                          -> annotated .pptx once done
+
+Usage: python brandy_service.py [--port 8765] [--workers 2] [--data-dir DIR]
+                                [--fake-model LATENCY] [--chunks PREFIX]
+
+The Gemini API key is read from GEMINI_API_KEY unless --fake-model is given.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from pptx_compliance import (ICON_LIBRARY_PATH, RUN_MANIFEST_PATH, VERDICT_CACHE_PATH,
+                             pptx_compliance_check_with_rules)
+
+
+DEFAULT_PORT = 8765
+DEFAULT_WORKERS = 2
+DEFAULT_DATA_DIR = "brandy_service_data"
+DEFAULT_GUIDELINES_PATH = "Project Brandy - Brand Guidelines for PPTs.docx"
+MAX_UPLOAD_BYTES = 200 * 1024 * 1024
+EVENT_POLL_INTERVAL = 0.2
+KEEPALIVE_INTERVAL = 15
+FINISHED_STATUSES = ("done", "failed")
+PPTX_MIME = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+
+
+class JobQueue:
+    """SQLite-backed job queue with an append-only event log per job"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT, filename TEXT, options TEXT, "
+            "created REAL, started REAL, finished REAL, slides_done INTEGER, slides_total INTEGER, "
+            "issues TEXT, stats TEXT, error TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, created)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS events ("
+            "job_id TEXT, seq INTEGER, event TEXT, data TEXT, PRIMARY KEY (job_id, seq))"
+        )
+        self._conn.commit()
+
+    def submit(self, filename, options, job_id=None):
+        job_id = job_id or uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, filename, options, created, slides_done) "
+                "VALUES (?, 'queued', ?, ?, ?, 0)",
+                (job_id, filename, json.dumps(options), time.time())
+            )
+            self._add_event(job_id, "queued", {"status": "queued"})
+            self._conn.commit()
+        return job_id
+
+    def claim(self):
+        """Mark the oldest queued job as running and return it, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE jobs SET status = 'running', started = ? WHERE id = ?", (time.time(), row["id"])
+            )
+            self._add_event(row["id"], "started", {"status": "running"})
+            self._conn.commit()
+            return self._job_dict(row, status="running")
+
+    def requeue_running(self):
+        """Put jobs interrupted by a restart back on the queue.
+
+        Their progress events are replaced by a single "requeued" event, so
+        clients following them don't replay the interrupted run. Its seq
+        continues the old numbering for clients resuming with Last-Event-ID.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, (SELECT COALESCE(MAX(seq), 0) FROM events WHERE job_id = id) AS last_seq "
+                "FROM jobs WHERE status = 'running'"
+            ).fetchall()
+            for row in rows:
+                self._conn.execute("DELETE FROM events WHERE job_id = ?", (row["id"],))
+                self._conn.execute(
+                    "INSERT INTO events (job_id, seq, event, data) VALUES (?, ?, 'requeued', ?)",
+                    (row["id"], row["last_seq"] + 1, json.dumps({"status": "queued"}))
+                )
+            self._conn.execute("UPDATE jobs SET status = 'queued', slides_done = 0 WHERE status = 'running'")
+            self._conn.commit()
+        return len(rows)
+
+    def progress(self, job_id, event):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET slides_done = ?, slides_total = ? WHERE id = ?",
+                (event["slides_done"], event["slides_total"], job_id)
+            )
+            self._add_event(job_id, "slide", event)
+            self._conn.commit()
+
+    def finish(self, job_id, issues, stats):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'done', finished = ?, issues = ?, stats = ? WHERE id = ?",
+                (time.time(), json.dumps(issues), json.dumps(stats), job_id)
+            )
+            self._add_event(job_id, "done", {"status": "done", "issue_count": len(issues)})
+            self._conn.commit()
+
+    def fail(self, job_id, error):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'failed', finished = ?, error = ? WHERE id = ?",
+                (time.time(), error, job_id)
+            )
+            self._add_event(job_id, "failed", {"status": "failed", "error": error})
+            self._conn.commit()
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job_dict(row) if row is not None else None
+
+    def events_since(self, job_id, seq):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, event, data FROM events WHERE job_id = ? AND seq > ? ORDER BY seq",
+                (job_id, seq)
+            ).fetchall()
+        return [(row["seq"], row["event"], row["data"]) for row in rows]
+
+    def _add_event(self, job_id, event, data):
+        self._conn.execute(
+            "INSERT INTO events (job_id, seq, event, data) VALUES "
+            "(?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM events WHERE job_id = ?), ?, ?)",
+            (job_id, job_id, event, json.dumps(data))
+        )
+
+    @staticmethod
+    def _job_dict(row, **overrides):
+        job = dict(row)
+        job["options"] = json.loads(job["options"] or "{}")
+        job["issues"] = json.loads(job["issues"]) if job["issues"] else None
+        job["stats"] = json.loads(job["stats"]) if job["stats"] else None
+        job.update(overrides)
+        return job
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ComplianceService:
+    """Runs queued jobs on a fixed number of worker threads"""
+
+    def __init__(self, data_dir, gemini_model, guidelines_text, retriever=None,
+                 workers=DEFAULT_WORKERS, verdict_cache_path=VERDICT_CACHE_PATH, manifest_path=RUN_MANIFEST_PATH,
+                 icon_library=ICON_LIBRARY_PATH):
+        self.data_dir = data_dir
+        os.makedirs(data_dir, exist_ok=True)
+        self.queue = JobQueue(os.path.join(data_dir, "jobs.sqlite3"))
+        self.gemini_model = gemini_model
+        self.guidelines_text = guidelines_text
+        self.retriever = retriever
+        self.workers = workers
+        self.verdict_cache_path = verdict_cache_path
+        self.manifest_path = manifest_path
+        self.icon_library = icon_library
+        self._wakeup = threading.Condition()
+        self._stopping = False
+        self._threads = []
+
+    def job_dir(self, job_id):
+        return os.path.join(self.data_dir, job_id)
+
+    def input_path(self, job_id):
+        return os.path.join(self.job_dir(job_id), "input.pptx")
+
+    def result_path(self, job_id):
+        return os.path.join(self.job_dir(job_id), "result.pptx")
+
+    def start(self):
+        requeued = self.queue.requeue_running()
+        if requeued:
+            print(f"Re-queued {requeued} interrupted jobs")
+        for n in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"brandy-worker-{n}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self.queue.close()
+
+    def submit(self, data, filename, options):
+        # The upload is written before the job is queued so a worker never sees a job without input.
+        job_id = uuid.uuid4().hex
+        os.makedirs(self.job_dir(job_id), exist_ok=True)
+        with open(self.input_path(job_id), "wb") as f:
+            f.write(data)
+        self.queue.submit(filename, options, job_id)
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def _work(self):
+        while True:
+            with self._wakeup:
+                if self._stopping:
+                    return
+            job = self.queue.claim()
+            if job is None:
+                with self._wakeup:
+                    if not self._stopping:
+                        self._wakeup.wait(timeout=1)
+                continue
+            self._run(job)
+
+    def _run(self, job):
+        job_id = job["id"]
+        options = job["options"]
+        copyright_type = options.get("copyright")
+        try:
+            with open(self.input_path(job_id), "rb") as f:
+                issues, output, stats = pptx_compliance_check_with_rules(
+                    f,
+                    "",
+                    copyright_type is not None,
+                    copyright_type,
+                    options.get("implement_actions", False),
+                    gemini_model=self.gemini_model,
+                    guidelines_text=self.guidelines_text,
+                    retriever=self.retriever,
+                    verdict_cache_path=self.verdict_cache_path,
+                    progress=lambda event: self.queue.progress(job_id, event),
+                    deck_name=job["filename"],
+                    manifest_path=self.manifest_path,
+                    icon_library=self.icon_library
+                )
+            with open(self.result_path(job_id), "wb") as f:
+                f.write(output.getvalue())
+            stats.pop("verdict_sources", None)
+            self.queue.finish(job_id, issues, stats)
+        except Exception as e:
+            self.queue.fail(job_id, f"{type(e).__name__}: {e}")
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def route(self):
+        parts = [p for p in urlparse(self.path).path.split("/") if p]
+        if not parts or parts[0] != "jobs" or len(parts) > 3:
+            return None, None
+        job_id = parts[1] if len(parts) > 1 else None
+        action = parts[2] if len(parts) > 2 else None
+        return job_id, action
+
+    def do_POST(self):
+        job_id, action = self.route()
+        if job_id is not None or urlparse(self.path).path.rstrip("/") != "/jobs":
+            return self.send_json(404, {"error": "not found"})
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0:
+            return self.send_json(400, {"error": "empty upload"})
+        if length > MAX_UPLOAD_BYTES:
+            return self.send_json(413, {"error": "upload too large"})
+        data = self.rfile.read(length)
+        query = parse_qs(urlparse(self.path).query)
+        copyright_type = query.get("copyright", [None])[0]
+        if copyright_type not in (None, "Internal", "Public"):
+            return self.send_json(400, {"error": "copyright must be Internal or Public"})
+        options = {
+            "copyright": copyright_type,
+            "implement_actions": query.get("implement_actions", ["0"])[0] in ("1", "true"),
+        }
+        filename = query.get("filename", ["deck.pptx"])[0]
+        job_id = self.service.submit(data, filename, options)
+        self.send_json(202, {"id": job_id, "status": "queued"})
+
+    def do_GET(self):
+        job_id, action = self.route()
+        job = self.service.queue.get(job_id) if job_id else None
+        if job is None:
+            return self.send_json(404, {"error": "unknown job"})
+        if action is None:
+            return self.send_json(200, job)
+        if action == "events":
+            return self.stream_events(job_id)
+        if action == "result":
+            if job["status"] != "done":
+                return self.send_json(409, {"error": f"job is {job['status']}"})
+            with open(self.service.result_path(job_id), "rb") as f:
+                body = f.read()
+            self.send_response(200)
+            self.send_header("Content-Type", PPTX_MIME)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        self.send_json(404, {"error": "not found"})
+
+    def stream_events(self, job_id):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        # Reconnecting clients send the last id they saw and get only newer events.
+        last_seq = int(self.headers.get("Last-Event-ID") or 0)
+        last_write = time.monotonic()
+        try:
+            while True:
+                for seq, event, data in self.service.queue.events_since(job_id, last_seq):
+                    self.wfile.write(f"id: {seq}\nevent: {event}\ndata: {data}\n\n".encode("utf-8"))
+                    last_seq = seq
+                    last_write = time.monotonic()
+                    if event in FINISHED_STATUSES:
+                        self.wfile.flush()
+                        return
+                if time.monotonic() - last_write > KEEPALIVE_INTERVAL:
+                    self.wfile.write(b": keepalive\n\n")
+                    last_write = time.monotonic()
+                self.wfile.flush()
+                time.sleep(EVENT_POLL_INTERVAL)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def make_server(service, host="127.0.0.1", port=DEFAULT_PORT, quiet=False):
+    server = ThreadingHTTPServer((host, port), ServiceHandler)
+    server.daemon_threads = True
+    server.service = service
+    server.quiet = quiet
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Brand compliance check service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    parser.add_argument("--guidelines", default=DEFAULT_GUIDELINES_PATH)
+    parser.add_argument("--cache", default=VERDICT_CACHE_PATH, help="verdict cache file")
+    parser.add_argument("--manifest", default=RUN_MANIFEST_PATH,
+                        help="run manifest used to re-check only changed slides of revised decks")
+    parser.add_argument("--icon-library", default=ICON_LIBRARY_PATH,
+                        help="icon library to match pictures against (skipped if missing)")
+    parser.add_argument("--chunks", metavar="PREFIX",
+                        help="embedded guideline chunks (e.g. mydoc) to send only relevant guidelines")
+    parser.add_argument("--fake-model", type=float, metavar="LATENCY",
+                        help="use the offline fake model with this latency in seconds")
+    args = parser.parse_args(argv)
+
+    import resources
+    if args.fake_model is not None:
+        from fake_model import FakeGeminiModel
+        gemini_model = FakeGeminiModel(latency=args.fake_model)
+    else:
+        api_key = os.environ.get("GEMINI_API_KEY", "")
+        if not api_key:
+            parser.error("set GEMINI_API_KEY or pass --fake-model")
+        gemini_model = resources.get_gemini_model(api_key)
+    guidelines_text = ""
+    if os.path.exists(args.guidelines):
+        guidelines_text = resources.get_guidelines_text(args.guidelines)
+    retriever = None
+    if args.chunks:
+        from guideline_retrieval import GuidelineRetriever
+        embeddings, chunks = resources.get_embeddings_and_chunks(args.chunks)
+        retriever = GuidelineRetriever(resources.get_sentence_model(), chunks, embeddings)
+
+    service = ComplianceService(args.data_dir, gemini_model, guidelines_text, retriever,
+                                workers=max(1, args.workers), verdict_cache_path=args.cache,
+                                manifest_path=args.manifest, icon_library=args.icon_library)
+    service.start()
+    server = make_server(service, args.host, args.port)
+    print(f"Brandy service on http://{args.host}:{args.port} with {service.workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,346 @@
+import contextvars
+import json
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from metrics import tagged
+from verdict_cache import guidelines_version, verdict_key
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_MAX_IN_FLIGHT = 8
+DEFAULT_TIMEOUT = 60
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 1.0
+DEFAULT_BATCH_SIZE = 1
+DEFAULT_BATCH_TOKEN_BUDGET = 4000
+
+
+def check_element_compliance(element_info, gemini_model, guidelines_text):
+    prompt = f"""
+    Given these brand guidelines for PowerPoint presentations:
+    {guidelines_text}
+
+    Check if this element complies with the guidelines:
+    {element_info}
+
+    Font names and sizes are the effective values, including those inherited
+    from the slide layout, master and theme.
+
+    Respond with either:
+    - "COMPLIANT" if the element follows all relevant guidelines
+    - "NON-COMPLIANT: [specific reason]" if it violates any guidelines
+    """
+
+    response = gemini_model.generate_content(prompt)
+    answer = response.text.strip()
+
+    is_compliant = answer.startswith("COMPLIANT")
+    return is_compliant, answer
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token)"""
+    return len(text) // 4 + 1
+
+
+def make_batches(element_infos, batch_size=DEFAULT_BATCH_SIZE, token_budget=None, by_slide=False):
+    """Group element indexes into batches bounded by count and token budget"""
+    batches = []
+    current = []
+    current_tokens = 0
+    current_slide = None
+    for idx, info in enumerate(element_infos):
+        tokens = estimate_tokens(str(info))
+        slide = info.get("slide_number") if isinstance(info, dict) else None
+        full = (
+            (batch_size and len(current) >= batch_size)
+            or (token_budget and current and current_tokens + tokens > token_budget)
+            or (by_slide and current and slide != current_slide)
+        )
+        if full:
+            batches.append(current)
+            current = []
+            current_tokens = 0
+        current.append(idx)
+        current_tokens += tokens
+        current_slide = slide
+    if current:
+        batches.append(current)
+    return batches
+
+
+def check_elements_batch(element_infos, gemini_model, guidelines_text):
+    """Check several elements with one prompt; returns verdicts in input order.
+
+    Raises ValueError when the response does not contain a usable verdict
+    for every element.
+    """
+    ids = [f"E{i + 1}" for i in range(len(element_infos))]
+    elements = "\n".join(f"{element_id}: {info}" for element_id, info in zip(ids, element_infos))
+    prompt = f"""
+    Given these brand guidelines for PowerPoint presentations:
+    {guidelines_text}
+
+    Check if each of these elements complies with the guidelines:
+    {elements}
+
+    Font names and sizes are the effective values, including those inherited
+    from the slide layout, master and theme.
+
+    Respond with only a JSON object mapping every element ID to its verdict, e.g.
+    {{"E1": "COMPLIANT", "E2": "NON-COMPLIANT: [specific reason]"}}
+    Use "COMPLIANT" if the element follows all relevant guidelines and
+    "NON-COMPLIANT: [specific reason]" if it violates any guidelines.
+    """
+
+    response = gemini_model.generate_content(prompt)
+    verdicts = parse_batch_response(response.text, ids)
+    return [(answer.startswith("COMPLIANT"), answer) for answer in verdicts]
+
+
+def parse_batch_response(text, ids):
+    text = text.strip()
+    fenced = re.search(r"```(?:json)?\s*(.*?)```", text, re.DOTALL)
+    if fenced:
+        text = fenced.group(1).strip()
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Batch response is not valid JSON: {e}")
+
+    if isinstance(data, list):
+        data = {str(item.get("id")): item.get("verdict") for item in data if isinstance(item, dict)}
+    if not isinstance(data, dict):
+        raise ValueError("Batch response is not a JSON object")
+
+    verdicts = []
+    for element_id in ids:
+        answer = data.get(element_id)
+        if not isinstance(answer, str) or not answer.strip():
+            raise ValueError(f"Batch response has no verdict for {element_id}")
+        verdicts.append(answer.strip())
+    return verdicts
+
+
+def call_with_timeout(func, timeout, *args):
+    """Run func(*args) in a daemon thread and give up after timeout seconds"""
+    if not timeout:
+        return func(*args)
+
+    outcome = {}
+    # Metrics tags set by the caller carry over to the call's thread.
+    context = contextvars.copy_context()
+
+    def target():
+        try:
+            outcome["value"] = context.run(func, *args)
+        except BaseException as e:
+            outcome["error"] = e
+
+    worker = threading.Thread(target=target, daemon=True)
+    worker.start()
+    worker.join(timeout)
+    if worker.is_alive():
+        # The call cannot be cancelled; it is abandoned and its result dropped.
+        raise TimeoutError(f"Model call timed out after {timeout}s")
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["value"]
+
+
+class ComplianceChecker:
+    """Run element compliance checks against the model with bounded concurrency.
+
+    batch_size > 1 packs that many elements into one prompt (None means no
+    count limit), batch_token_budget caps the element payload of a batch and
+    batch_by_slide never mixes elements from different slides in a batch.
+    With a RuleEngine, elements the mechanical rules can decide never reach
+    the model. With a VerdictCache, elements seen before (and repeats within
+    the same run) skip the model call. Counts are kept in self.stats and the
+    origin of each verdict ("rules", "cache" or "model") in self.sources.
+    With a GuidelineRetriever, prompts carry only the relevant guideline
+    chunks instead of the whole document. tags (e.g. the deck) are attached
+    to the metrics of every model call, together with the elements checked.
+    """
+
+    def __init__(self, gemini_model, guidelines_text,
+                 max_in_flight=DEFAULT_MAX_IN_FLIGHT, timeout=DEFAULT_TIMEOUT,
+                 retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF,
+                 batch_size=DEFAULT_BATCH_SIZE, batch_token_budget=DEFAULT_BATCH_TOKEN_BUDGET,
+                 batch_by_slide=False, cache=None, rule_engine=None, retriever=None, tags=None):
+        self.gemini_model = gemini_model
+        self.guidelines_text = guidelines_text
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.timeout = timeout
+        self.retries = max(0, int(retries))
+        self.backoff = backoff
+        self.batch_size = batch_size
+        self.batch_token_budget = batch_token_budget
+        self.batch_by_slide = batch_by_slide
+        self.cache = cache
+        self.rule_engine = rule_engine
+        self.retriever = retriever
+        self.tags = tags or {}
+        self.model_name = getattr(gemini_model, "model_name", type(gemini_model).__name__)
+        self.guidelines_version = guidelines_version(guidelines_text)
+        if retriever is not None:
+            self.guidelines_version += ":" + retriever.signature
+        self.stats = {
+            "rule_verdicts": 0, "cache_hits": 0, "cache_misses": 0, "model_checks": 0,
+            "prompt_tokens_full": 0, "prompt_tokens_sent": 0, "retries": 0, "errors": 0
+        }
+        self.sources = {}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def _call_tags(self, element_infos):
+        elements = [
+            [info.get("slide_number"), info.get("element_number")]
+            for info in element_infos if isinstance(info, dict)
+        ]
+        return tagged(**self.tags, elements=elements)
+
+    def _call_with_retry(self, func, *args):
+        last_error = None
+        for attempt in range(self.retries + 1):
+            try:
+                with tagged(attempt=attempt):
+                    return call_with_timeout(func, self.timeout, *args)
+            except ValueError:
+                # Unparseable responses are handled by the caller, not retried.
+                raise
+            except Exception as e:
+                last_error = e
+                if attempt < self.retries:
+                    self._count("retries")
+                    time.sleep(self.backoff * (2 ** attempt))
+        raise last_error
+
+    def _check_single(self, element_info, guidelines):
+        try:
+            with self._call_tags([element_info]):
+                return self._call_with_retry(
+                    check_element_compliance, str(element_info), self.gemini_model, guidelines
+                )
+        except Exception as e:
+            self._count("errors")
+            return False, f"CHECK FAILED: {e}"
+
+    def _check_batch(self, element_infos, guidelines):
+        if len(element_infos) == 1:
+            return [self._check_single(element_infos[0], guidelines)]
+        try:
+            with self._call_tags(element_infos):
+                return self._call_with_retry(
+                    check_elements_batch, element_infos, self.gemini_model, guidelines
+                )
+        except ValueError:
+            # Split the batch and try the halves until the responses parse.
+            middle = len(element_infos) // 2
+            return (self._check_batch(element_infos[:middle], guidelines)
+                    + self._check_batch(element_infos[middle:], guidelines))
+        except Exception as e:
+            self._count("errors")
+            return [(False, f"CHECK FAILED: {e}")] * len(element_infos)
+
+    def iter_checks(self, element_infos):
+        """Yield (index, (is_compliant, message)) as each check finishes"""
+        # Identical elements are checked once and the verdict fanned out.
+        self.sources = {}
+        pending = {}
+        for idx, info in enumerate(element_infos):
+            if self.rule_engine is not None and isinstance(info, dict):
+                decided, verdict, _ = self.rule_engine.evaluate(info)
+                if decided:
+                    self.stats["rule_verdicts"] += 1
+                    self.sources[idx] = "rules"
+                    yield idx, verdict
+                    continue
+            key = verdict_key(info, self.guidelines_version, self.model_name)
+            if key in pending:
+                pending[key].append(idx)
+                self.stats["cache_hits"] += 1
+                continue
+            if self.cache is not None:
+                verdict = self.cache.get(key)
+                if verdict is not None:
+                    self.stats["cache_hits"] += 1
+                    self.sources[idx] = "cache"
+                    yield idx, verdict
+                    continue
+                self.stats["cache_misses"] += 1
+            pending[key] = [idx]
+        if not pending:
+            return
+
+        unique = list(pending.items())
+        unique_infos = [element_infos[idxs[0]] for _, idxs in unique]
+        self.stats["model_checks"] += len(unique_infos)
+        batches = make_batches(
+            unique_infos,
+            batch_size=self.batch_size,
+            token_budget=self.batch_token_budget if self.batch_size != 1 or self.batch_by_slide else None,
+            by_slide=self.batch_by_slide
+        )
+        guidelines = self._guidelines_for_batches(unique_infos, batches)
+        executor = ThreadPoolExecutor(max_workers=min(self.max_in_flight, len(batches)))
+        try:
+            futures = {
+                executor.submit(self._check_batch, [unique_infos[i] for i in batch], batch_guidelines): batch
+                for batch, batch_guidelines in zip(batches, guidelines)
+            }
+            for future in as_completed(futures):
+                for i, verdict in zip(futures[future], future.result()):
+                    key, idxs = unique[i]
+                    if self.cache is not None and not verdict[1].startswith("CHECK FAILED"):
+                        self.cache.put(key, verdict)
+                    for n, idx in enumerate(idxs):
+                        self.sources[idx] = "model" if n == 0 else "cache"
+                        yield idx, verdict
+        finally:
+            # If the caller stops iterating early, calls not yet started are dropped.
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _guidelines_for_batches(self, element_infos, batches):
+        """Pick the guideline text for each batch and log the prompt savings per element"""
+        if self.retriever is None:
+            guidelines = [self.guidelines_text] * len(batches)
+        else:
+            # One encode call for every element keeps retrieval off the workers.
+            with tagged(**self.tags):
+                embeddings = self.retriever.encode(element_infos)
+            guidelines = [self.retriever.guidelines_for(embeddings[batch]) for batch in batches]
+
+        full_tokens = estimate_tokens(self.guidelines_text or "")
+        for batch, batch_guidelines in zip(batches, guidelines):
+            sent_tokens = estimate_tokens(batch_guidelines or "")
+            for i in batch:
+                element_tokens = estimate_tokens(str(element_infos[i]))
+                before = full_tokens + element_tokens
+                after = sent_tokens // len(batch) + element_tokens
+                self.stats["prompt_tokens_full"] += before
+                self.stats["prompt_tokens_sent"] += after
+                info = element_infos[i]
+                logger.info(
+                    "Prompt for slide %s element %s: ~%d tokens with full guidelines, ~%d tokens sent",
+                    info.get("slide_number") if isinstance(info, dict) else "?",
+                    info.get("element_number") if isinstance(info, dict) else "?",
+                    before, after
+                )
+        return guidelines
+
+    def check_all(self, element_infos):
+        """Return verdicts in the same order as element_infos"""
+        results = [None] * len(element_infos)
+        for idx, verdict in self.iter_checks(element_infos):
+            results[idx] = verdict
+        return results
@@ -3,14 +3,33 @@
 PowerPoint Element Analyzer
 Prints all elements from each slide in a PowerPoint file to the terminal.
 
-Usage: python analyze_ppt.py <path_to_pptx_file>
+Usage: python analyze_ppt.py <path_to_pptx_file> [--fast]
+
+--fast reads text elements straight from the slide XML (no python-pptx
+shape objects) and reports effective fonts and sizes, including inherited ones.
 """
 
+import os
 import sys
+from lxml import etree
 from pptx import Presentation
 from pptx.enum.shapes import MSO_SHAPE_TYPE
 
-def analyze_shape(shape, shape_idx):
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def nested_text(shape, shape_idx, related=None):
+    """Text inside groups, tables, charts and SmartArt, as (element ID, text) pairs"""
+    from pptx_extract import iter_text_bodies, text_record
+    found = []
+    for element_id, _, _, body in iter_text_bodies(shape._element, shape_idx, related):
+        if element_id == str(shape_idx):
+            continue
+        text = text_record(None, element_id, body)["text"].strip()
+        if text:
+            found.append((element_id, text))
+    return found
+
+def analyze_shape(shape, shape_idx, related=None):
     details = []
     
     
@@ -71,7 +90,7 @@ def analyze_shape(shape, shape_idx):
             details.append("    Content: Image/Picture")
         elif shape.shape_type == MSO_SHAPE_TYPE.TABLE:
             try:
-                details.append(f"    Content: Table ({shape.table.rows} rows x {shape.table.columns} cols)")
+                details.append(f"    Content: Table ({len(shape.table.rows)} rows x {len(shape.table.columns)} cols)")
             except:
                 details.append("    Content: Table")
         elif shape.shape_type == MSO_SHAPE_TYPE.CHART:
@@ -86,6 +105,9 @@ def analyze_shape(shape, shape_idx):
             details.append(f"    Shape Type: {shape.shape_type}")
     except AttributeError:
         details.append("    Shape Type: Unknown")
+
+    for element_id, text in nested_text(shape, shape_idx, related):
+        details.append(f"    Element {element_id}: '{text}'")
     
     return "\n".join(details)
 
@@ -104,8 +126,13 @@ def analyze_pptx(file_path):
             if len(slide.shapes) == 0:
                 print("  [No elements found]")
             else:
+                def related(rid, slide_part=slide.part):
+                    part = slide_part.related_part(rid)
+                    element = getattr(part, "_element", None)
+                    return element if element is not None else etree.fromstring(part.blob)
+
                 for shape_idx, shape in enumerate(slide.shapes, 1):
-                    print(analyze_shape(shape, shape_idx))
+                    print(analyze_shape(shape, shape_idx, related))
             
             # Check for speaker notes
             notes_text = slide.notes_slide.notes_text_frame.text.strip()
@@ -125,14 +152,43 @@ def analyze_pptx(file_path):
     
     return True
 
+def analyze_pptx_fast(file_path):
+    """Print text elements with their effective fonts using the XML extractor"""
+    from pptx_extract import extract_elements
+    try:
+        print(f"\n=== PowerPoint Analysis (fast): {file_path} ===")
+        current_slide = None
+        for slide_idx, element_id, element in extract_elements(file_path, resolve_styles=True):
+            if slide_idx != current_slide:
+                if current_slide is not None:
+                    print("-" * 60)
+                print(f"SLIDE {slide_idx}:")
+                current_slide = slide_idx
+            text_content = element["text"].strip()
+            print(f"  Element {element_id}:")
+            print(f"    Text: '{text_content}'" if text_content else "    Text: [Empty text frame]")
+            runs = [run for run in element["font_details"] if run["text"].strip()]
+            if runs:
+                print(f"    Fonts: {', '.join(sorted({run['font_name'] or 'Default' for run in runs}))}")
+                print(f"    Font Sizes: {', '.join(sorted({str(run['font_size'] or 'Default') for run in runs}))}pt")
+        print(f"\nAnalysis complete! Processed {current_slide or 0} slides.")
+    except FileNotFoundError:
+        print(f"Error: File '{file_path}' not found.")
+        return False
+    except Exception as e:
+        print(f"Error analyzing PowerPoint file: {e}")
+        return False
+    return True
+
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python analyze_ppt.py <path_to_pptx_file>")
+    args = [a for a in sys.argv[1:] if a != "--fast"]
+    if len(args) != 1:
+        print("Usage: python analyze_ppt.py <path_to_pptx_file> [--fast]")
         print("Example: python analyze_ppt.py presentation.pptx")
         sys.exit(1)
     
-    pptx_file = sys.argv[1]
-    success = analyze_pptx(pptx_file)
+    pptx_file = args[0]
+    success = analyze_pptx_fast(pptx_file) if "--fast" in sys.argv else analyze_pptx(pptx_file)
     
     if not success:
         sys.exit(1)
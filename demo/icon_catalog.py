@@ -0,0 +1,184 @@
+"""
+Icon catalog: the icon library's file names parsed once and kept on disk.
+
+Icons are grouped by ID with their colour and format variants, and keyword
+category counts are precomputed. The catalog is a SQLite file next to the
+library (<library>.catalog.sqlite3). It is reused as long as the library
+directory's mtime is unchanged. When files are added or removed, it is
+updated incrementally and only the new file names are parsed.
+
+Usage: python icon_catalog.py [library_path] [--rebuild]
+"""
+
+import os
+import re
+import sqlite3
+import sys
+import threading
+
+# Bump when parsing or the schema changes so stored catalogs are rebuilt.
+CATALOG_VERSION = 1
+ICON_EXTENSIONS = ('.png', '.svg')
+CATEGORY_MIN_LENGTH = 4
+# SQLite's default limit on bound parameters is 999.
+QUERY_CHUNK = 500
+
+
+def catalog_path_for(library_path):
+    return os.path.normpath(library_path) + ".catalog.sqlite3"
+
+
+def extract_keywords(name):
+    """Searchable keywords of an icon name: its hyphen/underscore parts plus the full name"""
+    keywords = re.split(r'[-_]', name.lower())
+    keywords.append(name.lower())
+    return [k for k in keywords if k]
+
+
+def parse_icon_filename(filename):
+    """(id, name, color, extension) of ID_name_color.ext, or None for other files.
+
+    Some exports repeat the ID (304735_304735_hacker_blue.png); the repeats
+    are not part of the name.
+    """
+    if not filename.endswith(ICON_EXTENSIONS):
+        return None
+    stem, extension = filename.rsplit('.', 1)
+    parts = stem.split('_')
+    if len(parts) < 3:
+        return None
+    icon_id, name_parts, color = parts[0], parts[1:-1], parts[-1]
+    while len(name_parts) > 1 and name_parts[0] == icon_id:
+        name_parts = name_parts[1:]
+    return icon_id, '_'.join(name_parts), color, extension
+
+
+class IconCatalog:
+    """SQLite catalog of one icon library: icons by ID, their variants, keywords and category counts"""
+
+    def __init__(self, library_path, path=None, rebuild=False):
+        self.library_path = library_path
+        self.path = path or catalog_path_for(library_path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS icons (id TEXT PRIMARY KEY, name TEXT)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS variants ("
+            "filename TEXT PRIMARY KEY, icon_id TEXT, color TEXT, extension TEXT)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS keywords (keyword TEXT, icon_id TEXT, PRIMARY KEY (keyword, icon_id))"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS categories (keyword TEXT PRIMARY KEY, icons INTEGER)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS icons_name ON icons(name)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS variants_icon ON variants(icon_id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS keywords_icon ON keywords(icon_id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS categories_count ON categories(icons DESC, keyword)")
+        self._conn.commit()
+        self.added = self.removed = 0
+        self.refresh(rebuild)
+
+    def _meta(self, key):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def refresh(self, rebuild=False):
+        """Bring the catalog up to date with the library directory; False if it was already current"""
+        mtime_ns = str(os.stat(self.library_path).st_mtime_ns)
+        with self._lock:
+            if rebuild or self._meta('version') != str(CATALOG_VERSION):
+                for table in ("icons", "variants", "keywords", "categories", "meta"):
+                    self._conn.execute(f"DELETE FROM {table}")
+            elif self._meta('mtime_ns') == mtime_ns:
+                return False
+
+            known = {row[0] for row in self._conn.execute("SELECT filename FROM variants")}
+            current = {f for f in os.listdir(self.library_path) if f.endswith(ICON_EXTENSIONS)}
+            removed = list(known - current)
+            added = [(f, parse_icon_filename(f)) for f in sorted(current - known)]
+            added = [(f, parsed) for f, parsed in added if parsed is not None]
+
+            for start in range(0, len(removed), QUERY_CHUNK):
+                chunk = removed[start:start + QUERY_CHUNK]
+                self._conn.execute(f"DELETE FROM variants WHERE filename IN ({','.join('?' * len(chunk))})", chunk)
+            if removed:
+                self._conn.execute("DELETE FROM icons WHERE id NOT IN (SELECT icon_id FROM variants)")
+                self._conn.execute("DELETE FROM keywords WHERE icon_id NOT IN (SELECT id FROM icons)")
+            # The first file seen for an ID names the icon.
+            names = {}
+            for _, (icon_id, name, _, _) in added:
+                names.setdefault(icon_id, name)
+            self._conn.executemany("INSERT OR IGNORE INTO icons (id, name) VALUES (?, ?)", names.items())
+            self._conn.executemany("INSERT OR IGNORE INTO keywords (keyword, icon_id) VALUES (?, ?)",
+                                   [(keyword, icon_id) for icon_id, name in names.items()
+                                    for keyword in dict.fromkeys(extract_keywords(name))])
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO variants (filename, icon_id, color, extension) VALUES (?, ?, ?, ?)",
+                [(f, icon_id, color, extension) for f, (icon_id, _, color, extension) in added]
+            )
+            if added or removed:
+                self._conn.execute("DELETE FROM categories")
+                self._conn.execute(
+                    "INSERT INTO categories (keyword, icons) "
+                    "SELECT k.keyword, COUNT(DISTINCT i.name) FROM keywords k JOIN icons i ON i.id = k.icon_id "
+                    "WHERE length(k.keyword) >= ? GROUP BY k.keyword",
+                    (CATEGORY_MIN_LENGTH,)
+                )
+            self._conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                                   [('version', str(CATALOG_VERSION)), ('mtime_ns', mtime_ns)])
+            self._conn.commit()
+        self.added, self.removed = len(added), len(removed)
+        return True
+
+    def _rows(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def icon_count(self):
+        return self._rows("SELECT COUNT(*) FROM icons")[0][0]
+
+    def name_count(self):
+        return self._rows("SELECT COUNT(DISTINCT name) FROM icons")[0][0]
+
+    def file_count(self):
+        return self._rows("SELECT COUNT(*) FROM variants")[0][0]
+
+    def icons(self):
+        """(icon_id, name) of every icon, ordered by ID"""
+        return self._rows("SELECT id, name FROM icons ORDER BY id")
+
+    def categories(self, limit=20):
+        """[(keyword, unique icon names)] for the most common keywords"""
+        return self._rows("SELECT keyword, icons FROM categories ORDER BY icons DESC, keyword LIMIT ?", (limit,))
+
+    def variants(self, name=None, icon_id=None):
+        """(icon_id, name, filename, color, extension) of every file, or of one icon name or ID,
+        ordered by ID and file name"""
+        sql = ("SELECT i.id, i.name, v.filename, v.color, v.extension "
+               "FROM variants v JOIN icons i ON i.id = v.icon_id")
+        if name is not None:
+            return self._rows(sql + " WHERE i.name = ? ORDER BY i.id, v.filename", (name,))
+        if icon_id is not None:
+            return self._rows(sql + " WHERE i.id = ? ORDER BY v.filename", (icon_id,))
+        return self._rows(sql + " ORDER BY i.id, v.filename")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    library_path = args[0] if args else "ImageLibrary_60_20250609_1733"
+    if not os.path.isdir(library_path):
+        print(f"Error: Icon library path '{library_path}' not found.")
+        sys.exit(1)
+    catalog = IconCatalog(library_path, rebuild='--rebuild' in sys.argv)
+    print(f"{catalog.path}: {catalog.icon_count()} icons, {catalog.file_count()} files "
+          f"(+{catalog.added} -{catalog.removed} this run)")
+    catalog.close()
+
+
+if __name__ == "__main__":
+    main()
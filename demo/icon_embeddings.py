@@ -0,0 +1,209 @@
+"""
+Semantic icon search: sentence embeddings of icon names, combined with the
+lexical IconSearcher score.
+
+Icon names are embedded offline in batches, one vector per distinct name,
+and stored next to the library (<library>.icon_embeddings.npz). Rebuilding only
+encodes names that are not in the stored file yet. A query is encoded once
+and scored against every distinct name with a single matrix product. The top
+semantic matches are merged with the lexical matches:
+
+  score = LEXICAL_WEIGHT * lexical + (1 - LEXICAL_WEIGHT) * cosine similarity
+
+This lets "blockchain" or "machine learning" find related icons that share
+no letters with the query.
+
+vector_index comes from the repository root, which callers (resources.py,
+the benchmarks) already import from; run from demo/ with it on the path:
+
+Usage: PYTHONPATH=.. python icon_embeddings.py [library_path] [--batch-size N]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+from icon_catalog import IconCatalog, extract_keywords
+from icon_search import IconSearcher
+from vector_index import normalize, top_k_indices
+
+SENTENCE_MODEL_NAME = "all-MiniLM-L6-v2"
+DEFAULT_BATCH_SIZE = 256
+LEXICAL_WEIGHT = 0.5
+MIN_HYBRID_SCORE = 0.3
+# Lexical matches below this count as 0 in the hybrid score; it is also
+# IconSearcher's default, where fuzzy matching stays cheap.
+LEXICAL_MIN_SCORE = 0.5
+SEMANTIC_CANDIDATES = 50
+# Lexical results are per file; an icon rarely has more variants than this.
+FILES_PER_ICON = 4
+
+
+def embeddings_path_for(library_path):
+    return os.path.normpath(library_path) + ".icon_embeddings.npz"
+
+
+def icon_text(name):
+    """What gets embedded for an icon: its name parts as words"""
+    parts = extract_keywords(name)[:-1]
+    return " ".join(parts) or name
+
+
+class IconEmbeddings:
+    """Normalized name embeddings: one row per distinct name, shared by the icon IDs with that name"""
+
+    def __init__(self, ids, texts, vectors, text_rows, model_name):
+        self.ids = list(ids)
+        self.texts = list(texts)
+        self.vectors = np.asarray(vectors, dtype=np.float32)
+        self.text_rows = np.asarray(text_rows, dtype=np.int64)
+        self.model_name = model_name
+        self.rows = dict(zip(self.ids, self.text_rows.tolist()))
+        self.text_ids = [[] for _ in self.texts]
+        for icon_id, row in self.rows.items():
+            self.text_ids[row].append(icon_id)
+        self.encoded = 0
+
+    def __len__(self):
+        return len(self.ids)
+
+    def scores(self, query_vector):
+        """Cosine similarity of the query to every distinct name (row of self.texts)"""
+        if not len(self.texts):
+            return np.zeros(0, dtype=np.float32)
+        return self.vectors @ normalize(query_vector)[0]
+
+    def save(self, path):
+        np.savez(path, ids=np.array(self.ids, dtype=str), texts=np.array(self.texts, dtype=str),
+                 vectors=self.vectors, text_rows=self.text_rows, model=self.model_name)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['ids'].tolist(), data['texts'].tolist(), data['vectors'], data['text_rows'],
+                       str(data['model']))
+
+
+def build_icon_embeddings(catalog, sentence_model, path=None, model_name=SENTENCE_MODEL_NAME,
+                          batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """Embed every catalog icon, reusing stored vectors for names already embedded with this model"""
+    icons = catalog.icons()
+    names = [icon_text(name) for _, name in icons]
+    stored = {}
+    previous = None
+    if path and os.path.exists(path):
+        previous = IconEmbeddings.load(path)
+        if previous.model_name == model_name:
+            stored = dict(zip(previous.texts, previous.vectors))
+
+    # Icons with the same name share one vector, which also keeps queries fast.
+    texts = list(dict.fromkeys(names))
+    missing = [t for t in texts if t not in stored]
+    for start in range(0, len(missing), batch_size):
+        batch = missing[start:start + batch_size]
+        stored.update(zip(batch, normalize(sentence_model.encode(batch, batch_size=batch_size))))
+        if progress:
+            progress(start + len(batch), len(missing))
+
+    text_rows = {text: row for row, text in enumerate(texts)}
+    if texts:
+        vectors = np.stack([stored[t] for t in texts])
+    else:
+        vectors = np.zeros((0, 0), dtype=np.float32)
+    embeddings = IconEmbeddings([icon_id for icon_id, _ in icons], texts, vectors,
+                                [text_rows[t] for t in names], model_name)
+    embeddings.encoded = len(missing)
+    unchanged = (previous is not None and previous.model_name == model_name
+                 and previous.ids == embeddings.ids and previous.texts == embeddings.texts
+                 and np.array_equal(previous.text_rows, embeddings.text_rows))
+    if path and not unchanged:
+        embeddings.save(path)
+    return embeddings
+
+
+class HybridIconSearch:
+    """Rank icons by a weighted sum of the lexical IconSearcher score and name embedding similarity"""
+
+    def __init__(self, searcher, embeddings, sentence_model, lexical_weight=LEXICAL_WEIGHT):
+        self.searcher = searcher
+        self.embeddings = embeddings
+        self.sentence_model = sentence_model
+        self.lexical_weight = lexical_weight
+        # Build the lexical index now rather than on the first query.
+        if searcher.keyword_icons is None:
+            searcher._build_index()
+
+    def search(self, text, max_icons=10, min_score=MIN_HYBRID_SCORE):
+        """[(score, icon file record)] for every variant of the best max_icons icons"""
+        query_vector = self.sentence_model.encode([text])[0]
+        return self.search_vector(text, query_vector, max_icons, min_score)
+
+    def search_vector(self, text, query_vector, max_icons=10, min_score=MIN_HYBRID_SCORE,
+                      candidates=SEMANTIC_CANDIDATES):
+        """search() with the query already encoded"""
+        lexical = {}
+        for score, icon in self.searcher.search(text, min_score=LEXICAL_MIN_SCORE,
+                                                max_results=candidates * FILES_PER_ICON):
+            lexical[icon['id']] = max(score, lexical.get(icon['id'], 0))
+
+        semantic = self.embeddings.scores(query_vector)
+        icon_ids = set(lexical)
+        for row in top_k_indices(semantic, candidates):
+            icon_ids.update(self.embeddings.text_ids[row])
+        ranked = []
+        for icon_id in icon_ids:
+            row = self.embeddings.rows.get(icon_id)
+            similarity = max(float(semantic[row]), 0.0) if row is not None else 0.0
+            score = self.lexical_weight * lexical.get(icon_id, 0) + (1 - self.lexical_weight) * similarity
+            if score >= min_score:
+                ranked.append((score, icon_id))
+        ranked.sort(key=lambda item: (-item[0], item[1]))
+
+        results = []
+        for score, icon_id in ranked[:max_icons]:
+            results.extend((score, icon) for icon in self.searcher.get_icon_files(icon_id))
+        return results
+
+
+def load_hybrid_search(library_path, sentence_model, model_name=SENTENCE_MODEL_NAME, embeddings_path=None):
+    """HybridIconSearch for a library, embedding any icons added since the stored embeddings were built"""
+    searcher = IconSearcher(library_path)
+    if searcher.catalog is None:
+        return None
+    embeddings = build_icon_embeddings(searcher.catalog, sentence_model,
+                                       embeddings_path or embeddings_path_for(library_path), model_name)
+    return HybridIconSearch(searcher, embeddings, sentence_model)
+
+
+def main():
+    args = sys.argv[1:]
+    batch_size = DEFAULT_BATCH_SIZE
+    if "--batch-size" in args:
+        i = args.index("--batch-size")
+        batch_size = int(args[i + 1])
+        del args[i:i + 2]
+    library_path = args[0] if args else "ImageLibrary_60_20250609_1733"
+    if not os.path.isdir(library_path):
+        print(f"Error: Icon library path '{library_path}' not found.")
+        sys.exit(1)
+
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(SENTENCE_MODEL_NAME)
+    start = time.perf_counter()
+    catalog = IconCatalog(library_path)
+    path = embeddings_path_for(library_path)
+    embeddings = build_icon_embeddings(
+        catalog, model, path, batch_size=batch_size,
+        progress=lambda done, total: print(f"\rEncoded {done}/{total} names", end="", flush=True)
+    )
+    if embeddings.encoded:
+        print()
+    print(f"{path}: {len(embeddings)} icons, {embeddings.encoded} names encoded "
+          f"in {time.perf_counter() - start:.1f}s")
+    catalog.close()
+
+
+if __name__ == "__main__":
+    main()
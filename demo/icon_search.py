@@ -1,107 +1,250 @@
 import sys
 import os
-import re
+import heapq
+import numpy as np
 from difflib import SequenceMatcher
 from collections import defaultdict
 
+from icon_catalog import IconCatalog, extract_keywords
+
+FUZZY_THRESHOLD = 0.6
+FUZZY_WEIGHT = 0.7
+CONTAINS_WEIGHT = 0.9
+CONTAINED_WEIGHT = 0.8
+MIN_CONTAINMENT = 3
+
+def _grams(text, n):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+class _FuzzyQuery:
+    """SequenceMatcher(None, search_term, keyword).ratio() for one search term and many keywords"""
+
+    def __init__(self, search_term):
+        self.search_term = search_term
+        self.matcher = SequenceMatcher(None, search_term, "")
+        self.counts = defaultdict(int)
+        for char in search_term:
+            self.counts[char] += 1
+
+    def ratio_bound(self, keyword):
+        """quick_ratio(): an upper bound of ratio() from shared character counts"""
+        available = dict(self.counts)
+        matches = 0
+        for char in keyword:
+            if available.get(char, 0) > 0:
+                available[char] -= 1
+                matches += 1
+        total = len(self.search_term) + len(keyword)
+        return 2.0 * matches / total if total else 1.0
+
+    def ratio(self, keyword):
+        self.matcher.set_seq2(keyword)
+        return self.matcher.ratio()
+
 class IconSearcher:
-    def __init__(self, library_path):
+    def __init__(self, library_path, catalog_path=None):
         self.library_path = library_path
-        self.icons = self._load_icons()
-        
+        self.catalog = None
+        if os.path.isdir(library_path):
+            self.catalog = IconCatalog(library_path, catalog_path)
+        else:
+            print(f"Error: Icon library path '{self.library_path}' not found.")
+        # Icon records and the search index are built on the first search;
+        # categories and variant lookups are answered by the catalog.
+        self._icons = None
+        self.keyword_icons = None
+
+    @property
+    def icons(self):
+        if self._icons is None:
+            self._icons = self._load_icons()
+        return self._icons
+
     def _load_icons(self):
-        """Load all icons from the library and extract metadata"""
+        """Load all icons from the library catalog, one record per file"""
         icons = []
-        
-        if not os.path.exists(self.library_path):
-            print(f"Error: Icon library path '{self.library_path}' not found.")
+        self._files_by_id = defaultdict(list)
+        if self.catalog is None:
             return icons
-            
-        for filename in os.listdir(self.library_path):
-            if filename.endswith(('.png', '.svg')):
-                # Parse filename: ID_name_color.extension
-                parts = filename.split('_')
-                if len(parts) >= 3:
-                    icon_id = parts[0]
-                    # Handle cases where there might be duplicate IDs in name
-                    name_parts = parts[1:-1]  # Everything except first (ID) and last (color.ext)
-                    name = '_'.join(name_parts)
-                    
-                    # Extract color and extension
-                    color_ext = parts[-1]
-                    color = color_ext.split('.')[0]
-                    extension = color_ext.split('.')[1]
-                    
-                    icons.append({
-                        'filename': filename,
-                        'id': icon_id,
-                        'name': name,
-                        'color': color,
-                        'extension': extension,
-                        'path': os.path.join(self.library_path, filename),
-                        'keywords': self._extract_keywords(name)
-                    })
-        
+        keywords = {}
+        for row in self.catalog.variants():
+            # Variants of one icon share its keyword list.
+            if row[0] not in keywords:
+                keywords[row[0]] = extract_keywords(row[1])
+            icon = self._icon_record(row, keywords[row[0]])
+            icons.append(icon)
+            self._files_by_id[icon['id']].append(icon)
         return icons
-    
-    def _extract_keywords(self, name):
-        """Extract searchable keywords from icon name"""
-        # Split by hyphens and underscores, convert to lowercase
-        keywords = re.split(r'[-_]', name.lower())
-        # Add the full name as well
-        keywords.append(name.lower())
-        # Remove empty strings
-        keywords = [k for k in keywords if k]
-        return keywords
-    
+
+    def _icon_record(self, row, keywords=None):
+        icon_id, name, filename, color, extension = row
+        return {
+            'filename': filename,
+            'id': icon_id,
+            'name': name,
+            'color': color,
+            'extension': extension,
+            'path': os.path.join(self.library_path, filename),
+            'keywords': keywords if keywords is not None else extract_keywords(name)
+        }
+
+    def icon_count(self):
+        """Number of icon files in the library"""
+        return self.catalog.file_count() if self.catalog is not None else 0
+
+    def top_categories(self, limit):
+        return self.catalog.categories(limit) if self.catalog is not None else []
+
+    def _build_index(self):
+        """Inverted index from keyword to icons, trigram postings and per-keyword character counts.
+
+        Keywords are ordered by length so the ones a query can still match
+        form one slice of the character count matrix.
+        """
+        self.keyword_icons = defaultdict(list)
+        for idx, icon in enumerate(self.icons):
+            for keyword in dict.fromkeys(icon['keywords']):
+                self.keyword_icons[keyword].append(idx)
+        self.keywords = sorted(self.keyword_icons, key=len)
+        self.keyword_lengths = np.array([len(k) for k in self.keywords], dtype=np.int32)
+        self.trigram_postings = defaultdict(list)
+        for kid, keyword in enumerate(self.keywords):
+            for gram in _grams(keyword, 3):
+                self.trigram_postings[gram].append(kid)
+        self.alphabet = {char: col for col, char in enumerate(sorted({c for k in self.keywords for c in k}))}
+        self.char_counts = np.zeros((len(self.keywords), len(self.alphabet)), dtype=np.uint8)
+        for kid, keyword in enumerate(self.keywords):
+            for char in keyword:
+                col = self.alphabet[char]
+                self.char_counts[kid, col] = min(255, self.char_counts[kid, col] + 1)
+
+    def _keyword_score(self, search_term, keyword, query=None, floor=0):
+        """Score of one (lowercase) search term against one keyword.
+
+        Fuzzy matching is skipped when even its upper bound could not raise
+        the score, or could not bring it up to floor.
+        """
+        if search_term == keyword:
+            return 1.0
+        max_score = 0
+
+        # Check if search term is contained in keyword (must be meaningful)
+        if search_term in keyword and len(search_term) >= MIN_CONTAINMENT:
+            score = len(search_term) / len(keyword)
+            max_score = max(max_score, score * CONTAINS_WEIGHT)
+
+        # Check if keyword is contained in search term (must be meaningful)
+        if keyword in search_term and len(keyword) >= MIN_CONTAINMENT:
+            score = len(keyword) / len(search_term)
+            max_score = max(max_score, score * CONTAINED_WEIGHT)
+
+        # Use sequence matching for fuzzy matching (stricter threshold)
+        query = query or _FuzzyQuery(search_term)
+        bound = query.ratio_bound(keyword)
+        if bound > FUZZY_THRESHOLD and bound * FUZZY_WEIGHT > max_score and bound * FUZZY_WEIGHT >= floor:
+            similarity = query.ratio(keyword)
+            if similarity > FUZZY_THRESHOLD:  # Only consider high similarity matches
+                max_score = max(max_score, similarity * FUZZY_WEIGHT)
+        return max_score
+
     def _calculate_similarity(self, search_term, icon):
         """Calculate similarity score between search term and icon"""
         search_term = search_term.lower()
         max_score = 0
-        
-        # Check exact matches first (highest score)
         for keyword in icon['keywords']:
-            if search_term == keyword:
+            score = self._keyword_score(search_term, keyword)
+            if score == 1.0:
                 return 1.0
-            
-            # Check if search term is contained in keyword (must be meaningful)
-            if search_term in keyword and len(search_term) >= 3:
-                score = len(search_term) / len(keyword)
-                max_score = max(max_score, score * 0.9)
-            
-            # Check if keyword is contained in search term (must be meaningful)
-            if keyword in search_term and len(keyword) >= 3:
-                score = len(keyword) / len(search_term)
-                max_score = max(max_score, score * 0.8)
-            
-            # Use sequence matching for fuzzy matching (stricter threshold)
-            similarity = SequenceMatcher(None, search_term, keyword).ratio()
-            if similarity > 0.6:  # Only consider high similarity matches
-                max_score = max(max_score, similarity * 0.7)
-        
+            max_score = max(max_score, score)
         return max_score
-    
+
+    def _candidate_keywords(self, search_term, min_score):
+        """Keywords that can score at least min_score; every other keyword scores lower"""
+        n = len(search_term)
+        if min_score <= 0 or n == 0:
+            return set(self.keywords)
+        candidates = set()
+        # Exact matches and keywords contained in the search term
+        for start in range(n):
+            for end in range(start + min(MIN_CONTAINMENT, n), n + 1):
+                if search_term[start:end] in self.keyword_icons:
+                    candidates.add(search_term[start:end])
+
+        # Keywords containing the search term hold every one of its trigrams
+        if n >= MIN_CONTAINMENT:
+            longest = n * CONTAINS_WEIGHT / min_score
+            postings = sorted((self.trigram_postings.get(gram, []) for gram in _grams(search_term, 3)), key=len)
+            shared = set(postings[0]).intersection(*postings[1:])
+            candidates.update(self.keywords[kid] for kid in shared if len(self.keywords[kid]) <= longest)
+
+        # Fuzzy matches: ratio() is at most quick_ratio(), computed here from character
+        # counts for the keywords whose length can still reach the threshold
+        fuzzy = max(FUZZY_THRESHOLD, min_score / FUZZY_WEIGHT)
+        if fuzzy < 1:
+            lo = np.searchsorted(self.keyword_lengths, n * fuzzy / (2 - fuzzy), side='left')
+            hi = np.searchsorted(self.keyword_lengths, n * (2 - fuzzy) / fuzzy, side='right')
+            query = np.zeros(len(self.alphabet), dtype=np.uint8)
+            for char in search_term:
+                if char in self.alphabet:
+                    query[self.alphabet[char]] = min(255, query[self.alphabet[char]] + 1)
+            matches = np.minimum(self.char_counts[lo:hi], query).sum(axis=1, dtype=np.int32)
+            bound = 2.0 * matches / (n + self.keyword_lengths[lo:hi])
+            # A small margin keeps float rounding from dropping a borderline keyword; rescoring is exact.
+            keep = np.nonzero((bound > FUZZY_THRESHOLD - 1e-9) & (bound * FUZZY_WEIGHT >= min_score - 1e-9))[0]
+            candidates.update(self.keywords[lo + kid] for kid in keep)
+        return candidates
+
     def search(self, search_term, min_score=0.5, max_results=20):  # Increased min_score
-        """Search for icons matching the search term"""
+        """Search for icons matching the search term.
+
+        Only index keywords that can reach min_score are scored, so results
+        match scoring every icon with _calculate_similarity (search_linear).
+        With min_score <= 0 every icon qualifies, including ones no keyword
+        reaches, so that case is answered by search_linear.
+        """
+        if min_score <= 0:
+            return self.search_linear(search_term, min_score, max_results)
+        if self.keyword_icons is None:
+            self._build_index()
+        search_term = search_term.lower()
+        query = _FuzzyQuery(search_term)
+        best = {}
+        for keyword in self._candidate_keywords(search_term, min_score):
+            score = self._keyword_score(search_term, keyword, query, floor=min_score)
+            if score < min_score:
+                continue
+            for idx in self.keyword_icons[keyword]:
+                if score > best.get(idx, 0):
+                    best[idx] = score
+
+        # Highest score first; ties keep library order, like a stable sort over all icons.
+        top = heapq.nsmallest(max_results, best.items(), key=lambda item: (-item[1], item[0]))
+        return [(score, self.icons[idx]) for idx, score in top]
+
+    def search_linear(self, search_term, min_score=0.5, max_results=20):
+        """Score every icon; the reference the indexed search is checked against"""
         results = []
-        
         for icon in self.icons:
             score = self._calculate_similarity(search_term, icon)
             if score >= min_score:
                 results.append((score, icon))
-        
-        # Sort by score (descending) and limit results
         results.sort(key=lambda x: x[0], reverse=True)
         return results[:max_results]
     
     def get_icon_variants(self, icon_name):
         """Get all color variants of a specific icon"""
-        variants = []
-        for icon in self.icons:
-            if icon['name'] == icon_name:
-                variants.append(icon)
-        return variants
+        if self.catalog is None:
+            return []
+        return [self._icon_record(row) for row in self.catalog.variants(name=icon_name)]
     
+    def get_icon_files(self, icon_id):
+        """Get every file (color and format variant) of one icon ID"""
+        if self._icons is not None:
+            return list(self._files_by_id.get(icon_id, []))
+        if self.catalog is None:
+            return []
+        return [self._icon_record(row) for row in self.catalog.variants(icon_id=icon_id)]
+
     def display_results(self, results, search_term):
         """Display search results in a formatted way"""
         if not results:
@@ -131,17 +274,10 @@ class IconSearcher:
                 print("💡 Try using more general terms from available categories:")
                 
                 # Show top categories
-                categories = defaultdict(int)
-                for icon in self.icons:
-                    for keyword in icon['keywords']:
-                        if len(keyword) > 3:
-                            categories[keyword] += 1
-                
-                top_categories = sorted(categories.items(), key=lambda x: x[1], reverse=True)[:10]
-                for i, (category, count) in enumerate(top_categories, 1):
+                for i, (category, count) in enumerate(self.top_categories(10), 1):
                     print(f"   {i:2d}. '{category}' ({count} icons)")
             
-            print(f"\n🔍 Use 'python3 icon_search.py --categories' to see all {len(set(icon['name'] for icon in self.icons))} available icons")
+            print(f"\n🔍 Use 'python3 icon_search.py --categories' to see all {self.catalog.name_count()} available icons")
             return
         
         print(f"\n🔍 Found {len(results)} relevant icons matching '{search_term}':")
@@ -170,20 +306,10 @@ class IconSearcher:
     
     def suggest_categories(self):
         """Suggest icon categories based on available icons"""
-        categories = defaultdict(list)
-        
-        for icon in self.icons:
-            for keyword in icon['keywords']:
-                if len(keyword) > 3:  # Ignore very short keywords
-                    categories[keyword].append(icon['name'])
-        
-        # Sort by frequency
-        sorted_categories = sorted(categories.items(), key=lambda x: len(x[1]), reverse=True)
-        
         print("\n📂 Available icon categories (top 20):")
         print("-" * 50)
-        for i, (category, icons) in enumerate(sorted_categories[:20], 1):
-            print(f"{i:2d}. {category.title()} ({len(set(icons))} unique icons)")
+        for i, (category, count) in enumerate(self.top_categories(20), 1):
+            print(f"{i:2d}. {category.title()} ({count} unique icons)")
 
 def main():
     # Path to the icon library
@@ -191,17 +317,26 @@ def main():
     
     if len(sys.argv) < 2:
         print("Smart Icon Search Tool")
-        print("Usage: python icon_search.py <search_term>")
+        print("Usage: python icon_search.py <search_term> [--semantic]")
         print("\nExamples:")
         print("  python icon_search.py security")
         print("  python icon_search.py network")
         print("  python icon_search.py data")
+        print("  PYTHONPATH=.. python icon_search.py blockchain --semantic")
         print("  python icon_search.py --categories")
         sys.exit(1)
     
-    searcher = IconSearcher(library_path)
+    semantic = "--semantic" in sys.argv[2:]
+    if semantic:
+        # Name embeddings plus the lexical score; see icon_embeddings.py
+        from sentence_transformers import SentenceTransformer
+        from icon_embeddings import SENTENCE_MODEL_NAME, load_hybrid_search
+        hybrid = load_hybrid_search(library_path, SentenceTransformer(SENTENCE_MODEL_NAME))
+        searcher = hybrid.searcher if hybrid is not None else IconSearcher(library_path)
+    else:
+        searcher = IconSearcher(library_path)
     
-    if not searcher.icons:
+    if not searcher.icon_count():
         print(f"No icons found in '{library_path}'. Please check the path.")
         sys.exit(1)
     
@@ -210,10 +345,10 @@ def main():
     if search_term == "--categories":
         searcher.suggest_categories()
     else:
-        results = searcher.search(search_term)
+        results = hybrid.search(search_term) if semantic else searcher.search(search_term)
         searcher.display_results(results, search_term)
         
-        print(f"\n💡 Total icons in library: {len(searcher.icons)}")
+        print(f"\n💡 Total icons in library: {searcher.icon_count()}")
         print("💡 Use --categories to see all available categories")
 
 if __name__ == "__main__":
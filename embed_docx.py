@@ -1,29 +1,284 @@
-import sys
+#!/usr/bin/env python3
+"""
+Incremental guideline embedding builder.
+
+Chunks every input document, hashes each chunk and embeds only chunks that
+are not already in the store. All documents share one store:
+  <prefix>_embeddings.npz  embeddings plus the hash of each chunk
+  <prefix>_chunks.json     chunk texts, row-aligned with the embeddings
+  <prefix>_manifest.json   per-document signatures and per-chunk source,
+                           section and character offsets
+
+Usage: python embed_docx.py <output_prefix> <input.docx> [<input.docx> ...]
+                            [--batch-size N] [--workers N] [--prune]
+       python embed_docx.py <input.docx> <output_prefix>
+"""
+
+import argparse
+import hashlib
 import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 from docx import Document
-from sentence_transformers import SentenceTransformer
+from docx.oxml.ns import qn
+from docx.table import Table
+from docx.text.paragraph import Paragraph
+
+
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_WORKERS = 1
+DEFAULT_CHUNK_TOKENS = 200
+DEFAULT_OVERLAP_TOKENS = 40
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+# Bump when chunking changes so stored documents are re-chunked.
+CHUNKER_VERSION = 2
+
 
 def extract_docx_text(docx_path):
     doc = Document(docx_path)
     return "\n".join([para.text for para in doc.paragraphs])
 
 def chunk_text(text, chunk_size=500):
+    """Fixed word windows; the baseline benchmarks/eval_chunker.py compares against"""
     words = text.split()
     return [' '.join(words[i:i+chunk_size]) for i in range(0, len(words), chunk_size)]
 
-def main(docx_path, out_prefix):
-    model = SentenceTransformer('all-MiniLM-L6-v2')
-    text = extract_docx_text(docx_path)
-    chunks = chunk_text(text)
-    embeddings = model.encode(chunks)
-    np.savez_compressed(f"{out_prefix}_embeddings.npz", embeddings=embeddings)
-    with open(f"{out_prefix}_chunks.json", "w") as f:
-        json.dump(chunks, f)
-    print(f"Saved {len(chunks)} chunks and embeddings to {out_prefix}_embeddings.npz and {out_prefix}_chunks.json")
+def count_tokens(text):
+    return len(TOKEN_PATTERN.findall(text))
+
+def heading_level(paragraph):
+    style = paragraph.style.name if paragraph.style is not None else ""
+    if style == "Title":
+        return 0
+    match = re.match(r"Heading (\d+)", style)
+    return int(match.group(1)) if match else None
+
+def iter_docx_blocks(docx_path):
+    """Yield (heading_level, text) for each paragraph and table row in body order.
+
+    heading_level is None for body text. Table rows come out as one block
+    with their cells joined by " | ".
+    """
+    doc = Document(docx_path)
+    for child in doc.element.body.iterchildren():
+        if child.tag == qn("w:p"):
+            paragraph = Paragraph(child, doc)
+            text = paragraph.text.strip()
+            if text:
+                yield heading_level(paragraph), text
+        elif child.tag == qn("w:tbl"):
+            for row in Table(child, doc).rows:
+                cells = []
+                for cell in row.cells:
+                    cell_text = " ".join(cell.text.split())
+                    # Merged cells repeat; keep one copy.
+                    if cell_text and (not cells or cells[-1] != cell_text):
+                        cells.append(cell_text)
+                if cells:
+                    yield None, " | ".join(cells)
+
+def chunk_blocks(blocks, max_tokens=DEFAULT_CHUNK_TOKENS, overlap_tokens=DEFAULT_OVERLAP_TOKENS):
+    """Turn (heading_level, text) blocks into section-scoped chunk records.
+
+    Chunks never cross a heading, hold about max_tokens tokens of body text,
+    repeat the last overlap_tokens tokens of the previous chunk in the same
+    section, and start with the heading breadcrumb. Blocks are consumed one
+    at a time, so the document is never joined into one string.
+    """
+    breadcrumb = []
+    words = []
+    tokens = 0
+    fresh = 0
+    offset = 0
+
+    def record():
+        section = " > ".join(text for _, text in breadcrumb)
+        # Paragraphs and table rows stay on their own lines.
+        body = "".join(
+            ("\n" if first and i else " " if i else "") + word
+            for i, (word, _, _, first) in enumerate(words)
+        )
+        return {
+            "text": f"{section}\n{body}" if section else body,
+            "section": section,
+            "start": words[0][2],
+            "end": words[-1][2] + len(words[-1][0]),
+        }
+
+    for level, text in blocks:
+        if level is not None:
+            if fresh:
+                yield record()
+            words, tokens, fresh = [], 0, 0
+            breadcrumb = [(l, t) for l, t in breadcrumb if l < level] + [(level, text)]
+        else:
+            for n, match in enumerate(re.finditer(r"\S+", text)):
+                word_tokens = count_tokens(match.group())
+                words.append((match.group(), word_tokens, offset + match.start(), n == 0))
+                tokens += word_tokens
+                fresh += 1
+                if tokens >= max_tokens:
+                    yield record()
+                    # Carry the tail over as the next chunk's overlap.
+                    kept = []
+                    tokens = 0
+                    while words and tokens + words[-1][1] <= overlap_tokens:
+                        tokens += words[-1][1]
+                        kept.append(words.pop())
+                    words = kept[::-1]
+                    fresh = 0
+        offset += len(text) + 1
+    if fresh:
+        yield record()
+
+def load_docx_chunks(docx_path, max_tokens=DEFAULT_CHUNK_TOKENS, overlap_tokens=DEFAULT_OVERLAP_TOKENS):
+    """Chunk records for one document: text, section breadcrumb and character offsets"""
+    return list(chunk_blocks(iter_docx_blocks(docx_path), max_tokens, overlap_tokens))
+
+# Loaders by file extension; each returns chunk records for one document.
+LOADERS = {
+    ".docx": load_docx_chunks,
+}
+
+def chunk_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def document_signature(path):
+    stat = os.stat(path)
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+def load_manifest(prefix):
+    manifest_path = f"{prefix}_manifest.json"
+    if not (os.path.exists(manifest_path) and os.path.exists(f"{prefix}_embeddings.npz")):
+        return {"documents": {}, "chunks": []}
+    with open(manifest_path) as f:
+        return json.load(f)
+
+def load_embeddings(prefix, manifest):
+    """Attach stored chunk texts to the manifest records and map chunk hash -> embedding"""
+    if not manifest["chunks"]:
+        return {}
+    data = np.load(f"{prefix}_embeddings.npz")
+    with open(f"{prefix}_chunks.json") as f:
+        for record, text in zip(manifest["chunks"], json.load(f)):
+            record["text"] = text
+    return {h: e for h, e in zip(data["hashes"].tolist(), data["embeddings"])}
+
+def save_store(prefix, manifest, chunk_records, embeddings_by_hash):
+    hashes = [record["hash"] for record in chunk_records]
+    if hashes:
+        embeddings = np.stack([embeddings_by_hash[h] for h in hashes]).astype(np.float32)
+    else:
+        embeddings = np.zeros((0, 0), dtype=np.float32)
+    np.savez_compressed(f"{prefix}_embeddings.npz", embeddings=embeddings, hashes=np.array(hashes))
+    with open(f"{prefix}_chunks.json", "w") as f:
+        json.dump([record["text"] for record in chunk_records], f)
+    manifest["chunks"] = [{k: v for k, v in record.items() if k != "text"} for record in chunk_records]
+    with open(f"{prefix}_manifest.json", "w") as f:
+        json.dump(manifest, f, indent=1)
+
+def encode_chunks(texts, batch_size, workers):
+    import resources
+    model = resources.get_sentence_model()
+    if workers > 1:
+        pool = model.start_multi_process_pool(["cpu"] * workers)
+        try:
+            return model.encode_multi_process(texts, pool, batch_size=batch_size)
+        finally:
+            model.stop_multi_process_pool(pool)
+    return model.encode(texts, batch_size=batch_size)
+
+def build(prefix, paths, batch_size=DEFAULT_BATCH_SIZE, workers=DEFAULT_WORKERS, prune=False):
+    start_time = time.perf_counter()
+    manifest = load_manifest(prefix)
+    documents = manifest["documents"]
+
+    paths = [os.path.abspath(p) for p in paths]
+    removed = [p for p in documents if prune and p not in paths]
+    if manifest.get("chunker_version") != CHUNKER_VERSION:
+        # Every stored document is re-chunked from its source, not only the ones listed.
+        stored = [p for p in documents if p not in paths and p not in removed]
+        missing = [p for p in stored if not os.path.exists(p)]
+        if missing:
+            raise ValueError(
+                f"Chunking changed and stored documents must be re-chunked, but these are gone: "
+                f"{', '.join(missing)}. Restore them, or pass --prune to drop them from the store."
+            )
+        changed = paths + stored
+        manifest["chunker_version"] = CHUNKER_VERSION
+    else:
+        changed = [p for p in paths if documents.get(p, {}).get("signature") != document_signature(p)]
+    if not changed and not removed:
+        print(f"{prefix}: {len(manifest['chunks'])} chunks up to date "
+              f"({time.perf_counter() - start_time:.2f}s)")
+        return 0
+
+    # Only now is the stored data worth loading.
+    embeddings_by_hash = load_embeddings(prefix, manifest)
+    old_records = {}
+    for record in manifest["chunks"]:
+        old_records.setdefault(record["source"], []).append(record)
+
+    def parse(path):
+        ext = os.path.splitext(path)[1].lower()
+        if ext not in LOADERS:
+            raise ValueError(f"Unsupported document type: {path}")
+        return path, LOADERS[ext](path)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        parsed = dict(executor.map(parse, changed))
+
+    for path in removed:
+        documents.pop(path, None)
+    chunk_records = []
+    for path in documents.keys() | set(paths):
+        if path in removed:
+            continue
+        if path in parsed:
+            records = []
+            for record in parsed[path]:
+                record = dict(record, source=path, hash=chunk_hash(record["text"]))
+                records.append(record)
+            documents[path] = {"signature": document_signature(path)}
+        else:
+            records = old_records.get(path, [])
+        chunk_records.extend(records)
+    chunk_records.sort(key=lambda r: (r["source"], r["start"]))
+
+    new_texts = {}
+    for record in chunk_records:
+        if record["hash"] not in embeddings_by_hash:
+            new_texts[record["hash"]] = record["text"]
+    if new_texts:
+        embeddings = encode_chunks(list(new_texts.values()), batch_size, workers)
+        embeddings_by_hash.update(zip(new_texts.keys(), embeddings))
+
+    save_store(prefix, manifest, chunk_records, embeddings_by_hash)
+    print(f"{prefix}: {len(chunk_records)} chunks from {len(documents)} documents, "
+          f"{len(new_texts)} embedded, {len(chunk_records) - len(new_texts)} reused "
+          f"({time.perf_counter() - start_time:.2f}s)")
+    return len(new_texts)
+
+def main(argv):
+    # Keep the original "<input.docx> <output_prefix>" form working.
+    if len(argv) == 2 and os.path.splitext(argv[0])[1].lower() in LOADERS:
+        argv = [argv[1], argv[0]]
+    parser = argparse.ArgumentParser(description="Incrementally embed guideline documents")
+    parser.add_argument("prefix", help="output prefix, e.g. mydoc")
+    parser.add_argument("documents", nargs="+", help="documents to index")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--prune", action="store_true", help="drop documents not listed")
+    args = parser.parse_args(argv)
+    build(args.prefix, args.documents, args.batch_size, args.workers, args.prune)
 
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Usage: python embed_docx.py <input.docx> <output_prefix>")
+    if len(sys.argv) < 3:
+        print("Usage: python embed_docx.py <output_prefix> <input.docx> [<input.docx> ...] [--batch-size N] [--workers N] [--prune]")
         sys.exit(1)
-    main(sys.argv[1], sys.argv[2])
\ No newline at end of file
+    main(sys.argv[1:])
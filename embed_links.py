@@ -0,0 +1,16 @@
+import sys
+import resources
+
+def main(csv_path, out_path):
+    model = resources.get_sentence_model()
+    embeddings = resources.build_link_embeddings(csv_path, model, out_path)
+    print(f"Saved {len(embeddings)} link embeddings to {out_path}")
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (1, 3):
+        print("Usage: python embed_links.py [<links.csv> <output.npz>]")
+        sys.exit(1)
+    if len(sys.argv) == 3:
+        main(sys.argv[1], sys.argv[2])
+    else:
+        main("links.csv", resources.LINK_EMBEDDINGS_PATH)
@@ -0,0 +1,57 @@
+import json
+import re
+import threading
+import time
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGeminiModel:
+    """Offline stand-in for genai.GenerativeModel with artificial latency"""
+
+    def __init__(self, latency=0.2, model_name="fake-gemini", fail_every=0, max_batch=None):
+        self.latency = latency
+        self.model_name = model_name
+        self.fail_every = fail_every
+        # Batches larger than max_batch get an unparseable reply.
+        self.max_batch = max_batch
+        self.calls = 0
+        self.max_concurrent = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def _verdict(self, element_text):
+        # Flag anything that mentions a font outside the usual brand fonts so
+        # results vary in a deterministic way.
+        fonts = re.findall(r"'font_name': '([^']+)'", element_text)
+        bad = [f for f in fonts if f not in ("72 Brand", "Arial", "Trebuchet MS")]
+        if bad:
+            return f"NON-COMPLIANT: font '{bad[0]}' is not a brand font"
+        return "COMPLIANT"
+
+    def _answer(self, prompt):
+        elements = re.findall(r"^\s*(E\d+): (.*)$", prompt, re.MULTILINE)
+        if not elements:
+            return self._verdict(prompt)
+        if self.max_batch and len(elements) > self.max_batch:
+            return "Sorry, here are the verdicts: E1 looks fine"
+        return json.dumps({element_id: self._verdict(text) for element_id, text in elements})
+
+    def generate_content(self, prompt, **kwargs):
+        with self._lock:
+            self.calls += 1
+            call_number = self.calls
+            self._in_flight += 1
+            self.max_concurrent = max(self.max_concurrent, self._in_flight)
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            if self.fail_every and call_number % self.fail_every == 0:
+                raise RuntimeError("fake model transient error")
+            return FakeResponse(self._answer(prompt))
+        finally:
+            with self._lock:
+                self._in_flight -= 1
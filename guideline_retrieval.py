@@ -0,0 +1,65 @@
+import numpy as np
+
+from compliance_engine import estimate_tokens
+
+
+DEFAULT_TOP_K = 3
+DEFAULT_TOKEN_BUDGET = 800
+
+
+def element_query(element_info):
+    """Describe an element's text and styling so it matches the right guideline sections"""
+    if not isinstance(element_info, dict):
+        return str(element_info)
+
+    parts = [element_info.get("text") or ""]
+    runs = element_info.get("font_details", [])
+    fonts = sorted({r["font_name"] for r in runs if r.get("font_name")})
+    sizes = sorted({r["font_size"] for r in runs if r.get("font_size")})
+    if fonts:
+        parts.append("Fonts: " + ", ".join(fonts))
+    if sizes:
+        parts.append("Font size: " + ", ".join(f"{s}pt" for s in sizes))
+    if any(r.get("italic") for r in runs):
+        parts.append("Emphasis: italic text")
+    text_case = element_info.get("text_case", {})
+    if text_case.get("is_uppercase"):
+        parts.append("Capitalization: all caps")
+    elif text_case.get("is_title_case"):
+        parts.append("Capitalization: title case")
+    return "\n".join(parts)
+
+
+class GuidelineRetriever:
+    """Pick the guideline chunks relevant to a set of elements within a token budget"""
+
+    def __init__(self, sentence_model, chunks, chunk_embeddings,
+                 top_k=DEFAULT_TOP_K, token_budget=DEFAULT_TOKEN_BUDGET):
+        self.sentence_model = sentence_model
+        self.chunks = chunks
+        self.chunk_embeddings = np.asarray(chunk_embeddings, dtype=np.float32)
+        self.top_k = top_k
+        self.token_budget = token_budget
+        self.signature = f"retrieval:{top_k}:{token_budget}"
+
+    def encode(self, element_infos):
+        return self.sentence_model.encode([element_query(info) for info in element_infos])
+
+    def guidelines_for(self, query_embeddings):
+        """Join the best chunks for these elements, stopping at the token budget"""
+        scores = np.dot(np.atleast_2d(query_embeddings), self.chunk_embeddings.T).max(axis=0)
+        k = min(self.top_k * len(np.atleast_2d(query_embeddings)), len(self.chunks))
+        selected = []
+        used = 0
+        for idx in scores.argsort()[::-1][:k]:
+            chunk = self.chunks[idx]
+            tokens = estimate_tokens(chunk)
+            if used + tokens > self.token_budget:
+                if selected:
+                    break
+                # A single oversized chunk is trimmed rather than dropped.
+                chunk = chunk[:self.token_budget * 4]
+                tokens = self.token_budget
+            selected.append(chunk)
+            used += tokens
+        return "\n\n".join(selected)
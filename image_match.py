@@ -0,0 +1,326 @@
+"""
+Match pictures in a deck against the official icon library.
+
+Every image is reduced to a shape mask (its alpha channel, or its
+difference from the border colour when it is opaque), cropped to the
+content, squared and described by:
+  phash, dhash  64-bit perceptual hashes of the mask (colour-blind)
+  shape         16x16 mask thumbnail, zero-mean and unit length
+  color         median RGB of the solid pixels
+
+The hashes pick candidate icons by Hamming distance; the shape thumbnail
+confirms the match. A picture matching an official icon either is that
+icon or is the icon recoloured off-brand. Icon-sized pictures that match
+nothing are unknown icons or clip art.
+
+Library features are computed once per PNG and stored next to the library
+as a NumPy structured array (<library>.features.npy) with a JSON sidecar
+listing the files. The array is memory-mapped, so loading the index costs
+nothing for large libraries.
+
+Usage: python image_match.py <library_path> [deck.pptx ...]
+"""
+
+import io
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+from pptx import Presentation
+from pptx.shapes.picture import Picture
+
+from pptx_extract import iter_text_bodies
+
+
+FEATURE_VERSION = 1
+SHAPE_SIZE = 16
+FEATURE_DTYPE = np.dtype([
+    ("phash", "<u8"), ("dhash", "<u8"), ("shape", "<f2", (SHAPE_SIZE * SHAPE_SIZE,)), ("color", "<f4", (3,)),
+])
+HASH_SIZE = 32
+DECODE_SIZE = 256
+# Candidates are the icons within this mean Hamming distance of the two hashes (out of 64)...
+CANDIDATE_DISTANCE = 20
+MAX_CANDIDATES = 64
+# ...and a candidate matches when the shape thumbnails correlate at least this well.
+# Rescaled and recompressed copies of library icons score ~0.91-1.0; the most similar
+# pair of distinct library icons (a padlock with a cross vs a tick) scores 0.92, so
+# anything above this is a near-duplicate of an official icon.
+MATCH_SIMILARITY = 0.9
+# Unknown pictures get the closest icon as a suggestion above this.
+SUGGEST_SIMILARITY = 0.75
+# Largest per-channel RGB distance (0-1) to an official colour variant.
+COLOR_TOLERANCE = 0.2
+# Unmatched pictures no larger than this on the slide are treated as icons.
+ICON_MAX_EXTENT = 914400 * 2  # 2 inches in EMU
+
+_DCT = np.cos(np.pi * (2 * np.arange(HASH_SIZE)[None, :] + 1) * np.arange(HASH_SIZE)[:, None] / (2 * HASH_SIZE))
+_BITS = np.uint64(1) << np.arange(64, dtype=np.uint64)
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def features_path_for(library_path):
+    return os.path.normpath(library_path) + ".features.npy"
+
+
+def icon_name(filename):
+    """Icon name of an ID_name_color.png file, without repeated IDs"""
+    parts = filename.rsplit(".", 1)[0].split("_")
+    name_parts = parts[1:-1]
+    while len(name_parts) > 1 and name_parts[0] == parts[0]:
+        name_parts = name_parts[1:]
+    return "_".join(name_parts) or parts[0]
+
+
+def hamming(hashes, value):
+    """Bit differences between each uint64 in hashes and value"""
+    diff = np.bitwise_xor(np.asarray(hashes, dtype=np.uint64), np.uint64(value))
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(diff).astype(np.int32)
+    return _POPCOUNT[diff[..., None].view(np.uint8)].sum(axis=-1, dtype=np.int32)
+
+
+def _pack(bits):
+    return int((bits.ravel().astype(np.uint64) * _BITS[:bits.size]).sum())
+
+
+def shape_masks(rgba):
+    """Candidate 0-1 masks: the alpha channel, or for opaque images the difference from the
+    border colour and its inverse (icons that touch the border take the border colour)"""
+    alpha = rgba[..., 3]
+    if alpha.min() < 0.98:
+        return [alpha]
+    border = np.concatenate([rgba[0], rgba[-1], rgba[:, 0], rgba[:, -1]])[:, :3]
+    background = np.median(border, axis=0)
+    mask = np.clip(np.abs(rgba[..., :3] - background).max(axis=2) * 4, 0, 1)
+    return [mask, 1 - mask]
+
+
+def mask_features(rgba, mask):
+    """FEATURE_DTYPE record for one mask of an image, or None when the mask is empty"""
+    rows, cols = np.nonzero(mask > 0.5)
+    if not len(rows):
+        return None
+    crop = mask[rows.min():rows.max() + 1, cols.min():cols.max() + 1]
+    # Square the crop so the features do not depend on padding or aspect.
+    side = max(crop.shape)
+    square = np.zeros((side, side), dtype=np.float32)
+    y, x = (side - crop.shape[0]) // 2, (side - crop.shape[1]) // 2
+    square[y:y + crop.shape[0], x:x + crop.shape[1]] = crop
+    square = Image.fromarray((square * 255).astype(np.uint8))
+
+    record = np.zeros((), dtype=FEATURE_DTYPE)
+    pixels = np.asarray(square.resize((HASH_SIZE, HASH_SIZE), Image.BOX), dtype=np.float32)
+    low = (_DCT @ pixels @ _DCT.T)[:8, :8].ravel()
+    record["phash"] = _pack(low > np.median(low[1:]))
+    gradient = np.asarray(square.resize((9, 8), Image.BOX), dtype=np.float32)
+    record["dhash"] = _pack(gradient[:, 1:] > gradient[:, :-1])
+    shape = np.asarray(square.resize((SHAPE_SIZE, SHAPE_SIZE), Image.BOX), dtype=np.float32).ravel()
+    shape -= shape.mean()
+    record["shape"] = shape / (np.linalg.norm(shape) or 1.0)
+    # Anti-aliased edges blend into the background; the colour comes from solid pixels.
+    solid = mask > 0.9
+    record["color"] = np.median(rgba[..., :3][solid if solid.any() else mask > 0.5], axis=0)
+    return record
+
+
+def image_features(data):
+    """Feature records of image bytes, one per candidate mask; empty when it cannot be decoded"""
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.draft("RGB", (DECODE_SIZE, DECODE_SIZE))
+        image.thumbnail((DECODE_SIZE, DECODE_SIZE), Image.BOX)
+        rgba = np.asarray(image.convert("RGBA"), dtype=np.float32) / 255
+    except Exception:
+        return []
+    records = [mask_features(rgba, mask) for mask in shape_masks(rgba)]
+    return [record for record in records if record is not None]
+
+
+def _read_meta(path):
+    meta_path = path + ".json"
+    if not (os.path.exists(path) and os.path.exists(meta_path)):
+        return None
+    with open(meta_path) as f:
+        meta = json.load(f)
+    return meta if meta.get("version") == FEATURE_VERSION else None
+
+
+def build_feature_index(library_path, path=None):
+    """Compute features for every PNG in the library, reusing the rows of files already indexed.
+
+    Returns the number of files whose features were computed.
+    """
+    path = path or features_path_for(library_path)
+    mtime_ns = os.stat(library_path).st_mtime_ns
+    meta = _read_meta(path)
+    previous = {}
+    if meta is not None:
+        rows = np.load(path)
+        previous = {filename: rows[i] for i, filename in enumerate(meta["files"])}
+
+    files, records, computed = [], [], 0
+    for filename in sorted(os.listdir(library_path)):
+        if not filename.lower().endswith(".png"):
+            continue
+        record = previous.get(filename)
+        if record is None:
+            with open(os.path.join(library_path, filename), "rb") as f:
+                # Library icons have alpha, so there is a single mask.
+                found = image_features(f.read())
+            computed += 1
+            record = found[0] if found else None
+        if record is not None:
+            files.append(filename)
+            records.append(record)
+    # Checks running in parallel may build the index at the same time; each writes
+    # the same content, so replacing the files whole keeps readers consistent.
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, np.array(records, dtype=FEATURE_DTYPE))
+    os.replace(tmp, path)
+    with open(tmp, "w") as f:
+        json.dump({"version": FEATURE_VERSION, "mtime_ns": mtime_ns, "files": files}, f)
+    os.replace(tmp, path + ".json")
+    return computed
+
+
+class IconFeatureIndex:
+    """Memory-mapped library features with the icon ID, name and colour of each row"""
+
+    def __init__(self, library_path, path=None):
+        self.library_path = library_path
+        self.path = path or features_path_for(library_path)
+        meta = _read_meta(self.path)
+        self.files = meta["files"] if meta else []
+        self.features = np.load(self.path, mmap_mode="r") if meta else np.zeros(0, dtype=FEATURE_DTYPE)
+        self.ids = [filename.split("_", 1)[0] for filename in self.files]
+        self.rows_by_id = {}
+        for row, icon_id in enumerate(self.ids):
+            self.rows_by_id.setdefault(icon_id, []).append(row)
+
+    def __len__(self):
+        return len(self.files)
+
+    def match(self, record):
+        """(row, shape similarity) of the closest icon among the hash candidates, or (None, 0.0)"""
+        if not len(self.files):
+            return None, 0.0
+        distance = (hamming(self.features["phash"], record["phash"])
+                    + hamming(self.features["dhash"], record["dhash"])) / 2
+        rows = np.nonzero(distance <= CANDIDATE_DISTANCE)[0]
+        if len(rows) > MAX_CANDIDATES:
+            rows = rows[np.argsort(distance[rows], kind="stable")[:MAX_CANDIDATES]]
+        if not len(rows):
+            return None, 0.0
+        similarity = self.features["shape"][rows].astype(np.float32) @ record["shape"].astype(np.float32)
+        best = int(np.argmax(similarity))
+        return int(rows[best]), float(similarity[best])
+
+    def closest_variant(self, row, record):
+        """(row, colour distance) of the colour variant of row's icon closest to record's colour"""
+        rows = self.rows_by_id[self.ids[row]]
+        distances = np.abs(self.features["color"][rows] - record["color"]).max(axis=1)
+        best = int(np.argmin(distances))
+        return rows[best], float(distances[best])
+
+    def variants(self, row):
+        return [self.files[i] for i in self.rows_by_id[self.ids[row]]]
+
+
+def load_feature_index(library_path, path=None):
+    """IconFeatureIndex for the library, updated first when files were added or removed since"""
+    path = path or features_path_for(library_path)
+    meta = _read_meta(path)
+    if meta is None or meta["mtime_ns"] != os.stat(library_path).st_mtime_ns:
+        build_feature_index(library_path, path)
+    return IconFeatureIndex(library_path, path)
+
+
+def iter_pictures(slide):
+    """(element_id, picture shape) for a slide's pictures, including those inside groups.
+
+    The shape walker is the one text elements come from, so IDs line up:
+    "3", or "3.2" for a group member.
+    """
+    for shape_idx, shape in enumerate(slide.shapes, 1):
+        for element_id, kind, pic, _ in iter_text_bodies(shape._element, shape_idx, pictures=True):
+            if kind == "picture":
+                yield element_id, Picture(pic, slide.shapes)
+
+
+def classify(index, records):
+    """("official" | "wrong_color" | "unknown", library row or None, similarity) for an image"""
+    best_row, best_similarity, best_record = None, 0.0, None
+    for record in records:
+        row, similarity = index.match(record)
+        if row is not None and similarity > best_similarity:
+            best_row, best_similarity, best_record = row, similarity, record
+    if best_row is None or best_similarity < MATCH_SIMILARITY:
+        return "unknown", best_row, best_similarity
+    variant, color_distance = index.closest_variant(best_row, best_record)
+    if color_distance > COLOR_TOLERANCE:
+        return "wrong_color", variant, best_similarity
+    return "official", variant, best_similarity
+
+
+def check_pictures(prs, index, icon_max_extent=ICON_MAX_EXTENT):
+    """Compare every picture in a presentation with the icon library.
+
+    Returns ([(slide_idx, element_id, message)], stats). Each distinct image
+    (by SHA1) is decoded and matched once.
+    """
+    findings = []
+    stats = {"pictures": 0, "images": 0, "official": 0, "wrong_color": 0, "unknown": 0, "not_icons": 0}
+    verdicts = {}
+    for slide_idx, slide in enumerate(prs.slides, 1):
+        for element_id, picture in iter_pictures(slide):
+            try:
+                image = picture.image
+            except (KeyError, ValueError, AttributeError):
+                # Linked or missing image data
+                continue
+            stats["pictures"] += 1
+            if image.sha1 not in verdicts:
+                verdicts[image.sha1] = classify(index, image_features(image.blob))
+                stats["images"] += 1
+            kind, row, similarity = verdicts[image.sha1]
+            if kind == "unknown" and max(picture.width or 0, picture.height or 0) > icon_max_extent:
+                stats["not_icons"] += 1
+                continue
+            stats[kind] += 1
+            if kind == "wrong_color":
+                message = (f"Icon '{icon_name(index.files[row])}' is not in an official colour; "
+                           f"use {' or '.join(index.variants(row))}")
+            elif kind == "unknown":
+                message = "Icon is not from the official icon library"
+                if row is not None and similarity >= SUGGEST_SIMILARITY:
+                    message += f"; closest official icon: {index.files[row]}"
+            else:
+                continue
+            findings.append((slide_idx, element_id, message))
+    return findings, stats
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python image_match.py <library_path> [deck.pptx ...]")
+        sys.exit(1)
+    library_path = sys.argv[1]
+    start = time.perf_counter()
+    computed = build_feature_index(library_path)
+    index = IconFeatureIndex(library_path)
+    print(f"{index.path}: {len(index)} icons ({computed} computed) in {time.perf_counter() - start:.1f}s")
+    for deck in sys.argv[2:]:
+        start = time.perf_counter()
+        findings, stats = check_pictures(Presentation(deck), index)
+        print(f"{deck}: {stats} in {time.perf_counter() - start:.2f}s")
+        for slide_idx, element_id, message in findings:
+            print(f"  Slide {slide_idx}, Element {element_id}: {message}")
+
+
+if __name__ == "__main__":
+    main()
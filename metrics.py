@@ -0,0 +1,173 @@
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import deque
+
+
+DEFAULT_METRICS_PATH = "brandy_metrics.jsonl"
+MAX_EVENTS_IN_MEMORY = 50000
+# USD per million tokens for gemini-1.5-flash prompts up to 128k tokens; used for estimates only.
+INPUT_PRICE_PER_MILLION = 0.075
+OUTPUT_PRICE_PER_MILLION = 0.30
+
+# Tags such as deck, slide and element attached to every event recorded in this context.
+_tags = contextvars.ContextVar("metrics_tags", default={})
+
+
+@contextlib.contextmanager
+def tagged(**tags):
+    token = _tags.set({**_tags.get(), **tags})
+    try:
+        yield
+    finally:
+        _tags.reset(token)
+
+
+def current_tags():
+    return dict(_tags.get())
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of values (q in 0..100)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+def estimate_cost(prompt_tokens, response_tokens):
+    return (prompt_tokens * INPUT_PRICE_PER_MILLION + response_tokens * OUTPUT_PRICE_PER_MILLION) / 1e6
+
+
+class MetricsRecorder:
+    """Keeps recent call events in memory and appends every event to a JSONL file"""
+
+    def __init__(self, path=None, max_events=MAX_EVENTS_IN_MEMORY):
+        self.path = path
+        self.events = deque(maxlen=max_events)
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8") if path else None
+
+    def record(self, kind, **fields):
+        event = {"kind": kind, "time": time.time(), **current_tags(), **fields}
+        with self._lock:
+            self.events.append(event)
+            if self._file is not None:
+                self._file.write(json.dumps(event, default=str) + "\n")
+                self._file.flush()
+        return event
+
+    def summary(self, kind="model_call", **match):
+        """Aggregate events of one kind whose tags equal match"""
+        with self._lock:
+            events = [e for e in self.events
+                      if e["kind"] == kind and all(e.get(k) == v for k, v in match.items())]
+        latencies = [e["latency"] for e in events]
+        prompt_tokens = sum(e.get("prompt_tokens", 0) for e in events)
+        response_tokens = sum(e.get("response_tokens", 0) for e in events)
+        return {
+            "calls": len(events),
+            "errors": sum(1 for e in events if e.get("error")),
+            "retries": sum(1 for e in events if e.get("attempt", 0) > 0),
+            "total_seconds": round(sum(latencies), 3),
+            "p50_seconds": percentile(latencies, 50),
+            "p95_seconds": percentile(latencies, 95),
+            "prompt_tokens": prompt_tokens,
+            "response_tokens": response_tokens,
+            "estimated_cost_usd": round(estimate_cost(prompt_tokens, response_tokens), 6),
+        }
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+_default_recorder = None
+_default_lock = threading.Lock()
+
+
+def default_recorder():
+    """Process-wide recorder writing to BRANDY_METRICS_PATH (or brandy_metrics.jsonl)"""
+    global _default_recorder
+    with _default_lock:
+        if _default_recorder is None:
+            _default_recorder = MetricsRecorder(os.environ.get("BRANDY_METRICS_PATH", DEFAULT_METRICS_PATH))
+        return _default_recorder
+
+
+def _count_tokens(text):
+    from compliance_engine import estimate_tokens
+    return estimate_tokens(text or "")
+
+
+class InstrumentedModel:
+    """Wraps a generate_content model and records latency, tokens and errors per call"""
+
+    def __init__(self, model, recorder=None):
+        self.model = model
+        self.recorder = recorder or default_recorder()
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    def generate_content(self, prompt, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = self.model.generate_content(prompt, *args, **kwargs)
+        except Exception as e:
+            self.recorder.record("model_call", latency=time.perf_counter() - start,
+                                 prompt_tokens=_count_tokens(str(prompt)), response_tokens=0,
+                                 error=f"{type(e).__name__}: {e}")
+            raise
+        latency = time.perf_counter() - start
+        # Gemini reports exact token counts; anything else is estimated.
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None and getattr(usage, "prompt_token_count", None) is not None:
+            prompt_tokens = usage.prompt_token_count
+            response_tokens = usage.candidates_token_count or 0
+        else:
+            prompt_tokens = _count_tokens(str(prompt))
+            response_tokens = _count_tokens(getattr(response, "text", ""))
+        self.recorder.record("model_call", latency=latency, prompt_tokens=prompt_tokens,
+                             response_tokens=response_tokens)
+        return response
+
+
+class InstrumentedEncoder:
+    """Wraps a sentence-transformer and records latency and input size per encode call"""
+
+    def __init__(self, model, recorder=None):
+        self.model = model
+        self.recorder = recorder or default_recorder()
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    def encode(self, sentences, *args, **kwargs):
+        texts = [sentences] if isinstance(sentences, str) else list(sentences)
+        start = time.perf_counter()
+        prompt_tokens = sum(_count_tokens(str(t)) for t in texts)
+        try:
+            embeddings = self.model.encode(sentences, *args, **kwargs)
+        except Exception as e:
+            self.recorder.record("embedding_call", latency=time.perf_counter() - start, texts=len(texts),
+                                 prompt_tokens=prompt_tokens, error=f"{type(e).__name__}: {e}")
+            raise
+        self.recorder.record("embedding_call", latency=time.perf_counter() - start, texts=len(texts),
+                             prompt_tokens=prompt_tokens)
+        return embeddings
+
+
+def instrument(model, recorder=None):
+    """Wrap a model once; already instrumented models and None pass through"""
+    if model is None or isinstance(model, (InstrumentedModel, InstrumentedEncoder)):
+        return model
+    if hasattr(model, "generate_content"):
+        return InstrumentedModel(model, recorder)
+    return InstrumentedEncoder(model, recorder)
@@ -0,0 +1,288 @@
+"""
+PDF compliance check: the text blocks of each page go through the same
+element checks as PPTX slides (rules, verdict cache, batched model calls).
+
+Every text block is one element. Its spans become the runs with font,
+size, italics and colour; the block's position is kept for annotating.
+Pages are extracted PAGE_CHUNK at a time by worker processes that each
+open the file themselves. Chunks are checked in page order while the next
+ones are being extracted, and only the issues are kept, so memory stays
+flat for long documents. The result is the PDF with a red box and comment
+on every failing block and an outline entry for each page with issues.
+"""
+
+import io
+import itertools
+import os
+import re
+import tempfile
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pymupdf
+
+import metrics
+from compliance_engine import ComplianceChecker
+from pptx_compliance import (COMPLIANCE_BATCH_SIZE, COMPLIANCE_BATCH_TOKEN_BUDGET, COMPLIANCE_MAX_IN_FLIGHT,
+                             COMPLIANCE_RETRIES, COMPLIANCE_TIMEOUT, VERDICT_CACHE_PATH, needs_check)
+from pptx_extract import element_record
+from rule_engine import BRAND_FONTS, RuleEngine
+from verdict_cache import VerdictCache
+
+PAGE_CHUNK = 8
+# Shorter documents are extracted in this process; starting workers costs more.
+PARALLEL_MIN_PAGES = 32
+DEFAULT_WORKERS = os.cpu_count() or 1
+# Chunks queued per worker: enough to keep them busy, few enough to keep memory flat.
+CHUNKS_AHEAD = 2
+# Text as laid out in the document; images are not decoded.
+TEXT_FLAGS = pymupdf.TEXTFLAGS_DICT & ~pymupdf.TEXT_PRESERVE_IMAGES
+ISSUE_COLOR = (1, 0, 0)
+
+# Embedded fonts are named like "ABCDEF+Arial-BoldMT".
+SUBSET_PREFIX = re.compile(r"^[A-Z]{6}\+")
+POSTSCRIPT_SUFFIXES = ("psmt", "mt", "ps")
+_BRAND_FONT_KEYS = {font.replace(" ", "").lower(): font for font in BRAND_FONTS}
+
+# Per-process state set up once by init_worker.
+_worker = {}
+
+
+def font_family(font_name):
+    """Brand font name of a PDF font ("ABCDEF+72Brand-Bold" -> "72 Brand"), else its base name"""
+    base = re.split(r"[-,]", SUBSET_PREFIX.sub("", font_name or ""), maxsplit=1)[0]
+    key = base.lower()
+    for suffix in POSTSCRIPT_SUFFIXES:
+        if key.endswith(suffix) and key[:-len(suffix)] in _BRAND_FONT_KEYS:
+            key = key[:-len(suffix)]
+            break
+    return _BRAND_FONT_KEYS.get(key, base)
+
+
+def page_elements(page, page_number):
+    """[(element_id, element_info, bbox)] for the text blocks of one page, top to bottom"""
+    elements = []
+    for block in page.get_text("dict", flags=TEXT_FLAGS)["blocks"]:
+        if block.get("type") != 0:
+            continue
+        lines, runs, colors = [], [], []
+        for line in block["lines"]:
+            parts = []
+            for span in line["spans"]:
+                text = span["text"]
+                parts.append(text)
+                if not text.strip():
+                    continue
+                italic = bool(span["flags"] & pymupdf.TEXT_FONT_ITALIC) or "italic" in span["font"].lower()
+                runs.append((font_family(span["font"]), round(span["size"], 1), italic, text))
+                colors.append(f"#{span['color']:06X}")
+            lines.append("".join(parts))
+        text = "\n".join(lines)
+        if not text.strip():
+            continue
+        element_id = str(len(elements) + 1)
+        element_info = element_record(page_number, element_id, text, runs)
+        for details, color in zip(element_info["font_details"], colors):
+            details["color"] = color
+        elements.append((element_id, element_info, tuple(round(v, 1) for v in block["bbox"])))
+    return elements
+
+
+def init_worker(path):
+    _worker["doc"] = pymupdf.open(path)
+
+
+def extract_pages(start, stop, doc=None):
+    """[(page_number, elements)] for the 0-based pages start..stop-1, loading one page at a time"""
+    doc = doc if doc is not None else _worker["doc"]
+    return [(n + 1, page_elements(doc[n], n + 1)) for n in range(start, stop)]
+
+
+def iter_page_chunks(doc, path=None, workers=DEFAULT_WORKERS):
+    """Yield extract_pages results in page order, PAGE_CHUNK pages at a time.
+
+    With a file path, more than one worker and a long enough document,
+    chunks are extracted ahead by a process pool.
+    """
+    chunks = ((start, min(start + PAGE_CHUNK, doc.page_count)) for start in range(0, doc.page_count, PAGE_CHUNK))
+    if path is None or workers <= 1 or doc.page_count < PARALLEL_MIN_PAGES:
+        for start, stop in chunks:
+            yield extract_pages(start, stop, doc)
+        return
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(path,))
+    try:
+        pending = deque(executor.submit(extract_pages, start, stop)
+                        for start, stop in itertools.islice(chunks, workers * CHUNKS_AHEAD))
+        while pending:
+            result = pending.popleft().result()
+            for start, stop in itertools.islice(chunks, 1):
+                pending.append(executor.submit(extract_pages, start, stop))
+            yield result
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def annotate(doc, failures):
+    """Box every failing block in red with its messages and add an outline entry per page with issues"""
+    for page_number, page_failures in itertools.groupby(failures, key=lambda f: f[0]):
+        page = doc[page_number - 1]
+        for _, element_id, bbox, message in page_failures:
+            annot = page.add_rect_annot(pymupdf.Rect(bbox))
+            annot.set_colors(stroke=ISSUE_COLOR)
+            annot.set_border(width=2)
+            # MuPDF regenerates the appearance when the document is saved; Annot.update()
+            # would do it once per annotation at a few milliseconds each.
+            annot.set_info(title="Brandy", content=f"Element {element_id}: {message}")
+    if failures:
+        counts = {}
+        for page_number, *_ in failures:
+            counts[page_number] = counts.get(page_number, 0) + 1
+        toc = [[1, f"Compliance issues ({len(failures)})", failures[0][0]]]
+        toc += [[2, f"Page {page_number}: {count} issue{'s' if count > 1 else ''}", page_number]
+                for page_number, count in counts.items()]
+        doc.set_toc(toc + doc.get_toc(simple=True))
+
+
+def iter_pdf_compliance_check(pdf_file, gemini_model=None, guidelines_text=None, retriever=None,
+                              verdict_cache_path=VERDICT_CACHE_PATH, deck_name=None, workers=DEFAULT_WORKERS):
+    """Check a PDF, yielding a "page" event as each page's checks finish.
+
+    The last event is {"type": "result", "issues", "output", "stats"} with
+    the annotated PDF bytes. Stopping iteration early drops the model calls
+    that have not started yet and the pages not extracted yet.
+    """
+    start_time = time.perf_counter()
+    recorder = metrics.default_recorder()
+    deck_name = deck_name or getattr(pdf_file, "name", None) or (pdf_file if isinstance(pdf_file, str) else "document")
+    run_id = uuid.uuid4().hex[:12]
+    gemini_model = metrics.instrument(gemini_model, recorder)
+    # Seconds per pipeline stage; "extract" is time spent waiting for pages,
+    # "checks" includes time the consumer spends between events.
+    stage_seconds = {"parse": 0.0, "extract": 0.0, "checks": 0.0, "annotate": 0.0, "save": 0.0}
+    mark = [start_time]
+
+    def lap(stage):
+        now = time.perf_counter()
+        stage_seconds[stage] += now - mark[0]
+        mark[0] = now
+
+    path = tmp_path = None
+    if isinstance(pdf_file, str):
+        path = pdf_file
+        doc = pymupdf.open(path)
+    else:
+        if hasattr(pdf_file, "seek"):
+            pdf_file.seek(0)
+        data = pdf_file.read()
+        doc = pymupdf.open(stream=data, filetype="pdf")
+        if workers > 1 and doc.page_count >= PARALLEL_MIN_PAGES:
+            # Workers open the document by path.
+            with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+                f.write(data)
+            path = tmp_path = f.name
+    total_pages = doc.page_count
+    lap("parse")
+
+    verdict_cache = VerdictCache(verdict_cache_path)
+    checker = ComplianceChecker(
+        gemini_model,
+        guidelines_text,
+        max_in_flight=COMPLIANCE_MAX_IN_FLIGHT,
+        timeout=COMPLIANCE_TIMEOUT,
+        retries=COMPLIANCE_RETRIES,
+        batch_size=COMPLIANCE_BATCH_SIZE,
+        batch_token_budget=COMPLIANCE_BATCH_TOKEN_BUDGET,
+        cache=verdict_cache,
+        rule_engine=RuleEngine(),
+        retriever=retriever,
+        tags={"deck": deck_name, "run": run_id}
+    )
+
+    failures = []
+    pages_done = elements_checked = 0
+    time_to_first_result = None
+
+    def page_event(page_number, page_issues):
+        return {
+            "type": "page",
+            "page": page_number,
+            "pages_done": pages_done,
+            "pages_total": total_pages,
+            "issues": page_issues,
+            "elapsed": time.perf_counter() - start_time,
+        }
+
+    try:
+        for chunk in iter_page_chunks(doc, path, workers):
+            lap("extract")
+            checks = [(page_number, element_id, element_info, bbox)
+                      for page_number, elements in chunk
+                      for element_id, element_info, bbox in elements
+                      if needs_check(element_info["text"])]
+            remaining = {page_number: 0 for page_number, _ in chunk}
+            for page_number, *_ in checks:
+                remaining[page_number] += 1
+            page_issues = {page_number: [] for page_number in remaining}
+            for page_number, count in remaining.items():
+                if count == 0:
+                    pages_done += 1
+                    yield page_event(page_number, [])
+            for n, (is_compliant, message) in checker.iter_checks([check[2] for check in checks]):
+                page_number, element_id, _, bbox = checks[n]
+                if not is_compliant:
+                    failures.append((page_number, element_id, bbox, message))
+                    page_issues[page_number].append({"page": page_number, "element": element_id, "message": message})
+                remaining[page_number] -= 1
+                if remaining[page_number] == 0:
+                    pages_done += 1
+                    if time_to_first_result is None:
+                        time_to_first_result = time.perf_counter() - start_time
+                    yield page_event(page_number, page_issues[page_number])
+            elements_checked += len(checks)
+            lap("checks")
+    finally:
+        verdict_cache.close()
+        if tmp_path:
+            os.remove(tmp_path)
+
+    failures.sort(key=lambda f: (f[0], int(f[1])))
+    issues = [f"Page {page_number}, Element {element_id}: {message}"
+              for page_number, element_id, _, message in failures]
+    annotate(doc, failures)
+    lap("annotate")
+
+    output = io.BytesIO()
+    doc.save(output, garbage=1, deflate=True)
+    doc.close()
+    output.seek(0)
+    lap("save")
+
+    stats = dict(checker.stats)
+    stats["pages"] = total_pages
+    stats["elements"] = elements_checked
+    stats["time_to_first_result"] = time_to_first_result
+    stats["stage_seconds"] = stage_seconds
+    stats["model_usage"] = recorder.summary("model_call", run=run_id)
+    stats["embedding_usage"] = recorder.summary("embedding_call", run=run_id)
+    recorder.record(
+        "deck", deck=deck_name, run=run_id, format="pdf", issues=len(issues),
+        seconds=time.perf_counter() - start_time, **stats
+    )
+    yield {"type": "result", "issues": issues, "output": output, "stats": stats}
+
+
+def pdf_compliance_check(pdf_file, gemini_model=None, guidelines_text=None, retriever=None,
+                         verdict_cache_path=VERDICT_CACHE_PATH, progress=None, deck_name=None,
+                         workers=DEFAULT_WORKERS):
+    """Check a PDF and return (issues, annotated PDF bytes, stats).
+
+    progress, if given, is called with each page event from iter_pdf_compliance_check.
+    """
+    for event in iter_pdf_compliance_check(pdf_file, gemini_model, guidelines_text, retriever,
+                                           verdict_cache_path, deck_name, workers):
+        if event["type"] == "result":
+            return event["issues"], event["output"], event["stats"]
+        if progress is not None:
+            progress(event)
@@ -0,0 +1,415 @@
+from pptx import Presentation
+from pptx.util import Pt, Inches
+from pptx.dml.color import RGBColor
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.text.text import Font
+from lxml import etree
+import io
+import os
+import time
+import uuid
+import metrics
+from compliance_engine import ComplianceChecker
+from verdict_cache import VerdictCache
+from run_manifest import RunManifest, run_context
+from rule_engine import RuleEngine
+from image_match import check_pictures, load_feature_index
+from pptx_writer import save_presentation
+from pptx_extract import (element_sort_key, extract_elements, iter_text_bodies, notes_body, slide_fingerprints,
+                          style_resolve, text_record)
+from style_resolver import NSMAP, StyleResolver
+
+FOOTER_FONT = "72 Brand"
+FOOTER_SIZE = 8
+
+COMPLIANCE_MAX_IN_FLIGHT = 8
+COMPLIANCE_TIMEOUT = 60
+COMPLIANCE_RETRIES = 3
+COMPLIANCE_BATCH_SIZE = 8
+COMPLIANCE_BATCH_TOKEN_BUDGET = 4000
+VERDICT_CACHE_PATH = "verdict_cache.sqlite3"
+RUN_MANIFEST_PATH = "run_manifest.sqlite3"
+# Pictures are matched against this icon library when it exists.
+ICON_LIBRARY_PATH = os.path.join("demo", "ImageLibrary_60_20250609_1733")
+# Text Implement Actions may restyle; SmartArt data is read-only here and
+# notes are replaced by the compliance comments.
+BRAND_FONT_KINDS = ("shape", "cell", "chart")
+
+def needs_check(text):
+    """Footer and copyright text is added by the checker itself and not judged"""
+    return "©" not in text and "Internal Use Only." not in text and "Public Use." not in text
+
+def add_red_border(shape):
+    try:
+        line = shape.line
+        line.color.rgb = RGBColor(255, 0, 0)
+        line.width = Pt(3)
+    except Exception:
+        pass
+
+def add_green_border(shape):
+    try:
+        line = shape.line
+        line.color.rgb = RGBColor(0, 255, 0) 
+        line.width = Pt(3)
+    except Exception:
+        pass
+
+def apply_brand_font(run_elements, font_details):
+    """Set the brand font on checked runs and raise sizes below 11pt; True if any size changed"""
+    resized = False
+    for r, details in zip(run_elements, font_details):
+        font = Font(r.get_or_add_rPr())
+        font.name = details["font_name"] = "72 Brand"
+        if details["font_size"] is not None and details["font_size"] < 11:
+            font.size = Pt(11)
+            details["font_size"] = 11.0
+            resized = True
+    return resized
+
+def add_footer_to_slide(slide, text, font_color=None):
+    left = Inches(0.2) 
+    width = Inches(8)  
+    height = Inches(0.4)
+    slide_height = slide.part.slide_layout.slide_height if hasattr(slide.part.slide_layout, 'slide_height') else Inches(7.5)
+    top = Inches(7.0) 
+    textbox = slide.shapes.add_textbox(left, top, width, height)
+    text_frame = textbox.text_frame
+    p = text_frame.paragraphs[0]
+    run = p.add_run()
+    run.text = text
+    run.font.name = FOOTER_FONT
+    run.font.size = Pt(FOOTER_SIZE)
+    if font_color:
+        run.font.color.rgb = font_color
+
+def add_footer_with_hidden_copyright(slide, visible_text):
+    left = Inches(0.2) 
+    width = Inches(8)  
+    height = Inches(0.4)
+    top = Inches(7.0) 
+    textbox = slide.shapes.add_textbox(left, top, width, height)
+    text_frame = textbox.text_frame
+    p = text_frame.paragraphs[0]
+    
+    visible_run = p.add_run()
+    visible_run.text = visible_text
+    visible_run.font.name = FOOTER_FONT
+    visible_run.font.size = Pt(FOOTER_SIZE)
+    
+    hidden_run = p.add_run()
+    hidden_run.text = " ©"
+    hidden_run.font.name = FOOTER_FONT
+    hidden_run.font.size = Pt(FOOTER_SIZE)
+    hidden_run.font.color.rgb = RGBColor(255, 255, 255)
+
+def add_summary_slide(prs, issues):
+    title_slide_layout = prs.slide_layouts[0]
+    slide = prs.slides.add_slide(title_slide_layout)
+    slide.shapes.title.text = "PPTX Compliance Issues"
+    body = "\n".join(issues) if issues else "No issues found."
+    if len(slide.shapes) > 1:
+        slide.shapes[1].text = body
+    else:
+        left = Inches(1)
+        top = Inches(2)
+        width = Inches(8)
+        height = Inches(5)
+        textbox = slide.shapes.add_textbox(left, top, width, height)
+        textbox.text = body
+    xml_slides = prs.slides._sldIdLst
+    slides = list(xml_slides)
+    xml_slides.insert(0, slides[-1])
+    xml_slides.remove(slides[-1])
+
+def iter_compliance_check(pptx_file, rules, add_copyright, copyright_type, implement_actions=False,
+                          gemini_model=None, guidelines_text=None, retriever=None,
+                          verdict_cache_path=VERDICT_CACHE_PATH, deck_name=None, manifest_path=RUN_MANIFEST_PATH,
+                          icon_library=ICON_LIBRARY_PATH):
+    """Check a deck, yielding a "slide" event as each slide's checks finish.
+
+    The last event is {"type": "result", "issues", "output", "stats"} with
+    the annotated PPTX bytes. Stopping iteration early drops the model
+    calls that have not started yet. Model calls are recorded by the
+    metrics recorder under deck_name and summarized in stats["model_usage"].
+    With manifest_path, slides unchanged since the most similar earlier run
+    take that run's verdicts (stats["carried_forward"]) instead of being checked.
+    With icon_library, pictures are matched against the library's icons and
+    off-brand colours or unknown icons are reported (stats["pictures"]).
+    """
+    start_time = time.perf_counter()
+    recorder = metrics.default_recorder()
+    deck_name = deck_name or getattr(pptx_file, "name", None) or (pptx_file if isinstance(pptx_file, str) else "deck")
+    run_id = uuid.uuid4().hex[:12]
+    gemini_model = metrics.instrument(gemini_model, recorder)
+    # Seconds per pipeline stage; "checks" includes time the consumer spends between events.
+    stage_seconds = {"parse": 0.0, "extract": 0.0, "checks": 0.0, "images": 0.0, "annotate": 0.0, "save": 0.0}
+    mark = [start_time]
+
+    def lap(stage):
+        now = time.perf_counter()
+        stage_seconds[stage] += now - mark[0]
+        mark[0] = now
+
+    prs = Presentation(pptx_file)
+    lap("parse")
+    issues = []
+    
+    if add_copyright:
+        footer_text = "Internal Use Only." if copyright_type == "Internal" else "Public Use."
+        copyright_text = "© SAP SE or an SAP affiliate company. All rights reserved."
+        
+        total_slides = len(prs.slides)
+        for slide_idx, slide in enumerate(prs.slides):
+            if slide_idx == total_slides - 1:  
+                add_footer_to_slide(slide, copyright_text)
+            else: 
+                add_footer_with_hidden_copyright(slide, footer_text)
+    lap("annotate")
+    
+    verdict_cache = VerdictCache(verdict_cache_path)
+    checker = ComplianceChecker(
+        gemini_model,
+        guidelines_text,
+        max_in_flight=COMPLIANCE_MAX_IN_FLIGHT,
+        timeout=COMPLIANCE_TIMEOUT,
+        retries=COMPLIANCE_RETRIES,
+        batch_size=COMPLIANCE_BATCH_SIZE,
+        batch_token_budget=COMPLIANCE_BATCH_TOKEN_BUDGET,
+        cache=verdict_cache,
+        rule_engine=RuleEngine(),
+        retriever=retriever,
+        tags={"deck": deck_name, "run": run_id}
+    )
+
+    # Slides unchanged since the closest earlier run of this deck keep that run's verdicts.
+    fingerprints, carried, manifest_match = [], {}, None
+    if manifest_path:
+        context = run_context(checker.guidelines_version, checker.model_name,
+                              implement_actions=bool(implement_actions), rules=checker.rule_engine.rules)
+        fingerprints = slide_fingerprints(pptx_file)
+        manifest = RunManifest(manifest_path)
+        try:
+            found = manifest.match(fingerprints, context)
+        finally:
+            manifest.close()
+        if found is not None:
+            previous_run, similarity, previous_slides = found
+            carried = {
+                slide_idx: {element_id: (is_compliant, message)
+                            for element_id, is_compliant, message in previous_slides[fingerprint]}
+                for slide_idx, fingerprint in enumerate(fingerprints, 1)
+                if fingerprint in previous_slides
+            }
+            manifest_match = {"run": previous_run, "similarity": round(similarity, 3), "slides_carried": len(carried)}
+
+    # Collect every element first so the model checks can run concurrently.
+    slide_issue_comments = {slide_idx: [] for slide_idx in range(1, len(prs.slides) + 1)}
+    pending_checks = []
+    slide_shapes = {}
+
+    def shape_at(slide_idx, element_id):
+        """Shape to border for an element: the group member itself, else its top-level shape"""
+        if slide_idx not in slide_shapes:
+            slide_shapes[slide_idx] = list(prs.slides[slide_idx - 1].shapes)
+        shapes, shape = slide_shapes[slide_idx], None
+        for part in element_id.split("."):
+            if shapes is None or not part.isdigit():
+                break
+            shape = shapes[int(part) - 1]
+            shapes = list(shape.shapes) if hasattr(shape, "shapes") else None
+        return shape
+
+    # Runs rarely set their own font or size; the effective values come from
+    # the placeholder, layout, master and theme, resolved once per layout placeholder.
+    resolver = StyleResolver(prs.part._element.find("p:defaultTextStyle", NSMAP))
+
+    if not implement_actions:
+        # Read-only checks take their records straight from the slide XML;
+        # python-pptx shapes are only looked up for the ones that get a border.
+        for slide_idx, element_id, element_info in extract_elements(pptx_file, resolve_styles=True, resolver=resolver,
+                                                                    skip_slides=carried):
+            if needs_check(element_info["text"]):
+                pending_checks.append((slide_idx, element_id, element_info))
+        # Carried slides are not read; their elements come from the manifest.
+        for slide_idx, slide_verdicts in carried.items():
+            pending_checks.extend((slide_idx, element_id, None) for element_id in slide_verdicts)
+        pending_checks.sort(key=lambda check: check[0])
+    else:
+        # Implement Actions edits runs while reading them, so it walks the in-memory slide XML
+        # with the same walker and records.
+        for slide_idx, slide in enumerate(prs.slides, 1):
+            slide_layout = slide.slide_layout
+            layout_key = slide_layout.part.partname
+
+            def load(slide_layout=slide_layout):
+                master = slide_layout.slide_master
+                theme = etree.fromstring(master.part.part_related_by(RT.THEME).blob)
+                return slide_layout._element, master._element, theme
+
+            resolve = style_resolve(resolver, layout_key, resolver.layout(layout_key, load))
+
+            def related(rid, slide_part=slide.part):
+                try:
+                    part = slide_part.related_part(rid)
+                except KeyError:
+                    return None
+                # Chart parts are loaded as XML and saved from it; other parts are only read.
+                element = getattr(part, "_element", None)
+                return element if element is not None else etree.fromstring(part.blob)
+
+            for shape_idx, shape in enumerate(slide.shapes, 1):
+                for element_id, kind, style_elm, body in iter_text_bodies(shape._element, shape_idx, related):
+                    run_elements = []
+                    element_info = text_record(slide_idx, element_id, body, style_elm, resolve, run_elements)
+                    text = element_info["text"]
+                    if kind in BRAND_FONT_KINDS and "Internal Use Only." not in text and "Public Use." not in text:
+                        if apply_brand_font(run_elements, element_info["font_details"]):
+                            add_green_border(shape_at(slide_idx, element_id))
+                            slide_issue_comments[slide_idx].append(
+                                (element_id, f"Element {element_id}: Font size increased to 11pt")
+                            )
+                    if needs_check(text):
+                        pending_checks.append((slide_idx, element_id, element_info))
+            if slide.has_notes_slide:
+                body = notes_body(slide.notes_slide._element)
+                if body is not None:
+                    element_info = text_record(slide_idx, "notes", body)
+                    if element_info["text"].strip() and needs_check(element_info["text"]):
+                        pending_checks.append((slide_idx, "notes", element_info))
+    lap("extract")
+
+    # Pictures are compared with the precomputed icon features; no model calls.
+    picture_findings, picture_stats = [], None
+    if icon_library and os.path.isdir(icon_library):
+        picture_findings, picture_stats = check_pictures(prs, load_feature_index(icon_library))
+    lap("images")
+    
+    total_slides = len(slide_issue_comments)
+    verdicts = [carried.get(slide_idx, {}).get(element_id) for slide_idx, element_id, _ in pending_checks]
+    to_check = [i for i, verdict in enumerate(verdicts) if verdict is None]
+    remaining = {slide_idx: 0 for slide_idx in slide_issue_comments}
+    for i in to_check:
+        remaining[pending_checks[i][0]] += 1
+    slides_done = 0
+    time_to_first_result = None
+
+    def slide_event(slide_idx):
+        return {
+            "type": "slide",
+            "slide": slide_idx,
+            "slides_done": slides_done,
+            "slides_total": total_slides,
+            "issues": [
+                {"slide": slide_idx, "element": element_id, "message": verdicts[i][1]}
+                for i, (s, element_id, _) in enumerate(pending_checks)
+                if s == slide_idx and not verdicts[i][0]
+            ] + [
+                {"slide": slide_idx, "element": element_id, "message": message}
+                for s, element_id, message in picture_findings
+                if s == slide_idx
+            ],
+            "elapsed": time.perf_counter() - start_time,
+        }
+
+    try:
+        for slide_idx, count in remaining.items():
+            if count == 0:
+                slides_done += 1
+                yield slide_event(slide_idx)
+        for n, verdict in checker.iter_checks([pending_checks[i][2] for i in to_check]):
+            i = to_check[n]
+            verdicts[i] = verdict
+            slide_idx = pending_checks[i][0]
+            remaining[slide_idx] -= 1
+            if remaining[slide_idx] == 0:
+                slides_done += 1
+                if time_to_first_result is None:
+                    time_to_first_result = time.perf_counter() - start_time
+                yield slide_event(slide_idx)
+    finally:
+        verdict_cache.close()
+    if manifest_path:
+        slide_verdicts = {slide_idx: [] for slide_idx in slide_issue_comments}
+        for (slide_idx, element_id, _), (is_compliant, message) in zip(pending_checks, verdicts):
+            slide_verdicts[slide_idx].append((element_id, is_compliant, message))
+        manifest = RunManifest(manifest_path)
+        try:
+            # Failed checks are retried next time rather than carried forward.
+            manifest.record(run_id, deck_name, context, {
+                fingerprints[slide_idx - 1]: checked
+                for slide_idx, checked in slide_verdicts.items()
+                if not any(message.startswith("CHECK FAILED") for _, _, message in checked)
+            })
+        finally:
+            manifest.close()
+    lap("checks")
+    
+    # Apply results in slide order once every check has come back.
+    failures = [
+        (slide_idx, element_id, compliance_message)
+        for (slide_idx, element_id, _), (is_compliant, compliance_message) in zip(pending_checks, verdicts)
+        if not is_compliant
+    ]
+    for slide_idx, element_id, compliance_message in sorted(failures + picture_findings, key=lambda f: f[0]):
+        issues.append(f"Slide {slide_idx}, Element {element_id}: {compliance_message}")
+        slide_issue_comments[slide_idx].append((element_id, f"Element {element_id}: {compliance_message}"))
+        add_red_border(shape_at(slide_idx, element_id))
+    
+    for slide_idx, slide in enumerate(prs.slides, 1):
+        notes_slide = slide.notes_slide
+        notes_text_frame = notes_slide.notes_text_frame
+        comments = [comment for _, comment in sorted(slide_issue_comments[slide_idx], key=lambda c: element_sort_key(c[0]))]
+        if comments:
+            notes_text_frame.text = f"Slide {slide_idx} compliance issues:\n" + "\n".join(comments)
+        else:
+            notes_text_frame.text = f"Slide {slide_idx}: All elements compliant."
+    
+    add_summary_slide(prs, issues)
+    lap("annotate")
+    
+    output = io.BytesIO()
+    save_presentation(prs, output, source=pptx_file)
+    output.seek(0)
+    lap("save")
+    
+    stats = dict(checker.stats)
+    stats["carried_forward"] = len(pending_checks) - len(to_check)
+    stats["manifest_match"] = manifest_match
+    stats["model_calls_avoided"] = stats["rule_verdicts"] + stats["cache_hits"] + stats["carried_forward"]
+    stats["time_to_first_result"] = time_to_first_result
+    stats["stage_seconds"] = stage_seconds
+    stats["pictures"] = picture_stats
+    stats["style_memo"] = {"hits": resolver.memo_hits, "misses": resolver.memo_misses}
+    stats["model_usage"] = recorder.summary("model_call", run=run_id)
+    stats["embedding_usage"] = recorder.summary("embedding_call", run=run_id)
+    recorder.record(
+        "deck", deck=deck_name, run=run_id, slides=total_slides, issues=len(issues),
+        seconds=time.perf_counter() - start_time,
+        **{k: v for k, v in stats.items() if k not in ("verdict_sources",)}
+    )
+    sources = {to_check[n]: source for n, source in checker.sources.items()}
+    stats["verdict_sources"] = [
+        {"slide": slide_idx, "element": element_id, "source": sources.get(i, "manifest")}
+        for i, (slide_idx, element_id, _) in enumerate(pending_checks)
+    ]
+    yield {"type": "result", "issues": issues, "output": output, "stats": stats}
+
+def pptx_compliance_check_with_rules(pptx_file, rules, add_copyright, copyright_type, implement_actions=False,
+                                     gemini_model=None, guidelines_text=None, retriever=None,
+                                     verdict_cache_path=VERDICT_CACHE_PATH, progress=None, deck_name=None,
+                                     manifest_path=RUN_MANIFEST_PATH, icon_library=ICON_LIBRARY_PATH):
+    """Check a deck and return (issues, annotated PPTX bytes, stats).
+
+    gemini_model is anything with generate_content (fake_model.FakeGeminiModel
+    offline); guidelines_text is the full guideline document and retriever
+    an optional GuidelineRetriever to send only the relevant chunks.
+    progress, if given, is called with each slide event from iter_compliance_check.
+    """
+    for event in iter_compliance_check(pptx_file, rules, add_copyright, copyright_type, implement_actions,
+                                       gemini_model, guidelines_text, retriever, verdict_cache_path,
+                                       deck_name, manifest_path, icon_library):
+        if event["type"] == "result":
+            return event["issues"], event["output"], event["stats"]
+        if progress is not None:
+            progress(event)
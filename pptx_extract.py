@@ -0,0 +1,427 @@
+"""
+Element extraction straight from the slide XML.
+
+Reads each slide part from the zip with lxml iterparse and builds the same
+element_info records as walking python-pptx shapes, paragraphs and runs,
+without creating a proxy object per run. Top-level shapes are numbered the
+way slide.shapes enumerates them, so records line up with python-pptx
+shape indexes; text nested in groups, tables, charts and SmartArt gets
+hierarchical IDs below its top-level shape. With resolve_styles, fonts and
+sizes a run inherits from its placeholder, layout, master or theme are
+filled in (see style_resolver).
+"""
+
+import hashlib
+import io
+import posixpath
+import re
+import zipfile
+
+from lxml import etree
+
+from style_resolver import A_NS, NSMAP, P_NS, StyleResolver
+
+
+R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+RT_SLIDE_LAYOUT = "/slideLayout"
+RT_SLIDE_MASTER = "/slideMaster"
+RT_THEME = "/theme"
+RT_NOTES_SLIDE = "/notesSlide"
+# Slide relationships whose parts hold text the slide's records are built from.
+RT_SLIDE_TEXT = ("/chart", "/diagramData", RT_NOTES_SLIDE)
+C_NS = "http://schemas.openxmlformats.org/drawingml/2006/chart"
+DGM_NS = "http://schemas.openxmlformats.org/drawingml/2006/diagram"
+TABLE_URI = "http://schemas.openxmlformats.org/drawingml/2006/table"
+CHART_URI = C_NS
+DIAGRAM_URI = DGM_NS
+
+P_SP = f"{{{P_NS}}}sp"
+P_SPTREE = f"{{{P_NS}}}spTree"
+P_GRPSP = f"{{{P_NS}}}grpSp"
+P_GRAPHICFRAME = f"{{{P_NS}}}graphicFrame"
+P_PIC = f"{{{P_NS}}}pic"
+SHAPE_TAGS = {f"{{{P_NS}}}{name}" for name in ("sp", "grpSp", "graphicFrame", "cxnSp", "pic", "contentPart")}
+P_TXBODY = f"{{{P_NS}}}txBody"
+A_P = f"{{{A_NS}}}p"
+A_PPR = f"{{{A_NS}}}pPr"
+A_R = f"{{{A_NS}}}r"
+A_RPR = f"{{{A_NS}}}rPr"
+A_T = f"{{{A_NS}}}t"
+A_BR = f"{{{A_NS}}}br"
+A_FLD = f"{{{A_NS}}}fld"
+A_LATIN = f"{{{A_NS}}}latin"
+A_TBL = f"{{{A_NS}}}tbl"
+A_TR = f"{{{A_NS}}}tr"
+A_TC = f"{{{A_NS}}}tc"
+A_TXBODY = f"{{{A_NS}}}txBody"
+C_RICH = f"{{{C_NS}}}rich"
+DGM_T = f"{{{DGM_NS}}}t"
+R_ID = f"{{{R_NS}}}id"
+R_DM = f"{{{R_NS}}}dm"
+TRUE_VALUES = ("1", "true", "on")
+FIRST_LETTER = re.compile(r'[A-Za-z]')
+DIGITS = re.compile(r'(\d+)')
+
+
+def is_sentence_case(text):
+    if not text or not text.strip():
+        return False
+    stripped = text.lstrip()
+    match = FIRST_LETTER.search(stripped)
+    if not match:
+        return False
+    first_alpha_idx = match.start()
+    if not stripped[first_alpha_idx].isupper():
+        return False
+    words = stripped.split()
+    if len(words) > 1:
+        for word in words[1:]:
+            if len(word) > 1 and word.isupper():
+                continue
+            if word and word[0].isupper():
+                return False
+    return True
+
+
+def text_case(text):
+    return {
+        "is_uppercase": text.isupper(),
+        "is_lowercase": text.islower(),
+        "is_title_case": text.istitle(),
+        "is_sentence_case": is_sentence_case(text)
+    }
+
+
+def element_sort_key(element_id):
+    """Orders IDs like "2" < "10" < "10.2" < "10.r1c10" < "notes" """
+    return [int(part) if n % 2 else part for n, part in enumerate(DIGITS.split(str(element_id)))]
+
+
+def element_record(slide_idx, shape_idx, text, runs):
+    """The element_info dict the compliance checks expect.
+
+    runs are (font_name, font_size, italic, text) tuples in document order.
+    """
+    return {
+        "slide_number": slide_idx,
+        "element_number": shape_idx,
+        "text": text,
+        "text_case": text_case(text),
+        "font_details": [
+            {
+                "font_name": font_name,
+                "font_size": font_size,
+                "italic": italic,
+                "text": run_text,
+                "text_case": text_case(run_text)
+            }
+            for font_name, font_size, italic, run_text in runs
+        ]
+    }
+
+
+def _canonical(element):
+    return etree.tostring(element, method="c14n", exclusive=True, with_comments=False)
+
+
+class PptxPackage:
+    """Minimal read-only view of the parts and relationships in a .pptx zip"""
+
+    def __init__(self, pptx_file):
+        if hasattr(pptx_file, "seek"):
+            pptx_file.seek(0)
+        self.zip = zipfile.ZipFile(pptx_file)
+        self._rels = {}
+        self._xml = {}
+
+    def read(self, partname):
+        return self.zip.read(partname)
+
+    def xml(self, partname):
+        """Parsed part, kept for reuse (layouts, masters and themes are shared)"""
+        root = self._xml.get(partname)
+        if root is None:
+            root = self._xml[partname] = etree.fromstring(self.read(partname))
+        return root
+
+    def canonical(self, partname):
+        """Exclusive C14N of a part: the same bytes however the XML was serialized"""
+        return _canonical(etree.fromstring(self.read(partname)))
+
+    def rels(self, partname):
+        """rId -> (relationship type, target partname)"""
+        found = self._rels.get(partname)
+        if found is None:
+            directory, name = posixpath.split(partname)
+            rels_name = posixpath.join(directory, "_rels", name + ".rels")
+            found = {}
+            if rels_name in self.zip.NameToInfo:
+                for rel in etree.fromstring(self.read(rels_name)):
+                    if rel.get("TargetMode") == "External":
+                        continue
+                    target = posixpath.normpath(posixpath.join(directory, rel.get("Target")))
+                    found[rel.get("Id")] = (rel.get("Type"), target.lstrip("/"))
+            self._rels[partname] = found
+        return found
+
+    def related(self, partname, reltype_suffix):
+        for reltype, target in self.rels(partname).values():
+            if reltype.endswith(reltype_suffix):
+                return target
+        return None
+
+    def presentation_part(self):
+        root = etree.fromstring(self.read("_rels/.rels"))
+        for rel in root:
+            if rel.get("Type").endswith("/officeDocument"):
+                return rel.get("Target").lstrip("/")
+        return "ppt/presentation.xml"
+
+    def slide_parts(self):
+        """Slide partnames in presentation order"""
+        presentation = self.presentation_part()
+        rels = self.rels(presentation)
+        root = self.xml(presentation)
+        return [rels[sld.get(f"{{{R_NS}}}id")][1] for sld in root.iterfind("p:sldIdLst/p:sldId", NSMAP)]
+
+    def close(self):
+        self.zip.close()
+
+
+def _bool(value):
+    return None if value is None else value.lower() in TRUE_VALUES
+
+
+def _child(elem, tag):
+    for child in elem:
+        if child.tag == tag:
+            return child
+    return None
+
+
+def text_record(slide_idx, element_id, body, style_elm=None, resolve=None, run_elements=None):
+    """element_info for the a:p paragraphs under body (a txBody, c:rich or dgm:t element).
+
+    style_elm is the shape or cell whose list style and placeholder the runs
+    inherit from; without it (charts, SmartArt, notes) fonts are not resolved.
+    The a:r elements behind font_details are appended to run_elements if given.
+    """
+    # Plain child loops with Clark-notation tags; path lookups cost more per run.
+    if style_elm is None:
+        resolve = None
+    paragraph_texts = []
+    runs = []
+    for paragraph in (body if body is not None else ()):
+        if paragraph.tag != A_P:
+            continue
+        parts = []
+        level = 0
+        in_paragraph_runs = True
+        for child in paragraph:
+            tag = child.tag
+            if tag == A_BR:
+                parts.append("\v")
+                continue
+            if tag == A_PPR:
+                level = int(child.get("lvl", "0"))
+                continue
+            if tag != A_R and tag != A_FLD:
+                continue
+            t = _child(child, A_T)
+            text = (t.text or "") if t is not None else ""
+            parts.append(text)
+            if tag != A_R or not in_paragraph_runs:
+                continue
+            if "©" in text:
+                # Runs after the copyright sign are not checked; the paragraph text still is.
+                in_paragraph_runs = False
+                continue
+            rpr = _child(child, A_RPR)
+            if rpr is not None:
+                latin = _child(rpr, A_LATIN)
+                font_name = latin.get("typeface") if latin is not None else None
+                size = rpr.get("sz")
+                font_size = int(size) / 100 if size is not None else None
+                italic = _bool(rpr.get("i"))
+            else:
+                font_name = font_size = italic = None
+            # Theme references (+mj-lt, +mn-lt) are resolved to the theme's fonts too.
+            if resolve is not None and (font_name is None or font_size is None or font_name.startswith("+")):
+                font_name, font_size = resolve(style_elm, level, rpr, font_name, font_size)
+            runs.append((font_name, font_size, italic, text))
+            if run_elements is not None:
+                run_elements.append(child)
+        paragraph_texts.append("".join(parts))
+    return element_record(slide_idx, element_id, "\n".join(paragraph_texts), runs)
+
+
+def _merged(tc):
+    return _bool(tc.get("hMerge")) or _bool(tc.get("vMerge"))
+
+
+def iter_text_bodies(shape, shape_idx, related=None, pictures=False):
+    """Yield (element_id, kind, style_elm, body) for the text inside one top-level shape.
+
+    Walks group shapes, table cells, chart titles and SmartArt text with an
+    explicit stack. IDs are hierarchical: "3" for the shape itself, "3.2"
+    for the second shape in a group, "4.r2c3" for a table cell and "5.t1" /
+    "6.d1" for chart and SmartArt text. related(rId) returns the parsed
+    chart or diagram data part (or None); without it those are skipped.
+    Every p:sp is yielded, empty or not; other text only when it has any.
+    With pictures, p:pic elements are yielded too as (element_id, "picture", pic, None).
+    """
+    stack = [(str(shape_idx), shape)]
+    while stack:
+        element_id, elm = stack.pop()
+        tag = elm.tag
+        if tag == P_SP:
+            yield element_id, "shape", elm, _child(elm, P_TXBODY)
+        elif tag == P_PIC:
+            if pictures:
+                yield element_id, "picture", elm, None
+        elif tag == P_GRPSP:
+            children = [child for child in elm if child.tag in SHAPE_TAGS]
+            stack.extend((f"{element_id}.{n}", child) for n, child in reversed(list(enumerate(children, 1))))
+        elif tag == P_GRAPHICFRAME:
+            graphic_data = elm.find("a:graphic/a:graphicData", NSMAP)
+            if graphic_data is None:
+                continue
+            uri = graphic_data.get("uri")
+            if uri == TABLE_URI:
+                table = _child(graphic_data, A_TBL)
+                for row_idx, row in enumerate(table.iterchildren(A_TR) if table is not None else (), 1):
+                    for col_idx, cell in enumerate(row.iterchildren(A_TC), 1):
+                        body = _child(cell, A_TXBODY)
+                        if body is not None and not _merged(cell) and _has_text(body):
+                            yield f"{element_id}.r{row_idx}c{col_idx}", "cell", cell, body
+            elif related is not None and uri in (CHART_URI, DIAGRAM_URI):
+                ref = graphic_data[0] if len(graphic_data) else None
+                part = related(ref.get(R_ID if uri == CHART_URI else R_DM)) if ref is not None else None
+                if part is None:
+                    continue
+                kind, prefix, body_tag = ("chart", "t", C_RICH) if uri == CHART_URI else ("smartart", "d", DGM_T)
+                bodies = (body for body in part.iter(body_tag) if _has_text(body))
+                for n, body in enumerate(bodies, 1):
+                    yield f"{element_id}.{prefix}{n}", kind, None, body
+
+
+def _has_text(body):
+    return any(t.text for t in body.iter(A_T))
+
+
+def notes_body(notes_elm):
+    """txBody of the body placeholder on a notes slide, or None"""
+    for sp in notes_elm.iterfind("p:cSld/p:spTree/p:sp", NSMAP):
+        ph = sp.find("p:nvSpPr/p:nvPr/p:ph", NSMAP)
+        if ph is not None and ph.get("type") == "body":
+            return _child(sp, P_TXBODY)
+    return None
+
+
+def style_resolve(resolver, layout_key, layout):
+    """resolve callback for text_record that fills missing values from a StyleResolver"""
+    def resolve(style_elm, level, rpr, font_name, font_size):
+        effective_name, effective_size = resolver.resolve(layout_key, layout, style_elm, level, rpr)
+        if font_name is None or font_name.startswith("+"):
+            font_name = effective_name
+        return font_name, font_size if font_size is not None else effective_size
+    return resolve
+
+
+def iter_slide_elements(slide_xml, slide_idx, resolve=None, related=None):
+    """Yield (element_id, element_info) for the text of one slide's XML bytes"""
+    shape_idx = 0
+    for _, elem in etree.iterparse(io.BytesIO(slide_xml), events=("end",)):
+        if elem.tag not in SHAPE_TAGS:
+            continue
+        parent = elem.getparent()
+        if parent is None or parent.tag != P_SPTREE or parent.getparent().tag != f"{{{P_NS}}}cSld":
+            continue
+        shape_idx += 1
+        for element_id, _, style_elm, body in iter_text_bodies(elem, shape_idx, related):
+            yield element_id, text_record(slide_idx, element_id, body, style_elm, resolve)
+        # Finished top-level shapes are dropped to keep memory flat.
+        elem.clear()
+        while elem.getprevious() is not None:
+            del parent[0]
+
+
+def slide_fingerprints(pptx_file):
+    """SHA-256 per slide, in order, over every part its element records depend on.
+
+    That is the slide XML, its charts, SmartArt data and notes, its layout,
+    master and theme, and the presentation's default text style. Parts are
+    hashed as canonical XML, so re-saving a deck (e.g. with python-pptx)
+    does not change them. Slide order and unrelated slides do not affect a
+    slide's fingerprint.
+    """
+    package = PptxPackage(pptx_file)
+    try:
+        default_style = package.xml(package.presentation_part()).find("p:defaultTextStyle", NSMAP)
+        base = _canonical(default_style) if default_style is not None else b""
+        layout_digests = {}
+        fingerprints = []
+        for slide_part in package.slide_parts():
+            digest = hashlib.sha256(base)
+            digest.update(package.canonical(slide_part))
+            for rid, (reltype, target) in sorted(package.rels(slide_part).items()):
+                if reltype.endswith(RT_SLIDE_LAYOUT):
+                    if target not in layout_digests:
+                        layout = hashlib.sha256(package.canonical(target))
+                        master = package.related(target, RT_SLIDE_MASTER)
+                        theme = package.related(master, RT_THEME) if master else None
+                        for part in (master, theme):
+                            if part:
+                                layout.update(package.canonical(part))
+                        layout_digests[target] = layout.digest()
+                    digest.update(layout_digests[target])
+                elif reltype.endswith(RT_SLIDE_TEXT):
+                    digest.update(rid.encode("utf-8"))
+                    digest.update(package.canonical(target))
+            fingerprints.append(digest.hexdigest())
+        return fingerprints
+    finally:
+        package.close()
+
+
+def extract_elements(pptx_file, resolve_styles=False, resolver=None, notes=True, skip_slides=()):
+    """Yield (slide_idx, element_id, element_info) for every text element in the deck.
+
+    Slide text comes first, then the slide's speaker notes as element "notes".
+    Slides whose index is in skip_slides are not read at all.
+    """
+    package = PptxPackage(pptx_file)
+    try:
+        if resolve_styles and resolver is None:
+            presentation = package.xml(package.presentation_part())
+            resolver = StyleResolver(presentation.find("p:defaultTextStyle", NSMAP))
+        for slide_idx, slide_part in enumerate(package.slide_parts(), 1):
+            if slide_idx in skip_slides:
+                continue
+            resolve = None
+            if resolver is not None:
+                layout_part = package.related(slide_part, RT_SLIDE_LAYOUT)
+
+                def load(layout_part=layout_part):
+                    master_part = package.related(layout_part, RT_SLIDE_MASTER)
+                    theme_part = package.related(master_part, RT_THEME) if master_part else None
+                    return (package.xml(layout_part),
+                            package.xml(master_part) if master_part else None,
+                            package.xml(theme_part) if theme_part else None)
+
+                resolve = style_resolve(resolver, layout_part, resolver.layout(layout_part, load))
+
+            def related(rid, slide_part=slide_part):
+                found = package.rels(slide_part).get(rid)
+                return etree.fromstring(package.read(found[1])) if found else None
+
+            slide_xml = package.read(slide_part)
+            for element_id, element_info in iter_slide_elements(slide_xml, slide_idx, resolve, related):
+                yield slide_idx, element_id, element_info
+            notes_part = package.related(slide_part, RT_NOTES_SLIDE) if notes else None
+            if notes_part:
+                body = notes_body(etree.fromstring(package.read(notes_part)))
+                if body is not None and _has_text(body):
+                    yield slide_idx, "notes", text_record(slide_idx, "notes", body)
+    finally:
+        package.close()
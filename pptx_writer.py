@@ -0,0 +1,103 @@
+import copy
+import struct
+import zipfile
+import zlib
+
+from pptx.opc.constants import CONTENT_TYPE as CT
+from pptx.opc.oxml import serialize_part_xml
+from pptx.opc.packuri import CONTENT_TYPES_URI, PACKAGE_URI
+from pptx.opc.package import XmlPart
+from pptx.opc.serialized import _ContentTypesItem
+
+
+COPY_CHUNK_SIZE = 1024 * 1024
+LOCAL_HEADER_SIZE = 30
+# Media that is already compressed gains nothing from a second deflate pass.
+STORED_CONTENT_TYPE_PREFIXES = ("video/", "audio/")
+STORED_CONTENT_TYPES = (CT.PNG, CT.JPEG, CT.GIF)
+
+
+def _is_unchanged(part, zinfo):
+    if isinstance(part, XmlPart):
+        return False
+    blob = part.blob
+    return len(blob) == zinfo.file_size and zlib.crc32(blob) == zinfo.CRC
+
+
+def _copy_raw_member(src_zip, zinfo, dst_zip):
+    """Append a member's compressed bytes to dst_zip without inflating them"""
+    src_fp = src_zip.fp
+    src_fp.seek(zinfo.header_offset)
+    header = src_fp.read(LOCAL_HEADER_SIZE)
+    name_len, extra_len = struct.unpack("<HH", header[26:30])
+    src_fp.seek(zinfo.header_offset + LOCAL_HEADER_SIZE + name_len + extra_len)
+
+    new_info = copy.copy(zinfo)
+    # Sizes and CRC go into the local header, so no trailing data descriptor.
+    new_info.flag_bits &= ~0x08
+    new_info.extra = b""
+    dst_fp = dst_zip.fp
+    dst_fp.seek(dst_zip.start_dir)
+    new_info.header_offset = dst_fp.tell()
+    dst_fp.write(new_info.FileHeader(zinfo.file_size > zipfile.ZIP64_LIMIT))
+
+    remaining = zinfo.compress_size
+    while remaining:
+        chunk = src_fp.read(min(COPY_CHUNK_SIZE, remaining))
+        if not chunk:
+            raise zipfile.BadZipFile(f"Truncated member {zinfo.filename}")
+        dst_fp.write(chunk)
+        remaining -= len(chunk)
+
+    dst_zip.start_dir = dst_fp.tell()
+    dst_zip.filelist.append(new_info)
+    dst_zip.NameToInfo[new_info.filename] = new_info
+    dst_zip._didModify = True
+
+
+def _compression_for(part):
+    content_type = part.content_type
+    if content_type.startswith(STORED_CONTENT_TYPE_PREFIXES) or content_type in STORED_CONTENT_TYPES:
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def save_presentation(prs, output, source=None):
+    """Serialize prs to output in a single pass.
+
+    When source (the file or path the deck was opened from) is given, parts
+    whose bytes are unchanged, such as media and embedded fonts, are copied
+    from it still compressed instead of being deflated again. Everything else
+    is written the same way python-pptx's own save does.
+    """
+    package = prs.part.package
+    parts = tuple(package.iter_parts())
+
+    src_zip = None
+    if source is not None:
+        if hasattr(source, "seek"):
+            source.seek(0)
+        try:
+            src_zip = zipfile.ZipFile(source, "r")
+        except (zipfile.BadZipFile, OSError):
+            src_zip = None
+
+    try:
+        with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_DEFLATED, strict_timestamps=False) as dst_zip:
+            can_copy_raw = src_zip is not None and dst_zip._seekable
+            source_members = src_zip.NameToInfo if src_zip is not None else {}
+
+            dst_zip.writestr(CONTENT_TYPES_URI.membername, serialize_part_xml(_ContentTypesItem.xml_for(parts)))
+            dst_zip.writestr(PACKAGE_URI.rels_uri.membername, package._rels.xml)
+            for part in parts:
+                membername = part.partname.membername
+                zinfo = source_members.get(membername)
+                if can_copy_raw and zinfo is not None and _is_unchanged(part, zinfo):
+                    _copy_raw_member(src_zip, zinfo, dst_zip)
+                else:
+                    dst_zip.writestr(membername, part.blob, compress_type=_compression_for(part))
+                if part._rels:
+                    dst_zip.writestr(part.partname.rels_uri.membername, part.rels.xml)
+    finally:
+        if src_zip is not None:
+            src_zip.close()
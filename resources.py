@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+
+import numpy as np
+
+import metrics
+import vector_index
+
+
+SENTENCE_MODEL_NAME = "all-MiniLM-L6-v2"
+GEMINI_MODEL_NAME = "gemini-1.5-flash-002"
+LINK_EMBEDDINGS_PATH = "links_embeddings.npz"
+LINK_INDEX_PATH = "links_index.npz"
+# Icon search modules live with the icon library under demo/.
+ICON_MODULE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "demo")
+
+# Process-wide store shared by every Streamlit session and rerun:
+# name -> (file signature, value)
+_cache = {}
+_lock = threading.Lock()
+# One lock per asset so concurrent sessions wait for a single load.
+_asset_locks = {}
+
+
+def file_signature(*paths):
+    """mtime and size of each file; any change triggers a reload"""
+    signature = []
+    for path in paths:
+        stat = os.stat(path)
+        signature.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+def _lookup(name, signature):
+    entry = _cache.get(name)
+    if entry is not None and entry[0] == signature:
+        return True, entry[1]
+    return False, None
+
+
+def _load_cached(name, signature, loader):
+    with _lock:
+        found, value = _lookup(name, signature)
+        if found:
+            return value
+        asset_lock = _asset_locks.setdefault(name, threading.Lock())
+    with asset_lock:
+        with _lock:
+            found, value = _lookup(name, signature)
+        if not found:
+            value = loader()
+            with _lock:
+                _cache[name] = (signature, value)
+    return value
+
+
+def clear():
+    with _lock:
+        _cache.clear()
+
+
+def get_guidelines_text(path):
+    def load():
+        from docx import Document
+        doc = Document(path)
+        return "\n".join(para.text for para in doc.paragraphs)
+    return _load_cached(("guidelines", path), file_signature(path), load)
+
+
+def get_embeddings_and_chunks(prefix):
+    embeddings_path = f"{prefix}_embeddings.npz"
+    chunks_path = f"{prefix}_chunks.json"
+
+    def load():
+        data = np.load(embeddings_path)
+        with open(chunks_path) as f:
+            chunks = json.load(f)
+        return data['embeddings'], chunks
+    return _load_cached(("chunks", prefix), file_signature(embeddings_path, chunks_path), load)
+
+
+def get_links(path):
+    def load():
+        import pandas as pd
+        return pd.read_csv(path)
+    return _load_cached(("links", path), file_signature(path), load)
+
+
+def links_fingerprint(names, model_name=SENTENCE_MODEL_NAME):
+    payload = "\n".join([model_name] + list(names))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def build_link_embeddings(path, sentence_model, embeddings_path=LINK_EMBEDDINGS_PATH,
+                          model_name=SENTENCE_MODEL_NAME):
+    names = get_links(path)['Name'].tolist()
+    embeddings = sentence_model.encode(names)
+    np.savez_compressed(embeddings_path, embeddings=embeddings,
+                        fingerprint=links_fingerprint(names, model_name))
+    return embeddings
+
+
+def get_link_embeddings(path, sentence_model, embeddings_path=LINK_EMBEDDINGS_PATH,
+                        model_name=SENTENCE_MODEL_NAME):
+    """Link name embeddings from embeddings_path, rebuilt when links.csv no longer matches"""
+    def load():
+        names = get_links(path)['Name'].tolist()
+        if os.path.exists(embeddings_path):
+            data = np.load(embeddings_path)
+            if str(data['fingerprint']) == links_fingerprint(names, model_name):
+                return data['embeddings']
+        return build_link_embeddings(path, sentence_model, embeddings_path, model_name)
+
+    paths = [path] + ([embeddings_path] if os.path.exists(embeddings_path) else [])
+    return _load_cached(("link_embeddings", path, embeddings_path), file_signature(*paths), load)
+
+
+def _get_index(name, embeddings_path, index_path, load_embeddings, kind):
+    """Load index_path if it is newer than embeddings_path, else rebuild and persist it"""
+    def load():
+        if (os.path.exists(index_path)
+                and os.path.getmtime(index_path) >= os.path.getmtime(embeddings_path)):
+            return vector_index.load_index(index_path)
+        index = vector_index.build_index(load_embeddings(), kind=kind)
+        index.save(index_path)
+        return index
+    return _load_cached(name, file_signature(embeddings_path), load)
+
+
+def get_chunk_index(prefix, kind=None):
+    embeddings_path = f"{prefix}_embeddings.npz"
+    return _get_index(
+        ("chunk_index", prefix), embeddings_path, f"{prefix}_index.npz",
+        lambda: get_embeddings_and_chunks(prefix)[0], kind
+    )
+
+
+def get_link_index(path, sentence_model, embeddings_path=LINK_EMBEDDINGS_PATH,
+                   index_path=LINK_INDEX_PATH, kind=None):
+    embeddings = get_link_embeddings(path, sentence_model, embeddings_path)
+    return _get_index(
+        ("link_index", path, index_path), embeddings_path, index_path, lambda: embeddings, kind
+    )
+
+
+def get_icon_search(library_path, sentence_model, model_name=SENTENCE_MODEL_NAME):
+    """Hybrid lexical + semantic icon search, reloaded when icons are added or removed"""
+    def load():
+        if ICON_MODULE_DIR not in sys.path:
+            sys.path.append(ICON_MODULE_DIR)
+        from icon_embeddings import load_hybrid_search
+        return load_hybrid_search(library_path, sentence_model, model_name)
+    # The directory's mtime changes whenever a file is added or removed.
+    return _load_cached(("icon_search", library_path, model_name), file_signature(library_path), load)
+
+
+def get_sentence_model(name=SENTENCE_MODEL_NAME):
+    def load():
+        from sentence_transformers import SentenceTransformer
+        return metrics.instrument(SentenceTransformer(name))
+    return _load_cached(("sentence_model", name), None, load)
+
+
+def get_gemini_model(api_key, name=GEMINI_MODEL_NAME):
+    def load():
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        return metrics.instrument(genai.GenerativeModel(name))
+    return _load_cached(("gemini_model", name, api_key), None, load)
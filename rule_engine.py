@@ -0,0 +1,128 @@
+import re
+
+
+BRAND_FONTS = ("72 Brand", "72", "Arial", "Trebuchet MS")
+MIN_FONT_SIZE = 11
+# Weight and style words dropped from a font name to get its family, so
+# "72 Brand Medium" and "Arial Bold" count as 72 Brand and Arial.
+FONT_STYLE_WORDS = (
+    "thin", "extralight", "light", "book", "regular", "medium", "semibold", "demibold", "bold",
+    "extrabold", "heavy", "black", "condensed", "italic", "oblique",
+)
+
+# Declarative brand rules. "scope" is "run" (checked against each entry of
+# element_info["font_details"]) or "element" (checked against element_info).
+# "field" may be a dotted path; a missing value makes the rule undecidable,
+# which sends the element to the model instead.
+RULES = [
+    {
+        "id": "brand-font",
+        "scope": "run",
+        "field": "font_name",
+        "check": "family",
+        "value": BRAND_FONTS,
+        "message": "font '{value}' is not a brand font (use 72 Brand, Arial or Trebuchet MS)",
+    },
+    {
+        "id": "min-font-size",
+        "scope": "run",
+        "field": "font_size",
+        "check": "min",
+        "value": MIN_FONT_SIZE,
+        "message": "font size {value}pt is below the {limit}pt minimum",
+    },
+    {
+        "id": "no-italics",
+        "scope": "run",
+        "field": "italic",
+        "check": "not",
+        "value": True,
+        "optional": True,
+        "message": "italics used for emphasis",
+    },
+    {
+        "id": "sentence-case",
+        "scope": "element",
+        "field": "text_case.is_title_case",
+        "check": "not",
+        "value": True,
+        "min_words": 2,
+        "message": "text is in title case instead of sentence case",
+    },
+]
+
+# Text made only of numbers, dates, URLs or punctuation needs no judgement.
+MECHANICAL_TEXT = re.compile(
+    r"^[\s\d\W]*$|^\s*(https?://\S+|www\.\S+|\S+@\S+\.\S+)\s*$"
+)
+
+
+def _get_field(record, field):
+    value = record
+    for part in field.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def font_family(font_name):
+    """Font name without trailing weight or style words ("72 Brand Medium" -> "72 Brand")"""
+    words = font_name.split()
+    while len(words) > 1 and words[-1].lower() in FONT_STYLE_WORDS:
+        words.pop()
+    return " ".join(words)
+
+
+def _passes(rule, value):
+    check = rule["check"]
+    if check == "in":
+        return value in rule["value"]
+    if check == "family":
+        return font_family(value).lower() in {family.lower() for family in rule["value"]}
+    if check == "min":
+        return value >= rule["value"]
+    if check == "not":
+        return value != rule["value"]
+    raise ValueError(f"Unknown rule check '{check}' in rule '{rule['id']}'")
+
+
+class RuleEngine:
+    """Evaluate the mechanical brand rules locally before asking the model"""
+
+    def __init__(self, rules=RULES):
+        self.rules = rules
+
+    def evaluate(self, element_info):
+        """Return (decided, verdict, violations) for one element.
+
+        decided is False when the element still needs the model's judgement.
+        """
+        violations = []
+        undecidable = False
+        text = element_info.get("text") or ""
+        for rule in self.rules:
+            if rule.get("min_words") and len(text.split()) < rule["min_words"]:
+                continue
+            if rule["scope"] == "run":
+                records = [r for r in element_info.get("font_details", []) if (r.get("text") or "").strip()]
+            else:
+                records = [element_info]
+            for record in records:
+                value = _get_field(record, rule["field"])
+                if value is None:
+                    if not rule.get("optional"):
+                        undecidable = True
+                    continue
+                if not _passes(rule, value):
+                    message = rule["message"].format(value=value, limit=rule.get("value"))
+                    violations.append(f"[{rule['id']}] {message}")
+                    break
+
+        if violations:
+            return True, (False, "NON-COMPLIANT: " + "; ".join(violations)), violations
+        if not text.strip() or (MECHANICAL_TEXT.match(text) and not undecidable):
+            return True, (True, "COMPLIANT"), violations
+        # Everything mechanical passed (or could not be checked), but wording
+        # and tone still need semantic judgement.
+        return False, None, violations
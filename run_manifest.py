@@ -0,0 +1,106 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+
+DEFAULT_MANIFEST_PATH = "run_manifest.sqlite3"
+DEFAULT_MAX_RUNS = 1000
+# Share of slides (Jaccard over fingerprints) a new upload needs in common with a run to reuse it.
+MIN_SIMILARITY = 0.3
+# SQLite's default limit on bound parameters is 999.
+QUERY_CHUNK = 500
+
+
+def run_context(guidelines_version, model_name, **options):
+    """Verdicts are only carried between runs with the same guidelines, model, rules and options"""
+    payload = json.dumps({"guidelines": guidelines_version, "model": model_name, **options},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RunManifest:
+    """SQLite store of slide fingerprints and element verdicts per compliance run.
+
+    A revised upload is matched to the earlier run it shares the most slide
+    fingerprints with, so unchanged slides can take their verdicts from it.
+    """
+
+    def __init__(self, path=DEFAULT_MANIFEST_PATH, max_runs=DEFAULT_MAX_RUNS):
+        self.path = path
+        self.max_runs = max_runs
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            "run_id TEXT PRIMARY KEY, deck TEXT, context TEXT, slide_count INTEGER, created REAL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS slides ("
+            "run_id TEXT, fingerprint TEXT, verdicts TEXT, PRIMARY KEY (run_id, fingerprint))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS slides_fingerprint ON slides(fingerprint)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS runs_created ON runs(created)")
+        self._conn.commit()
+
+    def match(self, fingerprints, context, min_similarity=MIN_SIMILARITY):
+        """(run_id, similarity, {fingerprint: verdicts}) for the closest earlier run, or None.
+
+        verdicts is a list of (element_id, is_compliant, message) for one slide.
+        """
+        unique = list(set(fingerprints))
+        shared = {}
+        with self._lock:
+            for start in range(0, len(unique), QUERY_CHUNK):
+                chunk = unique[start:start + QUERY_CHUNK]
+                rows = self._conn.execute(
+                    "SELECT s.run_id, r.slide_count, COUNT(*) FROM slides s JOIN runs r ON r.run_id = s.run_id "
+                    f"WHERE r.context = ? AND s.fingerprint IN ({','.join('?' * len(chunk))}) "
+                    "GROUP BY s.run_id",
+                    [context, *chunk]
+                ).fetchall()
+                for run_id, slide_count, count in rows:
+                    shared[run_id] = (slide_count, shared.get(run_id, (0, 0))[1] + count)
+            best = None
+            for run_id, (slide_count, count) in shared.items():
+                similarity = count / (len(unique) + slide_count - count)
+                if best is None or similarity > best[1]:
+                    best = (run_id, similarity)
+            if best is None or best[1] < min_similarity:
+                return None
+            rows = self._conn.execute(
+                "SELECT fingerprint, verdicts FROM slides WHERE run_id = ?", (best[0],)
+            ).fetchall()
+        slides = {
+            fingerprint: [(element_id, bool(is_compliant), message)
+                          for element_id, is_compliant, message in json.loads(verdicts)]
+            for fingerprint, verdicts in rows
+        }
+        return best[0], best[1], slides
+
+    def record(self, run_id, deck, context, slides):
+        """Store a finished run; slides maps fingerprint -> [(element_id, is_compliant, message)]"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO runs (run_id, deck, context, slide_count, created) VALUES (?, ?, ?, ?, ?)",
+                (run_id, str(deck), context, len(slides), time.time())
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO slides (run_id, fingerprint, verdicts) VALUES (?, ?, ?)",
+                [(run_id, fingerprint, json.dumps([[e, int(bool(c)), m] for e, c, m in verdicts], ensure_ascii=False))
+                 for fingerprint, verdicts in slides.items()]
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+        if self.max_runs and count > self.max_runs:
+            old = "SELECT run_id FROM runs ORDER BY created ASC LIMIT ?"
+            self._conn.execute(f"DELETE FROM slides WHERE run_id IN ({old})", (count - self.max_runs,))
+            self._conn.execute(f"DELETE FROM runs WHERE run_id IN ({old})", (count - self.max_runs,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,47 @@
+import json
+import urllib.parse
+import urllib.request
+
+
+def submit_job(base_url, data, filename, copyright_type=None, implement_actions=False, timeout=60):
+    query = {"filename": filename, "implement_actions": "1" if implement_actions else "0"}
+    if copyright_type:
+        query["copyright"] = copyright_type
+    request = urllib.request.Request(
+        f"{base_url.rstrip('/')}/jobs?{urllib.parse.urlencode(query)}",
+        data=data,
+        headers={"Content-Type": "application/octet-stream"},
+        method="POST"
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.load(response)
+
+
+def get_job(base_url, job_id, timeout=30):
+    with urllib.request.urlopen(f"{base_url.rstrip('/')}/jobs/{job_id}", timeout=timeout) as response:
+        return json.load(response)
+
+
+def get_result(base_url, job_id, timeout=60):
+    with urllib.request.urlopen(f"{base_url.rstrip('/')}/jobs/{job_id}/result", timeout=timeout) as response:
+        return response.read()
+
+
+def iter_events(base_url, job_id, last_event_id=None, timeout=300):
+    """Yield (event, data) from the job's event stream until it is done or failed"""
+    headers = {"Accept": "text/event-stream"}
+    if last_event_id:
+        headers["Last-Event-ID"] = str(last_event_id)
+    request = urllib.request.Request(f"{base_url.rstrip('/')}/jobs/{job_id}/events", headers=headers)
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        event, data = "message", []
+        for raw in response:
+            line = raw.decode("utf-8").rstrip("\r\n")
+            if not line:
+                if data:
+                    yield event, json.loads("\n".join(data))
+                event, data = "message", []
+            elif line.startswith("event:"):
+                event = line[6:].strip()
+            elif line.startswith("data:"):
+                data.append(line[5:].strip())
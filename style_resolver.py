@@ -0,0 +1,176 @@
+"""
+Effective font family and size of text runs.
+
+A run without its own latin typeface or size inherits them from, in order:
+the shape's list style, the matching layout placeholder, the matching
+master placeholder, the master's title/body/other text style and the
+presentation's default text style. Theme font references (+mj-lt, +mn-lt)
+are mapped to the theme's major and minor fonts.
+
+Everything past the shape itself depends only on the layout, the
+placeholder and the paragraph level, so it is resolved once per
+(layout, placeholder, level) and memoized.
+"""
+
+A_NS = "http://schemas.openxmlformats.org/drawingml/2006/main"
+P_NS = "http://schemas.openxmlformats.org/presentationml/2006/main"
+NSMAP = {"a": A_NS, "p": P_NS}
+
+DEFAULT_FONT_SIZE = 18.0
+# Layout placeholder type -> master placeholder it inherits from.
+MASTER_PLACEHOLDER_TYPES = {
+    "ctrTitle": "title", "title": "title", "subTitle": "body", "obj": "body", "body": "body",
+    "chart": "body", "tbl": "body", "clipArt": "body", "dgm": "body", "media": "body",
+    "pic": "body", "dt": "dt", "ftr": "ftr", "sldNum": "sldNum", "hdr": "hdr",
+}
+TITLE_TYPES = ("title", "ctrTitle")
+OTHER_TYPES = ("dt", "ftr", "sldNum", "hdr")
+
+
+def _tag(ns, name):
+    return f"{{{ns}}}{name}"
+
+
+def placeholder_key(shape_elm):
+    """(type, idx) of a shape's placeholder, or None for ordinary shapes"""
+    ph = shape_elm.find("p:nvSpPr/p:nvPr/p:ph", NSMAP)
+    if ph is None:
+        return None
+    return ph.get("type", "obj"), int(ph.get("idx", "0"))
+
+
+def level_properties(list_style, level):
+    """(typeface, size in points) set by a list style for a paragraph level"""
+    if list_style is None:
+        return None, None
+    defaults = list_style.find(f"a:lvl{level + 1}pPr/a:defRPr", NSMAP)
+    return run_properties(defaults)
+
+
+def run_properties(rpr):
+    """(typeface, size in points) set directly on an a:rPr or a:defRPr element"""
+    if rpr is None:
+        return None, None
+    latin = rpr.find("a:latin", NSMAP)
+    typeface = latin.get("typeface") if latin is not None else None
+    size = rpr.get("sz")
+    return typeface or None, int(size) / 100 if size is not None else None
+
+
+def theme_fonts(theme_elm):
+    fonts = {}
+    if theme_elm is None:
+        return fonts
+    for kind, prefix in (("majorFont", "+mj"), ("minorFont", "+mn")):
+        latin = theme_elm.find(f"a:themeElements/a:fontScheme/a:{kind}/a:latin", NSMAP)
+        if latin is not None:
+            fonts[prefix] = latin.get("typeface")
+    return fonts
+
+
+def _placeholders(tree_elm):
+    by_idx, by_type = {}, {}
+    if tree_elm is None:
+        return by_idx, by_type
+    for sp in tree_elm.iterfind("p:cSld/p:spTree/p:sp", NSMAP):
+        key = placeholder_key(sp)
+        if key is not None:
+            by_idx.setdefault(key[1], sp)
+            by_type.setdefault(key[0], sp)
+    return by_idx, by_type
+
+
+def _list_style(shape_elm):
+    return shape_elm.find("p:txBody/a:lstStyle", NSMAP) if shape_elm is not None else None
+
+
+class LayoutStyles:
+    """Placeholders, text styles and theme fonts reachable from one slide layout"""
+
+    def __init__(self, layout_elm, master_elm, theme_elm):
+        self.layout_by_idx, self.layout_by_type = _placeholders(layout_elm)
+        _, self.master_by_type = _placeholders(master_elm)
+        self.text_styles = master_elm.find("p:txStyles", NSMAP) if master_elm is not None else None
+        self.fonts = theme_fonts(theme_elm)
+
+    def text_style(self, name):
+        if self.text_styles is None:
+            return None
+        return self.text_styles.find(f"p:{name}", NSMAP)
+
+
+class StyleResolver:
+    """Resolve effective (font name, size in points) for runs, memoized per layout placeholder"""
+
+    def __init__(self, default_text_style=None):
+        # p:defaultTextStyle from presentation.xml
+        self.default_text_style = default_text_style
+        self._layouts = {}
+        self._inherited = {}
+        self.memo_hits = 0
+        self.memo_misses = 0
+
+    def layout(self, key, load):
+        """LayoutStyles for a layout key; load() -> (layout, master, theme) elements, called once"""
+        styles = self._layouts.get(key)
+        if styles is None:
+            styles = self._layouts[key] = LayoutStyles(*load())
+        return styles
+
+    def inherited(self, layout_key, layout, placeholder, level):
+        """(typeface, size) a placeholder (or ordinary shape) inherits at a paragraph level"""
+        memo_key = (layout_key, placeholder, level)
+        found = self._inherited.get(memo_key)
+        if found is not None:
+            self.memo_hits += 1
+            return found
+        self.memo_misses += 1
+
+        list_styles = []
+        if placeholder is not None:
+            ph_type, ph_idx = placeholder
+            layout_sp = layout.layout_by_idx.get(ph_idx) if ph_idx else None
+            if layout_sp is None:
+                layout_sp = layout.layout_by_type.get(ph_type)
+            layout_type = placeholder_key(layout_sp)[0] if layout_sp is not None else ph_type
+            master_sp = layout.master_by_type.get(MASTER_PLACEHOLDER_TYPES.get(layout_type, layout_type))
+            list_styles += [_list_style(layout_sp), _list_style(master_sp)]
+            if layout_type in TITLE_TYPES:
+                list_styles.append(layout.text_style("titleStyle"))
+            elif layout_type in OTHER_TYPES:
+                list_styles.append(layout.text_style("otherStyle"))
+            else:
+                list_styles.append(layout.text_style("bodyStyle"))
+            list_styles.append(self.default_text_style)
+        else:
+            list_styles += [self.default_text_style, layout.text_style("otherStyle")]
+
+        typeface, size = None, None
+        for list_style in list_styles:
+            level_typeface, level_size = level_properties(list_style, level)
+            typeface = typeface or level_typeface
+            size = size if size is not None else level_size
+            if typeface and size is not None:
+                break
+        if typeface is None:
+            is_title = placeholder is not None and placeholder[0] in TITLE_TYPES
+            typeface = "+mj-lt" if is_title else "+mn-lt"
+        found = self._inherited[memo_key] = (typeface, size if size is not None else DEFAULT_FONT_SIZE)
+        return found
+
+    def resolve(self, layout_key, layout, shape_elm, level, rpr):
+        """Effective (font name, size) of a run given its a:rPr (or None)"""
+        typeface, size = run_properties(rpr)
+        if typeface is None or size is None:
+            shape_typeface, shape_size = level_properties(_list_style(shape_elm), level)
+            typeface = typeface or shape_typeface
+            size = size if size is not None else shape_size
+        if typeface is None or size is None:
+            inherited_typeface, inherited_size = self.inherited(
+                layout_key, layout, placeholder_key(shape_elm), level
+            )
+            typeface = typeface or inherited_typeface
+            size = size if size is not None else inherited_size
+        if typeface.startswith("+"):
+            typeface = layout.fonts.get(typeface[:3], typeface)
+        return typeface, size
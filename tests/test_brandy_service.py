@@ -0,0 +1,18 @@
+from brandy_service import JobQueue
+
+
+def test_requeue_running_drops_stale_progress(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"))
+    job_id = queue.submit("deck.pptx", {})
+    assert queue.claim()["id"] == job_id
+    for done in (1, 2):
+        queue.progress(job_id, {"type": "slide", "slides_done": done, "slides_total": 3, "issues": []})
+
+    assert queue.requeue_running() == 1
+    events = queue.events_since(job_id, 0)
+    # queued, started and two slides before the restart
+    assert [(seq, event) for seq, event, _ in events] == [(5, "requeued")]
+
+    queue.claim()
+    queue.progress(job_id, {"type": "slide", "slides_done": 1, "slides_total": 3, "issues": []})
+    assert [(seq, event) for seq, event, _ in queue.events_since(job_id, 5)] == [(6, "started"), (7, "slide")]
@@ -0,0 +1,61 @@
+import json
+
+import numpy as np
+import pytest
+from docx import Document
+
+import embed_docx
+
+
+def fake_encode(texts, batch_size, workers):
+    return np.ones((len(texts), 4), dtype=np.float32)
+
+
+def make_docx(path, heading):
+    doc = Document()
+    doc.add_heading(heading, level=1)
+    doc.add_paragraph(f"Guidance about {heading.lower()} for every deck.")
+    doc.save(path)
+    return str(path)
+
+
+def stored_sources(prefix):
+    with open(f"{prefix}_manifest.json") as f:
+        return {record["source"] for record in json.load(f)["chunks"]}
+
+
+def downgrade_chunker_version(prefix):
+    with open(f"{prefix}_manifest.json") as f:
+        manifest = json.load(f)
+    manifest["chunker_version"] = embed_docx.CHUNKER_VERSION - 1
+    with open(f"{prefix}_manifest.json", "w") as f:
+        json.dump(manifest, f)
+
+
+def test_chunker_change_rechunks_documents_not_listed(tmp_path, monkeypatch):
+    monkeypatch.setattr(embed_docx, "encode_chunks", fake_encode)
+    prefix = str(tmp_path / "store")
+    fonts = make_docx(tmp_path / "fonts.docx", "Fonts")
+    colours = make_docx(tmp_path / "colours.docx", "Colours")
+    embed_docx.build(prefix, [fonts, colours])
+    downgrade_chunker_version(prefix)
+
+    embed_docx.build(prefix, [fonts])
+    assert stored_sources(prefix) == {fonts, colours}
+
+
+def test_chunker_change_with_missing_document_fails(tmp_path, monkeypatch):
+    monkeypatch.setattr(embed_docx, "encode_chunks", fake_encode)
+    prefix = str(tmp_path / "store")
+    fonts = make_docx(tmp_path / "fonts.docx", "Fonts")
+    colours = make_docx(tmp_path / "colours.docx", "Colours")
+    embed_docx.build(prefix, [fonts, colours])
+    downgrade_chunker_version(prefix)
+    (tmp_path / "colours.docx").unlink()
+
+    with pytest.raises(ValueError, match="colours.docx"):
+        embed_docx.build(prefix, [fonts])
+    assert stored_sources(prefix) == {fonts, colours}
+
+    embed_docx.build(prefix, [fonts], prune=True)
+    assert stored_sources(prefix) == {fonts}
@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+DEMO_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "demo")
+sys.path.insert(0, DEMO_DIR)
+
+from icon_search import IconSearcher  # noqa: E402
+
+
+@pytest.mark.parametrize("min_score", [0, 0.3, 0.5])
+def test_indexed_search_matches_linear_search(tmp_path, min_score):
+    searcher = IconSearcher(os.path.join(DEMO_DIR, "ImageLibrary_60_20250609_1733"),
+                            catalog_path=str(tmp_path / "catalog.sqlite3"))
+    for term in ("cloud", "analytics", "xyz"):
+        assert searcher.search(term, min_score, 40) == searcher.search_linear(term, min_score, 40)
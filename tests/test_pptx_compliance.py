@@ -0,0 +1,41 @@
+import io
+
+from pptx import Presentation
+from pptx.util import Inches, Pt
+
+import metrics
+from fake_model import FakeGeminiModel
+from pptx_compliance import pptx_compliance_check_with_rules
+from pptx_extract import extract_elements
+from rule_engine import RuleEngine
+
+
+def small_print_deck():
+    prs = Presentation()
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    run = slide.shapes.add_textbox(Inches(1), Inches(1), Inches(4), Inches(1)).text_frame.paragraphs[0].add_run()
+    run.text = "Revenue grew in every market this quarter."
+    run.font.size = Pt(8)
+    data = io.BytesIO()
+    prs.save(data)
+    data.seek(0)
+    return data
+
+
+def test_implement_actions_resized_runs_pass_the_rules(tmp_path, monkeypatch):
+    monkeypatch.setenv("BRANDY_METRICS_PATH", str(tmp_path / "metrics.jsonl"))
+    monkeypatch.setattr(metrics, "_default_recorder", None)
+    issues, output, _ = pptx_compliance_check_with_rules(
+        small_print_deck(), "", False, None, implement_actions=True,
+        gemini_model=FakeGeminiModel(latency=0), guidelines_text="",
+        verdict_cache_path=str(tmp_path / "cache.sqlite3"), manifest_path=None, icon_library=None
+    )
+    assert not any("min-font-size" in issue for issue in issues)
+
+    # The saved deck checks clean against the same rules.
+    rules = RuleEngine()
+    for _, element_id, element_info in extract_elements(output, resolve_styles=True):
+        if element_id == "1":
+            assert element_info["font_details"][0]["font_size"] == 11
+            _, _, violations = rules.evaluate(element_info)
+            assert not any("min-font-size" in violation for violation in violations)
@@ -0,0 +1,31 @@
+import io
+import os
+
+from pptx import Presentation
+
+from pptx_extract import slide_fingerprints
+
+DECK = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                    "SAP Innovation Awards 2024 Pitch Deck Template.pptx")
+
+
+def resaved(prs):
+    output = io.BytesIO()
+    prs.save(output)
+    output.seek(0)
+    return output
+
+
+def test_resaved_deck_keeps_slide_fingerprints():
+    original = slide_fingerprints(DECK)
+    assert slide_fingerprints(resaved(Presentation(DECK))) == original
+
+
+def test_edited_slide_gets_new_fingerprint():
+    original = slide_fingerprints(DECK)
+    prs = Presentation(DECK)
+    shape = next(shape for shape in prs.slides[1].shapes if shape.has_text_frame and shape.text_frame.text)
+    shape.text_frame.text = "Something else entirely"
+    changed = slide_fingerprints(resaved(prs))
+    assert changed[1] != original[1]
+    assert changed[:1] + changed[2:] == original[:1] + original[2:]
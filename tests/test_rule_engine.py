@@ -0,0 +1,36 @@
+import os
+import zipfile
+
+from lxml import etree
+
+from pptx_extract import element_record
+from rule_engine import RuleEngine, font_family
+from style_resolver import theme_fonts
+
+TEMPLATE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "SAP_2025.potx")
+
+
+def template_theme_fonts():
+    with zipfile.ZipFile(TEMPLATE) as z:
+        return theme_fonts(etree.fromstring(z.read("ppt/theme/theme1.xml")))
+
+
+def brand_font_violations(font_name):
+    element_info = element_record(1, "1", "Quarterly results", [(font_name, 24.0, False, "Quarterly results")])
+    _, _, violations = RuleEngine().evaluate(element_info)
+    return [v for v in violations if v.startswith("[brand-font]")]
+
+
+def test_template_theme_fonts_are_brand_fonts():
+    fonts = template_theme_fonts()
+    assert fonts["+mj"] == "72 Brand Medium"
+    assert brand_font_violations(fonts["+mj"]) == []
+    assert brand_font_violations(fonts["+mn"]) == []
+
+
+def test_brand_font_weights_pass_and_other_families_fail():
+    for font_name in ("72 Brand Regular", "72 Brand Bold", "72 Black", "Arial Bold", "Trebuchet MS Italic"):
+        assert brand_font_violations(font_name) == [], font_name
+    assert brand_font_violations("Comic Sans MS")
+    assert brand_font_violations("Arial Narrow")
+    assert font_family("72 Brand Medium") == "72 Brand"
@@ -0,0 +1,38 @@
+import io
+
+from lxml import etree
+from pptx import Presentation
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.util import Inches, Pt
+
+from pptx_extract import extract_elements
+from style_resolver import theme_fonts
+
+
+def deck_with_run(typeface):
+    prs = Presentation()
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    run = slide.shapes.add_textbox(Inches(1), Inches(1), Inches(4), Inches(1)).text_frame.paragraphs[0].add_run()
+    run.text = "Quarterly results"
+    run.font.size = Pt(14)
+    run.font.name = typeface
+    master = prs.slide_masters[0]
+    fonts = theme_fonts(etree.fromstring(master.part.part_related_by(RT.THEME).blob))
+    data = io.BytesIO()
+    prs.save(data)
+    data.seek(0)
+    return data, fonts
+
+
+def test_explicit_theme_font_reference_is_resolved():
+    data, fonts = deck_with_run("+mj-lt")
+    [(_, _, element_info)] = list(extract_elements(data, resolve_styles=True))
+    [details] = element_info["font_details"]
+    assert details["font_name"] == fonts["+mj"]
+    assert details["font_size"] == 14
+
+
+def test_explicit_font_name_is_kept():
+    data, _ = deck_with_run("Arial")
+    [(_, _, element_info)] = list(extract_elements(data, resolve_styles=True))
+    assert element_info["font_details"][0]["font_name"] == "Arial"
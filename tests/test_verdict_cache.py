@@ -0,0 +1,36 @@
+from compliance_engine import ComplianceChecker
+from fake_model import FakeGeminiModel
+from verdict_cache import VerdictCache
+
+
+ELEMENT = {"slide_number": 1, "element_number": "1", "text": "Our roadmap for the coming year", "font_details": []}
+
+
+def test_checks_with_other_guidelines_keep_the_shared_cache(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    for guidelines in ("guidelines A", "guidelines B"):
+        cache = VerdictCache(path)
+        ComplianceChecker(FakeGeminiModel(latency=0), guidelines, cache=cache).check_all([ELEMENT])
+        cache.close()
+
+    cache = VerdictCache(path)
+    checker = ComplianceChecker(FakeGeminiModel(latency=0), "guidelines A", cache=cache)
+    checker.check_all([ELEMENT])
+    cache.close()
+    assert checker.stats["cache_hits"] == 1
+    assert checker.stats["model_checks"] == 0
+
+
+def test_writes_are_buffered_until_close(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = VerdictCache(path, max_entries=2)
+    for n in range(3):
+        cache.put(f"key{n}", (True, "COMPLIANT"))
+    assert cache.get("key2") == (True, "COMPLIANT")
+    assert cache._conn.total_changes == 0
+    cache.close()
+
+    cache = VerdictCache(path, max_entries=2)
+    assert cache.get("key0") is None
+    assert cache.get("key1") == (True, "COMPLIANT")
+    cache.close()
@@ -0,0 +1,151 @@
+import numpy as np
+
+
+# Above this many vectors build_index switches to the approximate backend.
+IVF_THRESHOLD = 20000
+SEARCH_BLOCK_ROWS = 65536
+
+
+def normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def top_k_indices(scores, top_k):
+    """Indexes of the top_k scores, best first, without sorting everything"""
+    top_k = min(top_k, len(scores))
+    if top_k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if top_k < len(scores):
+        candidates = np.argpartition(scores, -top_k)[-top_k:]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(scores[candidates])[::-1]]
+
+
+class ExactIndex:
+    """Brute-force cosine search over normalized vectors"""
+
+    kind = "exact"
+
+    def __init__(self, embeddings, dtype=np.float32):
+        self.dtype = np.dtype(dtype)
+        # Stored in dtype (float16 halves the file), searched in float32.
+        self.vectors = normalize(embeddings).astype(self.dtype)
+        self._search_vectors = self.vectors.astype(np.float32, copy=False)
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def search(self, query, top_k=3):
+        """Return (indices, scores) of the top_k most similar vectors"""
+        q = normalize(query)[0]
+        scores = self._search_vectors @ q
+        indices = top_k_indices(scores, top_k)
+        return indices, scores[indices]
+
+    def save(self, path):
+        np.savez(path, kind=self.kind, vectors=self.vectors)
+
+    @classmethod
+    def _from_arrays(cls, data):
+        index = cls.__new__(cls)
+        index.vectors = data['vectors']
+        index.dtype = index.vectors.dtype
+        index._search_vectors = index.vectors.astype(np.float32, copy=False)
+        return index
+
+
+class IVFIndex:
+    """Approximate search: spherical k-means cells, probing the closest n_probe cells"""
+
+    kind = "ivf"
+
+    def __init__(self, embeddings, n_lists=None, n_probe=16, dtype=np.float32,
+                 iterations=10, train_size=None, seed=0):
+        vectors = normalize(embeddings)
+        n = len(vectors)
+        self.n_lists = max(1, min(n, n_lists or int(np.sqrt(n))))
+        self.n_probe = n_probe
+        self.dtype = np.dtype(dtype)
+
+        rng = np.random.default_rng(seed)
+        train_size = min(n, train_size or self.n_lists * 256)
+        sample = vectors[rng.choice(n, train_size, replace=False)]
+        self.centroids = self._train(sample, iterations, rng)
+
+        assignments = self._assign(vectors)
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=self.n_lists)
+        self.offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        self.ids = order.astype(np.int64)
+        self.vectors = vectors[order].astype(self.dtype)
+        self._search_vectors = self.vectors.astype(np.float32, copy=False)
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def _train(self, sample, iterations, rng):
+        centroids = sample[rng.choice(len(sample), self.n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            empty = np.bincount(assignments, minlength=self.n_lists) == 0
+            # Re-seed empty cells with random points.
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+            centroids = normalize(sums)
+        return centroids
+
+    def _assign(self, vectors):
+        assignments = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), SEARCH_BLOCK_ROWS):
+            block = vectors[start:start + SEARCH_BLOCK_ROWS]
+            assignments[start:start + len(block)] = np.argmax(block @ self.centroids.T, axis=1)
+        return assignments
+
+    def search(self, query, top_k=3, n_probe=None):
+        """Return (indices, scores) of the approximate top_k most similar vectors"""
+        q = normalize(query)[0]
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+        cells = top_k_indices(self.centroids @ q, n_probe)
+        rows = np.concatenate([np.arange(self.offsets[c], self.offsets[c + 1]) for c in cells])
+        scores = self._search_vectors[rows] @ q
+        best = top_k_indices(scores, top_k)
+        return self.ids[rows[best]], scores[best]
+
+    def save(self, path):
+        np.savez(path, kind=self.kind, vectors=self.vectors, ids=self.ids,
+                 centroids=self.centroids, offsets=self.offsets, n_probe=self.n_probe)
+
+    @classmethod
+    def _from_arrays(cls, data):
+        index = cls.__new__(cls)
+        index.vectors = data['vectors']
+        index.dtype = index.vectors.dtype
+        index._search_vectors = index.vectors.astype(np.float32, copy=False)
+        index.ids = data['ids']
+        index.centroids = data['centroids']
+        index.offsets = data['offsets']
+        index.n_lists = len(index.centroids)
+        index.n_probe = int(data['n_probe'])
+        return index
+
+
+INDEX_TYPES = {cls.kind: cls for cls in (ExactIndex, IVFIndex)}
+
+
+def build_index(embeddings, kind=None, **kwargs):
+    """Build an index; kind defaults to exact for small corpora and IVF above IVF_THRESHOLD"""
+    if kind is None:
+        kind = "ivf" if len(embeddings) > IVF_THRESHOLD else "exact"
+    return INDEX_TYPES[kind](embeddings, **kwargs)
+
+
+def load_index(path):
+    with np.load(path) as data:
+        return INDEX_TYPES[str(data['kind'])]._from_arrays({k: data[k] for k in data.files})
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+
+DEFAULT_CACHE_PATH = "verdict_cache.sqlite3"
+DEFAULT_MAX_ENTRIES = 50000
+
+# Position fields change when slides are reordered but not the verdict.
+POSITION_FIELDS = ("slide_number", "element_number")
+
+
+def guidelines_version(guidelines_text):
+    return hashlib.sha256((guidelines_text or "").encode("utf-8")).hexdigest()
+
+
+def normalize_element_info(element_info):
+    if isinstance(element_info, dict):
+        element_info = {k: v for k, v in element_info.items() if k not in POSITION_FIELDS}
+        return json.dumps(element_info, sort_keys=True, ensure_ascii=False, default=str)
+    return " ".join(str(element_info).split())
+
+
+def verdict_key(element_info, guidelines_version, model_name):
+    payload = "\0".join([model_name, guidelines_version, normalize_element_info(element_info)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class VerdictCache:
+    """SQLite verdict store keyed by element content, guideline version and model.
+
+    Runs with different guidelines or retrieval settings can share one file:
+    their keys differ, and verdicts for versions no longer in use age out
+    through the least-recently-used eviction.
+
+    New verdicts and last-used times are kept in memory and written in one
+    transaction by flush(), every FLUSH_EVERY writes and on close, so a
+    lookup or store costs no commit of its own.
+    """
+
+    FLUSH_EVERY = 1000
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # key -> (is_compliant, message, last_used) not yet written
+        self._pending = {}
+        # key -> last_used for stored verdicts looked up since the last flush
+        self._touched = {}
+        # A timeout lets several worker processes share one cache file.
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS verdicts ("
+            "key TEXT PRIMARY KEY, is_compliant INTEGER, message TEXT, last_used REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS verdicts_last_used ON verdicts(last_used)")
+        self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is not None:
+                self.hits += 1
+                self._pending[key] = (pending[0], pending[1], time.time())
+                return bool(pending[0]), pending[1]
+            row = self._conn.execute(
+                "SELECT is_compliant, message FROM verdicts WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touched[key] = time.time()
+            self._flush_if_due()
+            return bool(row[0]), row[1]
+
+    def put(self, key, verdict):
+        is_compliant, message = verdict
+        with self._lock:
+            self._pending[key] = (int(bool(is_compliant)), message, time.time())
+            self._touched.pop(key, None)
+            self._flush_if_due()
+
+    def flush(self):
+        """Write buffered verdicts and last-used times, then evict, in one transaction"""
+        with self._lock:
+            self._flush()
+
+    def _flush_if_due(self):
+        if len(self._pending) + len(self._touched) >= self.FLUSH_EVERY:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending and not self._touched:
+            return
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO verdicts (key, is_compliant, message, last_used) VALUES (?, ?, ?, ?)",
+            [(key, *entry) for key, entry in self._pending.items()]
+        )
+        self._conn.executemany(
+            "UPDATE verdicts SET last_used = ? WHERE key = ?",
+            [(last_used, key) for key, last_used in self._touched.items()]
+        )
+        if self._pending:
+            self._evict()
+        self._conn.commit()
+        self._pending.clear()
+        self._touched.clear()
+
+    def _evict(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0]
+        if self.max_entries and count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM verdicts WHERE key IN "
+                "(SELECT key FROM verdicts ORDER BY last_used ASC LIMIT ?)",
+                (count - self.max_entries,)
+            )
+
+    def clear(self):
+        with self._lock:
+            self._pending.clear()
+            self._touched.clear()
+            self._conn.execute("DELETE FROM verdicts")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            self._conn.close()